@@ -0,0 +1,166 @@
+"""Measure the hot post tables and their hot-path queries before and after archiving.
+
+Seeds accounts with years of published posts (with attachments, analytics
+and metric samples) plus a few weeks of upcoming ones, times the calendar,
+post list and scheduler queries, runs the archiver and times them again.
+Reports table and index sizes when SQLite was built with the ``dbstat``
+table.
+
+Usage:
+    python -m backend.benchmarks.archive --users 20 --posts-per-user 10000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="archive-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine, select
+
+from backend.database import Base, SessionLocal, engine
+from backend.models import ContentStatus, Post
+from backend.routers.posts import POST_LOAD_OPTIONS, POST_ORDER
+from backend.services.archive import PostArchiver
+
+HOT_TABLES = ("posts", "media_attachments", "post_analytics", "post_metric_samples")
+
+def timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def seed(conn: sqlite3.Connection, users: int, posts_per_user: int, upcoming: int, samples: int):
+    platforms = ("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK")
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password, full_name, is_active) VALUES (?, ?, 'x', 'Bench', 1)",
+        ((n, f"bench{n}@example.com") for n in range(1, users + 1))
+    )
+    post_id = 0
+    for user_id in range(1, users + 1):
+        posts, attachments, analytics, metric_samples = [], [], [], []
+        for n in range(posts_per_user + upcoming):
+            post_id += 1
+            if n < posts_per_user:
+                scheduled = now - timedelta(hours=rng.randrange(24, 3 * 365 * 24))
+                posts.append((post_id, f"Post {n}", platforms[n % 4], "PUBLISHED", timestamp(scheduled), timestamp(scheduled), user_id))
+                analytics.append((post_id, rng.randrange(500), rng.randrange(50), rng.randrange(50), 1000, timestamp(scheduled + timedelta(days=2))))
+                for k in range(samples):
+                    observed = scheduled + timedelta(hours=k)
+                    metric_samples.append((post_id, timestamp(observed), timestamp(observed), k, 0, 0, 10 * k))
+            else:
+                scheduled = now + timedelta(hours=rng.randrange(1, 28 * 24))
+                posts.append((post_id, f"Upcoming {n}", platforms[n % 4], "SCHEDULED", timestamp(scheduled), None, user_id))
+            attachments.append((post_id, f"https://cdn.example.com/{post_id}.png", "image"))
+        conn.executemany(
+            "INSERT INTO posts (id, content, platform, status, scheduled_time, published_time, author_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            posts
+        )
+        conn.executemany("INSERT INTO media_attachments (post_id, url, type) VALUES (?, ?, ?)", attachments)
+        conn.executemany(
+            "INSERT INTO post_analytics (post_id, likes, shares, comments, impressions, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            analytics
+        )
+        conn.executemany(
+            "INSERT INTO post_metric_samples (post_id, observed_at, bucket, likes, shares, comments, impressions)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            metric_samples
+        )
+    conn.commit()
+
+def table_sizes(conn: sqlite3.Connection) -> dict:
+    """Bytes per table including its indexes, or None without dbstat."""
+    try:
+        rows = conn.execute(
+            "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return dict(rows)
+
+def print_tables(label: str):
+    conn = sqlite3.connect(DB_PATH)
+    sizes = table_sizes(conn)
+    print(label)
+    for table in HOT_TABLES:
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        size = f"{sizes.get(table, 0) / 2**20:8.1f}MB" if sizes is not None else ""
+        print(f"  {table:<22} {count:>10} rows {size}")
+    conn.close()
+
+async def time_queries(args) -> dict:
+    now = datetime.now(timezone.utc)
+    rng = random.Random(7)
+    queries = {
+        # The calendar's next two weeks for one author
+        "calendar 14 days": lambda author: select(Post).options(*POST_LOAD_OPTIONS).where(
+            Post.author_id == author, Post.scheduled_time >= now, Post.scheduled_time < now + timedelta(days=14)
+        ).order_by(Post.scheduled_time, Post.id),
+        # First page of the post list
+        "post list page": lambda author: select(Post).options(*POST_LOAD_OPTIONS).where(
+            Post.author_id == author
+        ).order_by(*POST_ORDER).limit(100),
+        # The scheduler's refill window
+        "scheduler refill": lambda author: select(Post).where(
+            Post.status == ContentStatus.SCHEDULED, Post.scheduled_time <= now + timedelta(minutes=15)
+        ).order_by(Post.scheduled_time).limit(100),
+    }
+    results = {}
+    async with SessionLocal() as db:
+        for name, build in queries.items():
+            timings = []
+            for _ in range(args.runs):
+                query = build(rng.randrange(1, args.users + 1))
+                started = time.perf_counter()
+                (await db.execute(query)).scalars().all()
+                timings.append(time.perf_counter() - started)
+                db.expunge_all()
+            results[name] = statistics.median(timings)
+    return results
+
+async def run(args):
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{DB_PATH}"))
+    conn = sqlite3.connect(DB_PATH)
+    started = time.perf_counter()
+    seed(conn, args.users, args.posts_per_user, args.upcoming, args.samples)
+    conn.close()
+    print(f"Seeded {args.users * (args.posts_per_user + args.upcoming)} posts in {time.perf_counter() - started:.1f}s")
+    print_tables("Before archiving:")
+    before = await time_queries(args)
+
+    archiver = PostArchiver(after_days=args.after_days, batch_size=args.batch_size)
+    started = time.perf_counter()
+    moved = await archiver.run_once()
+    elapsed = time.perf_counter() - started
+    print(f"Archived {moved} posts in {elapsed:.1f}s ({moved / elapsed:.0f} posts/s, "
+          f"batch p50 {archiver.metrics()['batch_time_p50'] * 1000:.0f}ms)")
+    # Archiving leaves free pages behind; VACUUM is what returns them
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("VACUUM")
+    conn.close()
+    print_tables("After archiving:")
+    after = await time_queries(args)
+
+    for name in before:
+        print(f"{name:<20} p50 {before[name] * 1000:8.2f}ms -> {after[name] * 1000:8.2f}ms")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--posts-per-user", type=int, default=10000, help="published posts over the last three years")
+    parser.add_argument("--upcoming", type=int, default=200, help="scheduled posts per user over the next four weeks")
+    parser.add_argument("--samples", type=int, default=5, help="metric samples per published post")
+    parser.add_argument("--after-days", type=float, default=90)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure authenticated request throughput with and without the token cache.
+
+Also reports the worst event-loop stall seen during a login storm, with bcrypt
+run inline (the previous behaviour) versus on the bounded password pool.
+
+Usage:
+    python -m backend.benchmarks.auth_throughput --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="calendar-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+from fastapi import FastAPI
+
+from backend.database import Base, engine
+from backend.routers import auth, posts
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(posts.router, prefix="/api/posts")
+    return app
+
+async def authenticated_throughput(client: httpx.AsyncClient, token: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/api/posts/", params={"limit": 1}, headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+async def max_loop_stall(work) -> float:
+    """Run ``work`` while a ticker measures the longest gap between loop iterations."""
+    stalls = [0.0]
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls[0] = max(stalls[0], now - last - 0.001)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await work()
+    done.set()
+    await tick
+    return stalls[0]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/auth/register", json={"email": EMAIL, "password": PASSWORD, "full_name": "Bench"})
+        token = response.json()["access_token"]
+
+        for label, ttl in (("no cache", 0), ("cached", 60)):
+            auth.token_cache.clear()
+            auth.token_cache.ttl = ttl
+            rps = await authenticated_throughput(client, token, args.requests, args.concurrency)
+            print(f"{label:<10} authenticated rps={rps:8.1f}")
+
+        hashed = auth.get_password_hash(PASSWORD)
+
+        async def inline_storm():
+            for _ in range(args.logins):
+                auth.verify_password(PASSWORD, hashed)
+                await asyncio.sleep(0)
+
+        async def pooled_storm():
+            await asyncio.gather(*(auth.verify_password_async(PASSWORD, hashed) for _ in range(args.logins)))
+
+        for label, work in (("inline", inline_storm), ("pooled", pooled_storm)):
+            stall = await max_loop_stall(work)
+            print(f"{label:<10} login storm ({args.logins} bcrypt) max loop stall={stall * 1000:8.2f}ms")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""Time the best-time optimizer for an account with many published posts.
+
+Seeds one account with published posts and their analytics, then reports
+how long building the engagement model takes (the first request, and once
+per cache TTL) and how long recommendations, heatmaps and incremental
+snapshot updates take against the cached model.
+
+Usage:
+    python -m backend.benchmarks.best_time --posts 100000 --drafts 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="best-time-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine
+
+from backend.database import Base, SessionLocal, engine
+from backend.models import PlatformType
+from backend.services.optimizer import BestTimeOptimizer
+
+def seed(conn: sqlite3.Connection, posts: int, drafts: int, scheduled: int):
+    conn.execute("INSERT INTO users (id, email, hashed_password, full_name, is_active) VALUES (1, 'bench@example.com', 'x', 'Bench', 1)")
+    platforms = ("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK")
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    rows = []
+    for n in range(posts):
+        published = start + timedelta(hours=rng.randrange(3 * 365 * 24))
+        rows.append((f"Post {n}", platforms[n % 4], "PUBLISHED", published.strftime("%Y-%m-%d %H:%M:%S.000000")))
+    conn.executemany(
+        "INSERT INTO posts (content, platform, status, published_time, scheduled_time, author_id) VALUES (?, ?, ?, ?, ?4, 1)",
+        rows
+    )
+    conn.executemany(
+        "INSERT INTO post_analytics (post_id, likes, shares, comments, impressions, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (n + 1, int(rng.lognormvariate(3, 1)), rng.randrange(10), rng.randrange(10), 1000, rows[n][3])
+            for n in range(posts)
+        )
+    )
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO posts (content, platform, status, scheduled_time, author_id) VALUES (?, ?, 'SCHEDULED', ?, 1)",
+        (
+            (f"Scheduled {n}", platforms[n % 4], (now + timedelta(hours=rng.randrange(14 * 24))).strftime("%Y-%m-%d %H:%M:%S.000000"))
+            for n in range(scheduled)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO posts (content, platform, status, author_id) VALUES (?, ?, 'DRAFT', 1)",
+        ((f"Draft {n}", platforms[n % 4]) for n in range(drafts))
+    )
+    conn.commit()
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(f"{label:<28} p50={statistics.median(timings) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms")
+
+async def run(args):
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{DB_PATH}"))
+    conn = sqlite3.connect(DB_PATH)
+    started = time.perf_counter()
+    seed(conn, args.posts, args.drafts, args.scheduled)
+    print(f"Seeded {args.posts} published posts in {time.perf_counter() - started:.1f}s")
+    drafts = [
+        (post_id, PlatformType[platform])
+        for post_id, platform in conn.execute("SELECT id, platform FROM posts WHERE status = 'DRAFT'")
+    ]
+    conn.close()
+
+    optimizer = BestTimeOptimizer()
+    async with SessionLocal() as db:
+        builds = []
+        for _ in range(5):
+            optimizer._models.clear()
+            started = time.perf_counter()
+            await optimizer.model(db, 1)
+            builds.append(time.perf_counter() - started)
+        report("build model (cold)", builds)
+
+        now = datetime.now(timezone.utc)
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            await optimizer.recommend(db, 1, drafts, now, 14, timedelta(hours=2))
+            timings.append(time.perf_counter() - started)
+        report(f"recommend {len(drafts)} drafts", timings)
+
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            await optimizer.heatmap(db, 1)
+            timings.append(time.perf_counter() - started)
+        report("heatmap", timings)
+
+        rng = random.Random(7)
+        timings = []
+        for _ in range(args.runs):
+            snapshots = [
+                {"post_id": rng.randrange(1, args.posts + 1), "observed_at": now, "likes": rng.randrange(1000), "shares": 0, "comments": 0}
+                for _ in range(100)
+            ]
+            started = time.perf_counter()
+            optimizer.observe(1, snapshots)
+            # The next recommendation re-scores the updated model
+            await optimizer.recommend(db, 1, drafts, now, 14, timedelta(hours=2))
+            timings.append(time.perf_counter() - started)
+        report("100 snapshots + recommend", timings)
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--drafts", type=int, default=50)
+    parser.add_argument("--scheduled", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
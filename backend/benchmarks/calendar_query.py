@@ -0,0 +1,101 @@
+"""Time the calendar range query on a large seeded posts table, with and without
+the composite indexes, and print SQLite's query plan for each.
+
+Usage:
+    python -m backend.benchmarks.calendar_query --posts 1000000 --users 1000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="calendar-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import sqlite
+
+from backend.database import Base
+from backend.models import Post
+
+CALENDAR_INDEXES = ("ix_posts_author_scheduled_time", "ix_posts_author_status_platform")
+
+def seed(conn: sqlite3.Connection, users: int, posts: int):
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password, full_name, is_active) VALUES (?, ?, 'x', ?, 1)",
+        ((i, f"user{i}@example.com", f"User {i}") for i in range(1, users + 1))
+    )
+    platforms = ("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK")
+    statuses = ("DRAFT", "SCHEDULED", "PUBLISHED", "FAILED")
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    rows = (
+        (
+            f"Post {n}",
+            platforms[n % 4],
+            statuses[n % 4],
+            (start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))).strftime("%Y-%m-%d %H:%M:%S.000000"),
+            rng.randrange(1, users + 1),
+        )
+        for n in range(posts)
+    )
+    conn.executemany(
+        "INSERT INTO posts (content, platform, status, scheduled_time, author_id) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+
+def calendar_sql(author_id: int, window_start: datetime, window_end: datetime) -> str:
+    # Same statement as GET /api/posts/calendar
+    query = select(Post).where(
+        Post.author_id == author_id,
+        Post.scheduled_time >= window_start,
+        Post.scheduled_time < window_end
+    ).order_by(Post.scheduled_time, Post.id)
+    return str(query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+def measure(conn: sqlite3.Connection, users: int, runs: int) -> list:
+    rng = random.Random(7)
+    timings = []
+    for _ in range(runs):
+        window_start = datetime(2024, 1, 1) + timedelta(days=rng.randrange(3 * 365 - 35))
+        sql = calendar_sql(rng.randrange(1, users + 1), window_start, window_start + timedelta(days=35))
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{DB_PATH}"))
+    conn = sqlite3.connect(DB_PATH)
+    for name in CALENDAR_INDEXES:
+        conn.execute(f"DROP INDEX {name}")
+
+    started = time.perf_counter()
+    seed(conn, args.users, args.posts)
+    print(f"Seeded {args.posts} posts for {args.users} users in {time.perf_counter() - started:.1f}s")
+
+    sample = calendar_sql(1, datetime(2024, 6, 1), datetime(2024, 7, 6))
+    for label in ("without indexes", "with indexes"):
+        if label == "with indexes":
+            conn.execute("CREATE INDEX ix_posts_author_scheduled_time ON posts (author_id, scheduled_time)")
+            conn.execute("CREATE INDEX ix_posts_author_status_platform ON posts (author_id, status, platform)")
+            conn.execute("ANALYZE")
+        plan = " | ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sample}"))
+        timings = measure(conn, args.users, args.runs)
+        print(f"{label:<16} p50={statistics.median(timings) * 1000:8.2f}ms max={max(timings) * 1000:8.2f}ms plan: {plan}")
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
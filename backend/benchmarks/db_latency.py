@@ -0,0 +1,131 @@
+"""Compare request latency of the async database path against the old sync one.
+
+Seeds a throwaway SQLite file, then drives ``GET /api/posts/`` concurrently
+through two apps: the real async router, and a copy of the previous handler
+that runs a synchronous ``Session`` inside ``async def`` (blocking the loop).
+
+Usage:
+    python -m backend.benchmarks.db_latency --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="calendar-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database import Base, engine as async_engine
+from backend.models import ContentStatus, PlatformType, Post, User
+from backend.routers import posts
+from backend.routers.auth import get_current_user
+
+# The sync pool checks connections out on the event loop thread, so it must be at
+# least as large as the concurrency or a waiting checkout stalls the whole loop.
+sync_engine = create_engine(f"sqlite:///{DB_PATH}", pool_size=200)
+SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+def seed(users: int, posts_per_user: int):
+    Base.metadata.create_all(bind=sync_engine)
+    platforms = list(PlatformType)
+    statuses = list(ContentStatus)
+    start = datetime(2024, 1, 1)
+    with SyncSessionLocal() as db:
+        db.add_all(
+            User(email=f"user{i}@example.com", hashed_password="x", full_name=f"User {i}")
+            for i in range(users)
+        )
+        db.commit()
+        db.bulk_insert_mappings(Post, [
+            {
+                "content": f"Post {n} for user {u}",
+                "platform": platforms[n % len(platforms)],
+                "status": statuses[n % len(statuses)],
+                "scheduled_time": start + timedelta(hours=n),
+                "author_id": u + 1,
+            }
+            for u in range(users)
+            for n in range(posts_per_user)
+        ])
+        db.commit()
+
+def bench_user():
+    return User(id=1, email="user0@example.com", is_active=True)
+
+def get_sync_db():
+    db = SyncSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(posts.router, prefix="/api/posts")
+    app.dependency_overrides[get_current_user] = bench_user
+    return app
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    # Mirrors the pre-async handler: sync queries inside an async endpoint
+    @app.get("/api/posts/", response_model=list[posts.PostResponse])
+    async def get_posts(limit: int = 100, db: Session = Depends(get_sync_db)):
+        query = db.query(Post).filter(Post.author_id == bench_user().id)
+        return query.limit(limit).all()
+
+    return app
+
+async def drive(app: FastAPI, total: int, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/posts/", params={"limit": 100})
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+def summarize(name: str, latencies: list, elapsed: float):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<6} requests={len(ordered)} rps={len(ordered) / elapsed:8.1f} "
+        f"p50={statistics.median(ordered) * 1000:7.2f}ms p99={p99 * 1000:7.2f}ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=1000, help="posts per user")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    if args.concurrency > sync_engine.pool.size():
+        parser.error(f"--concurrency must be <= {sync_engine.pool.size()} for the sync baseline")
+
+    seed(args.users, args.posts)
+    print(f"Seeded {args.users * args.posts} posts into {DB_PATH}")
+
+    for name, app in (("sync", build_sync_app()), ("async", build_async_app())):
+        started = time.perf_counter()
+        latencies = await drive(app, args.requests, args.concurrency)
+        summarize(name, latencies, time.perf_counter() - started)
+
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
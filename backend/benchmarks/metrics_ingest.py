@@ -0,0 +1,119 @@
+"""Measure analytics snapshot ingestion throughput and curve computation time
+against synthetic metric streams.
+
+Compares writing each snapshot in its own transaction with the buffered
+MetricsIngestor, then times the per-post and per-platform curves.
+
+Usage:
+    python -m backend.benchmarks.metrics_ingest --posts 1000 --snapshots 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="metrics-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import insert
+
+from backend.database import Base, SessionLocal, engine
+from backend.models import Post, PostMetricSample, User, PlatformType
+from backend.services.analytics import MetricsIngestor, platform_curves, post_curve
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def synthetic_snapshots(posts: int, count: int, seed: int = 42):
+    """Cumulative engagement that grows fast after publishing and then levels off."""
+    rng = random.Random(seed)
+    state = {post_id: [0, 0, 0, 0] for post_id in range(1, posts + 1)}
+    per_post = max(count // posts, 1)
+    snapshots = []
+    for step in range(per_post):
+        decay = 1 / (1 + step / 10)
+        for post_id, totals in state.items():
+            totals[3] += int(rng.expovariate(1 / (500 * decay)))
+            totals[0] += int(totals[3] * 0.0005 * decay * rng.random() * 10)
+            totals[1] += rng.random() < 0.2 * decay
+            totals[2] += rng.random() < 0.3 * decay
+            snapshots.append({
+                "post_id": post_id,
+                "observed_at": START + timedelta(minutes=5 * step, seconds=rng.randrange(300)),
+                "likes": totals[0],
+                "shares": totals[1],
+                "comments": totals[2],
+                "impressions": totals[3],
+            })
+            if len(snapshots) == count:
+                return snapshots
+    return snapshots
+
+async def seed_posts(posts: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        await db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x", "full_name": "Bench"}])
+        platforms = list(PlatformType)
+        await db.execute(insert(Post), [
+            {"id": i, "content": f"Post {i}", "platform": platforms[i % 4], "author_id": 1}
+            for i in range(1, posts + 1)
+        ])
+        await db.commit()
+
+async def per_snapshot(snapshots: list) -> float:
+    started = time.perf_counter()
+    for snapshot in snapshots:
+        async with SessionLocal() as db:
+            await db.execute(insert(PostMetricSample), [{**snapshot, "bucket": snapshot["observed_at"]}])
+            await db.commit()
+    return time.perf_counter() - started
+
+async def buffered(snapshots: list, batch: int) -> float:
+    ingestor = MetricsIngestor(flush_size=5000, flush_interval=0.1, max_buffer=len(snapshots))
+    ingestor.start()
+    started = time.perf_counter()
+    for offset in range(0, len(snapshots), batch):
+        ingestor.submit([dict(s) for s in snapshots[offset:offset + batch]])
+        await asyncio.sleep(0)
+    await ingestor.stop()
+    elapsed = time.perf_counter() - started
+    assert ingestor.flushed == len(snapshots), ingestor.metrics()
+    return elapsed
+
+async def run(args):
+    await seed_posts(args.posts)
+    snapshots = synthetic_snapshots(args.posts, args.snapshots)
+
+    naive = snapshots[:args.naive]
+    elapsed = await per_snapshot(naive)
+    print(f"one transaction per snapshot: {len(naive) / elapsed:10.0f} snapshots/s ({len(naive)} snapshots)")
+
+    elapsed = await buffered(snapshots, args.batch)
+    print(f"buffered bulk ingestion:      {len(snapshots) / elapsed:10.0f} snapshots/s ({len(snapshots)} snapshots)")
+
+    async with SessionLocal() as db:
+        started = time.perf_counter()
+        curve = await post_curve(db, 1, 3600)
+        print(f"post curve (1h):       {(time.perf_counter() - started) * 1000:8.1f}ms, {len(curve['points'])} points")
+
+        end = START + timedelta(minutes=5 * (len(snapshots) // args.posts + 1))
+        started = time.perf_counter()
+        curves = await platform_curves(db, 1, START, end, 3600)
+        print(f"platform curves (1h):  {(time.perf_counter() - started) * 1000:8.1f}ms, {len(curves['buckets'])} buckets")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--snapshots", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000, help="snapshots per ingest request")
+    parser.add_argument("--naive", type=int, default=2000, help="snapshots for the per-snapshot baseline")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Time full-text post search on a large seeded posts table against a LIKE scan.
+
+Seeds synthetic posts with a Zipf-distributed vocabulary, builds the index
+from services/search.py, then times ``search_posts`` (ranked, with
+highlights) for common, rare, multi-word and prefix queries next to a
+``content LIKE '%word%'`` scan. The scan is unranked, matches inside words and
+stops at the first ``--limit`` hits of the user's posts, so it is a floor
+rather than an equivalent query.
+
+Usage:
+    python -m backend.benchmarks.post_search --posts 1000000 --users 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="search-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine
+
+from backend.database import Base, SessionLocal, engine
+from backend.services.search import search_posts, search_terms
+
+VOCABULARY = 20000
+WORDS_PER_POST = 30
+
+def vocabulary():
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+def seed(conn: sqlite3.Connection, words: list, users: int, posts: int):
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password, full_name, is_active) VALUES (?, ?, 'x', ?, 1)",
+        ((i, f"user{i}@example.com", f"User {i}") for i in range(1, users + 1))
+    )
+    rng = random.Random(42)
+    # Word frequency falls off as 1/rank, as in natural text
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    platforms = ("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK")
+    for offset in range(0, posts, 50000):
+        batch = min(50000, posts - offset)
+        text = rng.choices(words, weights, k=batch * WORDS_PER_POST)
+        conn.executemany(
+            "INSERT INTO posts (content, platform, status, author_id) VALUES (?, ?, 'DRAFT', ?)",
+            (
+                (" ".join(text[n * WORDS_PER_POST:(n + 1) * WORDS_PER_POST]), platforms[n % 4], rng.randrange(1, users + 1))
+                for n in range(batch)
+            )
+        )
+    conn.commit()
+
+def like_scan(conn: sqlite3.Connection, author_id: int, terms: list, limit: int):
+    where = " AND ".join("content LIKE ?" for _ in terms)
+    return conn.execute(
+        f"SELECT id FROM posts WHERE author_id = ? AND {where} ORDER BY id LIMIT ?",
+        (author_id, *(f"%{term}%" for term in terms), limit)
+    ).fetchall()
+
+async def measure_search(queries: list, limit: int) -> list:
+    timings = []
+    async with SessionLocal() as db:
+        for author_id, terms in queries:
+            started = time.perf_counter()
+            await search_posts(db, author_id, terms, limit=limit)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label:<10} p50={statistics.median(timings) * 1000:8.2f}ms p95={p95 * 1000:8.2f}ms max={timings[-1] * 1000:8.2f}ms")
+
+async def run(args):
+    # create_all also creates the index and its triggers
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{DB_PATH}"))
+    conn = sqlite3.connect(DB_PATH)
+    words = vocabulary()
+
+    # Bulk-load without the per-row trigger, then build the index in one pass
+    conn.execute("DROP TRIGGER posts_fts_insert")
+    started = time.perf_counter()
+    seed(conn, words, args.users, args.posts)
+    print(f"Seeded {args.posts} posts for {args.users} users in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    conn.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    conn.commit()
+    print(f"Built the full-text index in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    kinds = {
+        "common": lambda: [words[rng.randrange(10)]],
+        "rare": lambda: [words[rng.randrange(5000, VOCABULARY)]],
+        "two words": lambda: [words[rng.randrange(100)], words[rng.randrange(100, 2000)]],
+        "prefix": lambda: [words[rng.randrange(100, 2000)][:3] + "*"],
+    }
+    for kind, make in kinds.items():
+        queries = [(rng.randrange(1, args.users + 1), search_terms(" ".join(make()))) for _ in range(args.runs)]
+        print(f"{kind} (e.g. {' '.join(queries[0][1])}):")
+        report("fts", await measure_search(queries, args.limit))
+        timings = []
+        for author_id, terms in queries:
+            started = time.perf_counter()
+            like_scan(conn, author_id, terms, args.limit)
+            timings.append(time.perf_counter() - started)
+        report("like", timings)
+
+    conn.close()
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Check that listing posts runs a fixed number of queries, and time list
+serialization at 1k and 10k posts.
+
+The query check drives ``GET /api/posts/`` at several page sizes and fails
+unless each request runs one posts SELECT plus one SELECT ... IN per eager
+relationship (SQLAlchemy sends at most 500 ids per IN), i.e. no N+1 on the
+nested media or analytics. Serialization compares the ``response_model`` path FastAPI would
+take, ``serialize_posts`` (pydantic-core ``dump_json``), and orjson when it is
+installed.
+
+Usage:
+    python -m backend.benchmarks.post_serialization --sizes 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="serialization-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, insert, select
+
+from backend.database import Base, SessionLocal, engine
+from backend.models import MediaAttachment, PlatformType, Post, PostAnalytics, User
+from backend.routers import posts
+from backend.routers.auth import get_current_user
+from backend.schemas import PostResponse
+
+SELECTIN_CHUNK_SIZE = 500
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+async def seed(total: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    platforms = list(PlatformType)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    async with SessionLocal() as db:
+        await db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x", "full_name": "Bench"}])
+        await db.execute(insert(Post), [
+            {
+                "id": n,
+                "content": f"Post {n} " + "lorem ipsum " * 10,
+                "platform": platforms[n % 4],
+                "scheduled_time": start + timedelta(minutes=n),
+                "author_id": 1,
+            }
+            for n in range(1, total + 1)
+        ])
+        await db.execute(insert(MediaAttachment), [
+            {"post_id": n, "url": f"https://cdn.example.com/{n}/{i}.png", "type": "image"}
+            for n in range(1, total + 1)
+            for i in range(2)
+        ])
+        await db.execute(insert(PostAnalytics), [
+            {"post_id": n, "likes": n, "shares": n // 2, "comments": n // 3, "impressions": 10 * n, "updated_at": start}
+            for n in range(1, total + 1)
+        ])
+        await db.commit()
+
+async def check_query_count(limits: List[int]):
+    async with SessionLocal() as db:
+        user = (await db.execute(select(User).where(User.id == 1))).scalar_one()
+
+    app = FastAPI()
+    app.include_router(posts.router, prefix="/api/posts")
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    counts = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for limit in limits:
+                statements.clear()
+                response = await client.get("/api/posts/", params={"limit": limit})
+                response.raise_for_status()
+                assert len(response.json()) == limit
+                counts[limit] = len(statements)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+    for limit, count in counts.items():
+        # The endpoint fetches limit + 1 rows to detect the next page
+        expected = 1 + len(posts.POST_LOAD_OPTIONS) * math.ceil((limit + 1) / SELECTIN_CHUNK_SIZE)
+        print(f"GET /api/posts/?limit={limit:<5} {count} queries (expected {expected})")
+        assert count == expected, f"unexpected query count for limit={limit}: {counts}"
+
+def timed(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+async def benchmark_serialization(size: int, runs: int):
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(Post).options(*posts.POST_LOAD_OPTIONS).order_by(Post.id).limit(size)
+        )
+        rows = result.scalars().all()
+
+    def response_model_path():
+        # What FastAPI does for response_model=List[PostResponse]
+        validated = [PostResponse.model_validate(post) for post in rows]
+        return json.dumps(jsonable_encoder(validated)).encode()
+
+    candidates = {
+        "response_model + json.dumps": response_model_path,
+        "serialize_posts (dump_json)": lambda: posts.serialize_posts(rows),
+    }
+    if orjson is not None:
+        candidates["orjson(dump_python)"] = lambda: orjson.dumps(
+            posts.post_list_adapter.dump_python(
+                posts.post_list_adapter.validate_python(rows, from_attributes=True), mode="json"
+            )
+        )
+
+    assert json.loads(response_model_path()) == json.loads(posts.serialize_posts(rows))
+    for label, fn in candidates.items():
+        print(f"{size:>6} posts  {label:<28} p50={timed(fn, runs) * 1000:8.1f}ms")
+
+async def run(args):
+    await seed(max(args.sizes))
+    await check_query_count([10, 100, 499, 1000])
+    for size in args.sizes:
+        await benchmark_serialization(size, args.runs)
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
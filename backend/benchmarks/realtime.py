@@ -0,0 +1,188 @@
+"""Hold many idle live-event connections open on one worker and fan an event out to all of them.
+
+Starts the API under uvicorn in a subprocess, opens ``--connections``
+WebSocket or SSE connections spread over ``--users`` accounts, and reports
+the server's memory per idle connection. Then records one outbox event per
+account and measures how long until every connection has received it.
+
+Usage:
+    python -m backend.benchmarks.realtime --connections 10000 --users 500 --transport ws
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORK_DIR = tempfile.mkdtemp(prefix="realtime-bench-")
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import websockets
+from sqlalchemy import create_engine
+
+from backend.database import Base
+from backend.routers.auth import create_access_token
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def seed_users(users: int):
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{DB_PATH}"))
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password, full_name, is_active) VALUES (?, ?, 'x', 'Bench', 1)",
+        ((n, f"bench{n}@example.com") for n in range(1, users + 1))
+    )
+    conn.commit()
+    conn.close()
+
+def record_events(users: int):
+    conn = sqlite3.connect(DB_PATH)
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+    conn.executemany(
+        "INSERT INTO outbox_events (idempotency_key, event_type, author_id, payload, attempts, available_at, created_at)"
+        " VALUES (?, 'post.deleted', ?, '{}', 0, ?, ?)",
+        ((uuid.uuid4().hex, n, now, now) for n in range(1, users + 1))
+    )
+    conn.commit()
+    conn.close()
+
+class WebSocketClient:
+    def __init__(self, port: int, token: str):
+        self.url = f"ws://127.0.0.1:{port}/api/events/ws?token={token}"
+
+    async def open(self):
+        self.socket = await websockets.connect(self.url, open_timeout=60, ping_interval=None)
+        await self.socket.recv()  # ready
+
+    async def receive(self):
+        await self.socket.recv()
+
+    async def close(self):
+        await self.socket.close()
+
+class SSEClient:
+    def __init__(self, port: int, token: str):
+        self.port = port
+        self.token = token
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writer.write(
+            f"GET /api/events/stream?token={self.token} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await self.receive()  # ready
+
+    async def receive(self):
+        while not (await self.reader.readline()).startswith(b"data:"):
+            pass
+
+    async def close(self):
+        self.writer.close()
+
+async def run(args):
+    seed_users(args.users)
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "OPENAI_API_KEY": "x",
+        "SLACK_BOT_TOKEN": "x",
+        "SLACK_CHANNEL_ID": "C1",
+        "SCHEDULER_ENABLED": "false",
+        "OUTBOX_POLL_SECONDS": "0.05",
+        "REALTIME_MAX_CONNECTIONS_PER_USER": str(-(-args.connections // args.users)),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning",
+         "--no-access-log", "--backlog", "4096", "--ws-per-message-deflate", "false"],
+        cwd=WORK_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+        await asyncio.sleep(0.5)
+        baseline = rss_mb(server.pid)
+
+        tokens = [
+            create_access_token({"sub": f"bench{n}@example.com"}, expires_delta=timedelta(hours=1))
+            for n in range(1, args.users + 1)
+        ]
+        client_class = WebSocketClient if args.transport == "ws" else SSEClient
+        clients = [client_class(port, tokens[n % args.users]) for n in range(args.connections)]
+        handshakes = asyncio.Semaphore(args.concurrency)
+
+        async def open_client(client):
+            async with handshakes:
+                await client.open()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(open_client(client) for client in clients))
+        print(f"Opened {args.connections} {args.transport} connections in {time.perf_counter() - started:.1f}s")
+        await asyncio.sleep(args.idle)
+        held = rss_mb(server.pid)
+        print(f"Server RSS: {baseline:.0f}MB idle, {held:.0f}MB with connections "
+              f"({(held - baseline) * 1024 / args.connections:.1f}KB per connection)")
+
+        for _ in range(args.rounds):
+            latencies = []
+
+            async def receive(client):
+                await client.receive()
+                latencies.append(time.perf_counter() - published)
+
+            waiting = [asyncio.create_task(receive(client)) for client in clients]
+            cpu = cpu_seconds(server.pid)
+            published = time.perf_counter()
+            record_events(args.users)
+            await asyncio.gather(*waiting)
+            cpu = cpu_seconds(server.pid) - cpu
+            latencies.sort()
+            # The clients share one process, so latency is an upper bound; server CPU is the cost of the fan-out
+            print(f"Fan-out to {len(latencies)} connections: p50={statistics.median(latencies) * 1000:.0f}ms "
+                  f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f}ms "
+                  f"max={latencies[-1] * 1000:.0f}ms, server CPU {cpu * 1000:.0f}ms")
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--transport", choices=("ws", "sse"), default="ws")
+    parser.add_argument("--concurrency", type=int, default=200, help="Handshakes in flight")
+    parser.add_argument("--idle", type=float, default=3.0, help="Seconds to hold the connections before measuring")
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measure cold start of the API: import, lifespan startup and the first readiness probe.
+
+Each run starts a fresh interpreter against a migrated SQLite database,
+imports ``backend.main``, enters the app's lifespan and sends one
+``/health/ready`` request. Exits non-zero when the median total is over
+``--budget-ms``, so it can gate CI.
+
+Usage:
+    python -m backend.benchmarks.startup --runs 10 --budget-ms 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHILD = """
+import asyncio, json, time
+import httpx  # the probe's client, not part of the app's cold start
+started = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        up = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health/ready")
+        ready = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started,
+        "startup": up - imported,
+        "first_ready": ready - up,
+        "total": ready - started,
+        "ready_status": response.status_code,
+    }))
+
+asyncio.run(main())
+"""
+
+def migrate(database_url: str):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", os.path.join(ROOT, "backend", "alembic.ini"), "upgrade", "head"],
+        cwd=ROOT, env={**os.environ, "DATABASE_URL": database_url}, check=True, capture_output=True
+    )
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="startup-bench-")
+    database_url = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    migrate(database_url)
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": database_url,
+        "OPENAI_API_KEY": "x",
+        "SLACK_BOT_TOKEN": "x",
+        "SLACK_CHANNEL_ID": "C1",
+    }
+
+    runs = []
+    for _ in range(args.runs):
+        # The app writes app.log to its working directory
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=work_dir, env=env, check=True, capture_output=True, text=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    for phase in ("import", "startup", "first_ready", "total"):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<12} p50={statistics.median(values):8.1f}ms max={max(values):8.1f}ms")
+    print(f"readiness status: {sorted({run['ready_status'] for run in runs})}")
+
+    total = statistics.median(run["total"] * 1000 for run in runs)
+    if total > args.budget_ms:
+        print(f"Cold start p50 {total:.0f}ms is over the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Measure webhook delivery throughput against a local HTTP receiver.
+
+Sends events to several subscribed endpoints through WebhookService, once
+with every endpoint healthy and once with some of them failing, and reports
+deliveries per minute, how many TCP connections the receiver saw (keep-alive
+reuse) and how many requests reached the failing endpoints (circuit breakers).
+
+Usage:
+    python -m backend.benchmarks.webhooks --events 5000 --endpoints 10 --latency 0.005
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="webhook-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from aiohttp import web
+from sqlalchemy import insert
+
+from backend.database import Base, SessionLocal, engine
+from backend.models import User, WebhookSubscription
+from backend.services.outbox import POST_CREATED, Event
+from backend.services.webhooks import WebhookService, generate_secret
+
+class Receiver:
+    """Answers after ``latency`` seconds; paths under /down/ always fail with 503."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.failed_requests = 0
+        self.connections = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        await request.read()
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(self.latency)
+        if request.path.startswith("/down/"):
+            self.failed_requests += 1
+            return web.Response(status=503)
+        self.requests += 1
+        return web.Response(text="ok")
+
+async def seed(endpoints: int, failing: int, port: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        user_id = (await db.execute(
+            insert(User).returning(User.id), [{"email": "bench@example.com", "hashed_password": "x", "full_name": "Bench"}]
+        )).scalar_one()
+        await db.execute(insert(WebhookSubscription), [
+            {
+                "user_id": user_id,
+                "url": f"http://127.0.0.1:{port}/{'down' if n < failing else 'up'}/{n}",
+                "secret": generate_secret(),
+                "is_active": True,
+            }
+            for n in range(endpoints)
+        ])
+        await db.commit()
+    return user_id
+
+async def scenario(name: str, args, failing: int, port: int, receiver: Receiver):
+    user_id = await seed(args.endpoints, failing, port)
+    receiver.requests = receiver.failed_requests = 0
+    receiver.connections.clear()
+    service = WebhookService(
+        endpoint_concurrency=args.concurrency,
+        max_connections_per_host=args.endpoints * args.concurrency,
+        max_attempts=3,
+        retry_base=0.2,
+        failure_threshold=5,
+        reset_timeout=60,
+        max_pending=args.events * args.endpoints
+    )
+    service.start()
+    now = datetime.now(timezone.utc)
+    events = [
+        Event(key=f"{n:032x}", type=POST_CREATED, author_id=user_id, post_id=n, payload={"id": n, "content": "x" * 200}, created_at=now)
+        for n in range(args.events)
+    ]
+
+    started = time.perf_counter()
+    for offset in range(0, len(events), 200):
+        await service.handle(events[offset:offset + 200])
+    healthy_total = args.events * (args.endpoints - failing)
+    while service.delivered < healthy_total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    # Failing endpoints stay queued behind open circuits; stop() dead-letters them
+    await service.stop(timeout=0)
+
+    print(f"{name}:")
+    print(f"  delivered {service.delivered} in {elapsed:.2f}s = {service.delivered / elapsed * 60:,.0f}/min")
+    print(f"  receiver saw {len(receiver.connections)} TCP connections for {receiver.requests + receiver.failed_requests} requests")
+    if failing:
+        print(f"  {receiver.failed_requests} requests reached the {failing} failing endpoints "
+              f"({args.events * failing} deliveries queued for them)")
+
+async def run(args):
+    receiver = Receiver(args.latency)
+    app = web.Application()
+    app.router.add_post("/{kind}/{n}", receiver.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    try:
+        await scenario("All endpoints healthy", args, 0, args.port, receiver)
+        await scenario(f"{args.failing} endpoints failing", args, args.failing, args.port, receiver)
+    finally:
+        await runner.cleanup()
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--endpoints", type=int, default=10)
+    parser.add_argument("--failing", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4, help="per endpoint")
+    parser.add_argument("--latency", type=float, default=0.005, help="receiver response time in seconds")
+    parser.add_argument("--port", type=int, default=8766)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
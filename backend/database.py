@@ -1,21 +1,294 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import List, Optional
+import asyncio
+import itertools
+import logging
 import os
 from dotenv import load_dotenv
 
+from .cache import TTLCache
+from .metrics import db_read_sessions, db_replica_lag
+
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Read replicas (comma-separated URLs); read-only handlers are spread over them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_BALANCING = os.getenv("DB_REPLICA_BALANCING", "round_robin")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "2"))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+def get_async_url(url: str) -> str:
+    """Map a plain DATABASE_URL onto the matching async driver."""
+    # Render and Heroku hand out the legacy "postgres://" scheme
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def get_engine_options(url: str) -> dict:
+    """Pool options for ``url``; in-memory SQLite keeps its single static connection."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            return options
+        # aiosqlite defaults to NullPool for files, which would ignore the pool settings
+        options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+ASYNC_DATABASE_URL = get_async_url(DATABASE_URL)
+
+class TrackedSession(Session):
+    """Session that notes in ``info`` whether it committed, so requests that wrote can be told apart."""
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@event.listens_for(TrackedSession, "after_commit")
+def _mark_committed(session):
+    session.info["committed"] = True
+
+def make_sessionmaker(bind) -> async_sessionmaker:
+    # expire_on_commit=False so attributes stay readable after commit without an implicit (sync) refresh
+    return async_sessionmaker(
+        bind=bind, class_=AsyncSession, sync_session_class=TrackedSession, autoflush=False, expire_on_commit=False
+    )
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **get_engine_options(ASYNC_DATABASE_URL))
+SessionLocal = make_sessionmaker(engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+# Seconds a replica is behind the primary, by dialect. A server that is not
+# replaying WAL (e.g. a standalone copy used in tests) reports 0. Dialects
+# without an entry are only checked for reachability.
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        async_url = get_async_url(url)
+        self.name = name
+        self.url = make_url(async_url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(async_url, **get_engine_options(async_url))
+        self.sessionmaker = make_sessionmaker(self.engine)
+        # Unused until the first lag check passes
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.in_use = 0
+        self.sessions = 0
+
+class ReplicaRouter:
+    """Sends read-only sessions to read replicas, falling back to the primary.
+
+    Replicas are picked round-robin or by fewest sessions in use
+    (``least_connections``). Every ``check_interval`` seconds each replica
+    is asked how far behind the primary it is; one that is unreachable or
+    more than ``max_lag`` seconds behind gets no reads until a later check
+    passes, and with none left reads go to the primary. A user who committed
+    a write reads from the primary for the next ``sticky_seconds``, so they
+    see their own change however far the replicas are behind; keep it at
+    least ``max_lag``. Stickiness is kept per process: with several workers
+    a user's next request may land on one that has not seen the write, which
+    then relies on ``max_lag`` alone.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        balancing: str = "round_robin",
+        max_lag: float = 5,
+        check_interval: float = 2,
+        sticky_seconds: float = 5,
+    ):
+        if balancing not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica balancing: {balancing}")
+        self.replicas = [Replica(f"replica{n}", url) for n, url in enumerate(urls)]
+        self.balancing = balancing
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self._sticky = TTLCache(maxsize=100000, ttl=sticky_seconds)
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+        self.primary_sessions = 0
+        self.sticky_sessions = 0
+        self.fallbacks = 0
+
+    async def start(self):
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def _check_replica(self, replica: Replica):
+        query = LAG_QUERIES.get(replica.engine.dialect.name, "SELECT 0")
+        was_healthy = replica.healthy
+        try:
+            async with asyncio.timeout(self.check_interval):
+                async with replica.engine.connect() as conn:
+                    replica.lag = float((await conn.execute(text(query))).scalar() or 0)
+            replica.error = None
+            replica.healthy = replica.lag <= self.max_lag
+            db_replica_lag.set(replica.lag, replica=replica.name)
+        except Exception as e:
+            replica.lag = None
+            replica.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            replica.healthy = False
+        if was_healthy and not replica.healthy:
+            logger.warning(
+                f"Replica {replica.url} taken out of rotation: "
+                + (replica.error or f"{replica.lag:.1f}s behind the primary")
+            )
+        elif replica.healthy and not was_healthy:
+            logger.info(f"Replica {replica.url} serving reads")
+
+    async def check(self):
+        """Refresh every replica's lag and health."""
+        await asyncio.gather(*(self._check_replica(replica) for replica in self.replicas))
+
+    def record_write(self, user: Optional[str]):
+        """Pin ``user``'s reads to the primary for ``sticky_seconds``."""
+        if user is not None and self.replicas:
+            self._sticky.set(user, True)
+
+    def choose(self, user: Optional[str] = None) -> Optional[Replica]:
+        """The replica to read from, or None for the primary."""
+        if not self.replicas:
+            return None
+        if user is not None and user in self._sticky:
+            self.sticky_sessions += 1
+            db_read_sessions.inc(target="primary", reason="read_your_writes")
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.fallbacks += 1
+            db_read_sessions.inc(target="primary", reason="no_healthy_replica")
+            return None
+        if self.balancing == "least_connections":
+            replica = min(healthy, key=lambda replica: replica.in_use)
+        else:
+            replica = healthy[next(self._turn) % len(healthy)]
+        db_read_sessions.inc(target=replica.name, reason=self.balancing)
+        return replica
+
+    @asynccontextmanager
+    async def session(self, user: Optional[str] = None):
+        """A session for reads only; ``info["replica"]`` names the replica serving it, if any."""
+        replica = self.choose(user)
+        if replica is None:
+            self.primary_sessions += 1
+            async with SessionLocal() as db:
+                yield db
+            return
+        replica.in_use += 1
+        replica.sessions += 1
+        try:
+            async with replica.sessionmaker() as db:
+                db.info["replica"] = replica.name
+                yield db
+        finally:
+            replica.in_use -= 1
+
+    def metrics(self) -> dict:
+        return {
+            "balancing": self.balancing,
+            "primary_sessions": self.primary_sessions,
+            "sticky_sessions": self.sticky_sessions,
+            "fallbacks": self.fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "url": replica.url,
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                    "error": replica.error,
+                    "in_use": replica.in_use,
+                    "sessions": replica.sessions,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+replica_router = ReplicaRouter(
+    DATABASE_REPLICA_URLS,
+    balancing=DB_REPLICA_BALANCING,
+    max_lag=DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=DB_REPLICA_CHECK_SECONDS,
+    sticky_seconds=DB_READ_YOUR_WRITES_SECONDS,
+)
+
+def request_user(request: Request) -> Optional[str]:
+    """The subject of the request's bearer token, unverified.
+
+    Only used to keep a user's reads on the primary after their own writes;
+    authentication still happens in the handler's dependencies.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
     try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+async def get_db(request: Request):
+    async with SessionLocal() as db:
+        try:
+            yield db
+        finally:
+            if db.info.get("committed"):
+                replica_router.record_write(request_user(request))
+
+async def get_read_db(request: Request):
+    """Session for handlers that only read; may be served by a replica (see ReplicaRouter)."""
+    async with replica_router.session(request_user(request)) as db:
+        # Lets the response cache bound how long a replica's answer is kept
+        request.state.read_replica = db.info.get("replica")
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
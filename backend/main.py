@@ -1,24 +1,91 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import List
 import os
 from dotenv import load_dotenv
-from .routers import auth, posts, ai
-from .database import engine, Base
+from .routers import auth, posts, ai, reports, analytics, media, webhooks, series, calendar, events
+from .database import engine, replica_router
 from .services.slack_service import slack_service
-from .middleware import error_handling_middleware, APIErrorHandler
+from .services.scheduler import post_scheduler
+from .services.response_cache import response_cache
+from .services.ai_service import ai_service
+from .services.analytics import metrics_ingestor
+from .services.media import media_service
+from .services.outbox import outbox_dispatcher
+from .services.webhooks import webhook_service
+from .services.optimizer import best_time_optimizer
+from .services.realtime import realtime_hub
+from .services.health import readiness_probe
+from .services.archive import post_archiver
+from .middleware import InstrumentationMiddleware, APIErrorHandler, instrument_engine
+from .metrics import registry
 
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Verify environment variables
+    required_vars = [
+        "DATABASE_URL",
+        "OPENAI_API_KEY",
+        "SLACK_BOT_TOKEN",
+        "SLACK_CHANNEL_ID"
+    ]
+    
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    if missing_vars:
+        raise Exception(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    # Startup only starts background workers; none of them waits on the
+    # database, Slack or OpenAI, and the schema comes from migrations
+    # (alembic upgrade head), so workers come up fast and a third-party
+    # outage cannot hold up boot. /health/ready reports when they can serve.
+
+    # Start checking read replicas; reads use the primary until one passes
+    await replica_router.start()
+
+    # Start publishing scheduled posts
+    if os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes"):
+        await post_scheduler.start()
+        
+    # Start moving old published posts to the archive tables
+    if os.getenv("ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes"):
+        post_archiver.start()
+
+    # Start flushing buffered analytics snapshots
+    metrics_ingestor.start()
+        
+    # Start the Slack notification workers
+    slack_service.start()
+    
+    # Start delivering post events recorded in the outbox
+    webhook_service.start()
+    await realtime_hub.start()
+    outbox_dispatcher.start()
+
+    yield
+
+    await post_scheduler.stop()
+    await post_archiver.stop()
+    await metrics_ingestor.stop()
+    await media_service.stop()
+    # Before Slack, so that events it hands over are still sent
+    await outbox_dispatcher.stop()
+    await webhook_service.stop()
+    await realtime_hub.stop()
+    await slack_service.stop()
+    await replica_router.stop()
+    await engine.dispose()
 
 app = FastAPI(
     title="Social Media Content Calendar API",
     description="API for managing social media content with AI generation and Slack integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,10 +95,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Add error handling middleware
-app.middleware("http")(error_handling_middleware)
+# Add metrics, access logging and error handling middleware
+app.add_middleware(InstrumentationMiddleware)
+instrument_engine(engine)
+for replica in replica_router.replicas:
+    instrument_engine(replica.engine)
 
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, APIErrorHandler.validation_exception_handler)
@@ -42,6 +113,17 @@ app.add_exception_handler(Exception, APIErrorHandler.generic_exception_handler)
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
+app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(media.router, prefix="/api/media", tags=["media"])
+app.include_router(webhooks.router, prefix="/api/webhooks", tags=["webhooks"])
+app.include_router(series.router, prefix="/api/series", tags=["series"])
+app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+
+# Webhooks and live connections receive post events through the outbox
+outbox_dispatcher.register(webhook_service)
+outbox_dispatcher.register(realtime_hub)
 
 @app.get("/")
 async def root():
@@ -52,31 +134,38 @@ async def root():
     }
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and serving. Touches no dependencies, so a
+    database outage does not get every instance restarted."""
+    return {"status": "healthy"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: the database answers, its schema is migrated to this
+    build's head, and any Redis in use responds. 503 until all of them pass."""
+    ready, checks = await readiness_probe.check()
+    return JSONResponse(
+        {"status": "ready" if ready else "not_ready", "checks": checks},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/stats")
+async def stats():
     return {
-        "status": "healthy",
-        "database": "connected" if engine else "disconnected"
+        "response_cache": response_cache.stats(),
+        "slack": slack_service.metrics(),
+        "ai": ai_service.metrics(),
+        "metrics_ingest": metrics_ingestor.metrics(),
+        "media": media_service.metrics(),
+        "outbox": outbox_dispatcher.metrics(),
+        "webhooks": webhook_service.metrics(),
+        "optimizer": best_time_optimizer.metrics(),
+        "realtime": realtime_hub.metrics(),
+        "archive": post_archiver.metrics(),
+        "replicas": replica_router.metrics()
     }
 
-@app.on_event("startup")
-async def startup_event():
-    # Verify environment variables
-    required_vars = [
-        "DATABASE_URL",
-        "OPENAI_API_KEY",
-        "SLACK_BOT_TOKEN",
-        "SLACK_CHANNEL_ID"
-    ]
-    
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
-    if missing_vars:
-        raise Exception(f"Missing required environment variables: {', '.join(missing_vars)}")
-        
-    # Test Slack connection
-    try:
-        await slack_service.send_post_notification(
-            {"platform": "test", "status": "test", "content": "API Started"},
-            action="test"
-        )
-    except Exception as e:
-        print(f"Warning: Could not send Slack notification: {str(e)}") 
\ No newline at end of file
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
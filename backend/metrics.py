@@ -0,0 +1,187 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond queries to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """A metric family; each distinct tuple of label values is one series.
+
+    Updates are plain dict and float operations on the event loop thread, so
+    there is no locking. Label values must come from small, fixed sets
+    (route templates, not raw paths) to keep the series count bounded.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per series: non-cumulative bucket counts (+Inf last), sum, count
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time until the response body was sent", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+db_queries = registry.counter(
+    "db_queries_total", "SQL statements executed, by leading keyword", ("operation",)
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",)
+)
+outbound_call_duration = registry.histogram(
+    "outbound_call_duration_seconds", "Calls to external services", ("service", "method", "outcome")
+)
+outbox_events = registry.counter(
+    "outbox_events_total", "Outbox events by type and delivery outcome", ("event_type", "outcome")
+)
+outbox_delivery_lag = registry.histogram(
+    "outbox_delivery_lag_seconds", "Time from commit until every consumer had the event"
+)
+outbox_pending = registry.gauge(
+    "outbox_pending_events", "Outbox events not yet delivered"
+)
+outbox_oldest_pending_age = registry.gauge(
+    "outbox_oldest_pending_seconds", "Age of the oldest undelivered outbox event"
+)
+webhook_deliveries = registry.counter(
+    "webhook_deliveries_total", "Webhook delivery attempts by outcome", ("outcome",)
+)
+webhook_circuits_open = registry.gauge(
+    "webhook_circuits_open", "Webhook endpoints whose circuit breaker is open"
+)
+realtime_connections = registry.gauge(
+    "realtime_connections", "Open WebSocket and SSE connections receiving post events"
+)
+realtime_messages = registry.counter(
+    "realtime_messages_total", "Post events queued for live connections, and backlogs replaced by a resync", ("outcome",)
+)
+posts_archived = registry.counter(
+    "posts_archived_total", "Published posts moved to the archive tables"
+)
+db_read_sessions = registry.counter(
+    "db_read_sessions_total", "Read-only sessions by the database that served them and why", ("target", "reason")
+)
+db_replica_lag = registry.gauge(
+    "db_replica_lag_seconds", "Replication lag at the last check, by replica", ("replica",)
+)
+
+@contextmanager
+def track_call(service: str, method: str):
+    """Time an outbound call; ``outcome`` is ``error`` if the block raises."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        outbound_call_duration.observe(time.perf_counter() - started, service=service, method=method, outcome=outcome)
@@ -1,61 +1,220 @@
 from fastapi import Request, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from typing import Callable
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from sqlalchemy import event
+from .metrics import db_queries, db_query_duration, http_requests, http_request_duration, http_requests_in_flight
+import atexit
+import cProfile
+import io
 import logging
+import os
+import pstats
+import queue
+import random
 import time
 import sys
+import uuid
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('app.log')
-    ]
-)
+try:
+    import pyinstrument
+except ImportError:  # optional dependency
+    pyinstrument = None
+
+# Configure logging: callers only enqueue records; a background thread
+# formats them and does the stdout and file I/O
+log_queue = queue.SimpleQueue()
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler('app.log')]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Not basicConfig: it would give the QueueHandler a formatter, and records
+# would then be formatted twice
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(QueueHandler(log_queue))
 
 logger = logging.getLogger(__name__)
 
-async def error_handling_middleware(request: Request, call_next: Callable):
-    try:
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request started: {request.method} {request.url}")
-        
-        response = await call_next(request)
-        
-        # Log response time
-        process_time = time.time() - start_time
-        logger.info(f"Request completed: {request.method} {request.url} - Took {process_time:.2f}s")
-        
-        return response
-        
-    except HTTPException as exc:
-        logger.error(f"HTTP error occurred: {exc.detail}")
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"detail": exc.detail}
-        )
-    except Exception as exc:
-        logger.error(f"Unexpected error occurred: {str(exc)}", exc_info=True)
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"}
-        )
+class RequestStats:
+    __slots__ = ("db_queries", "db_time")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+
+# Set for the duration of each request; SQLAlchemy's greenlets see the same context
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA"}
+
+def instrument_engine(engine):
+    """Count and time every statement the (async) engine executes."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip()[:8].split(None, 1)[0].upper() if statement.strip() else ""
+        if operation not in SQL_OPERATIONS:
+            operation = "OTHER"
+        db_queries.inc(operation=operation)
+        db_query_duration.observe(elapsed, operation=operation)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+
+class RequestProfiler:
+    """Opt-in per-request profiling for finding hot paths in production.
+
+    Off unless PROFILING_ENABLED is set. A request is profiled when it sends
+    the PROFILING_HEADER (whose value must equal PROFILING_TOKEN, if one is
+    configured) or is picked by PROFILING_SAMPLE_RATE. Reports go to
+    PROFILING_DIR, named by the ``X-Profile-Id`` response header. Uses
+    pyinstrument when installed, which follows awaits; cProfile otherwise,
+    which also records whatever else the event loop runs meanwhile. Only one
+    request is profiled at a time.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.header = os.getenv("PROFILING_HEADER", "X-Profile").lower().encode()
+        self.token = os.getenv("PROFILING_TOKEN")
+        self.sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+        self.directory = os.getenv("PROFILING_DIR", "./profiles")
+        self._active = False
+
+    def wants(self, scope) -> bool:
+        if not self.enabled or self._active:
+            return False
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return self.token is None or value.decode() == self.token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        self._active = True
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def finish(self, profiler, profile_id: str, scope):
+        try:
+            if pyinstrument is not None:
+                profiler.stop()
+                report = profiler.output_text(unicode=True)
+            else:
+                profiler.disable()
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(50)
+                report = out.getvalue()
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{profile_id}.txt")
+            with open(path, "w") as f:
+                f.write(f"{scope['method']} {scope['path']}\n\n{report}")
+            logger.info("Profile for %s %s written to %s", scope["method"], scope["path"], path)
+        finally:
+            self._active = False
+
+request_profiler = RequestProfiler()
+
+class InstrumentationMiddleware:
+    """Per-request metrics, one access log line, optional profiling, and a JSON
+    500 for unhandled errors.
+
+    A plain ASGI middleware: unlike ``@app.middleware("http")`` it adds no
+    extra task or body buffering per request, and streamed responses pass
+    through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = RequestStats()
+        stats_token = request_stats.set(stats)
+        status_code = 500
+        response_started = False
+
+        profiler = profile_id = None
+        if request_profiler.wants(scope):
+            profile_id = uuid.uuid4().hex
+            profiler = request_profiler.start()
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+                if profile_id:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            logger.error(f"Unexpected error occurred: {str(exc)}", exc_info=True)
+            if response_started:
+                raise
+            status_code = 500
+            await JSONResponse(status_code=500, content={"detail": "Internal server error"})(scope, receive, send)
+        finally:
+            if profiler is not None:
+                request_profiler.finish(profiler, profile_id, scope)
+            http_requests_in_flight.dec()
+            request_stats.reset(stats_token)
+
+            duration = time.perf_counter() - started
+            # The route template, not the raw path, keeps label values bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests.inc(method=method, route=route_path, status=str(status_code))
+            http_request_duration.observe(duration, method=method, route=route_path)
+            logger.info(
+                "%s %s %d %.1fms db_queries=%d db_time=%.1fms",
+                method, scope["path"], status_code, duration * 1000, stats.db_queries, stats.db_time * 1000
+            )
 
 class APIErrorHandler:
     """Custom exception handler for API errors"""
     
     @staticmethod
-    async def validation_exception_handler(request: Request, exc: HTTPException):
-        logger.error(f"Validation error: {exc.detail}")
+    async def validation_exception_handler(request: Request, exc: RequestValidationError):
+        # errors() may carry the raised exception in "ctx", which is not JSON-serializable as is
+        errors = jsonable_encoder(exc.errors())
+        logger.error(f"Validation error: {errors}")
         return JSONResponse(
             status_code=422,
             content={
                 "detail": "Validation error",
-                "errors": exc.detail
+                "errors": errors
             }
         )
     
@@ -0,0 +1,83 @@
+"""Initial schema
+
+Databases created by ``Base.metadata.create_all`` before migrations existed
+already match this revision; mark them with ``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+platform_type = sa.Enum("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK", name="platformtype")
+content_status = sa.Enum("DRAFT", "SCHEDULED", "PUBLISHED", "FAILED", name="contentstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("platform", platform_type, nullable=True),
+        sa.Column("status", content_status, nullable=True),
+        sa.Column("scheduled_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("published_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_posts_id", "posts", ["id"])
+
+    op.create_table(
+        "media_attachments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("url", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=True),
+    )
+    op.create_index("ix_media_attachments_id", "media_attachments", ["id"])
+
+    op.create_table(
+        "post_analytics",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("likes", sa.Integer(), nullable=True),
+        sa.Column("shares", sa.Integer(), nullable=True),
+        sa.Column("comments", sa.Integer(), nullable=True),
+        sa.Column("impressions", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=True),
+    )
+    op.create_index("ix_post_analytics_id", "post_analytics", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("post_analytics")
+    op.drop_table("media_attachments")
+    op.drop_table("posts")
+    op.drop_table("users")
+    content_status.drop(op.get_bind(), checkfirst=True)
+    platform_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""Composite indexes for per-author calendar and filter queries, and the scheduler's due-post index
+
+Databases created by ``create_all`` after the scheduler was added may
+already have ``ix_posts_status_scheduled_time``; stamped ones do not.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_posts_status_scheduled_time", "posts", ["status", "scheduled_time"], if_not_exists=True)
+    op.create_index("ix_posts_author_scheduled_time", "posts", ["author_id", "scheduled_time"])
+    op.create_index("ix_posts_author_status_platform", "posts", ["author_id", "status", "platform"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_author_status_platform", table_name="posts")
+    op.drop_index("ix_posts_author_scheduled_time", table_name="posts")
+    op.drop_index("ix_posts_status_scheduled_time", table_name="posts")
@@ -0,0 +1,62 @@
+"""Post count rollups for reports
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PLATFORMS = ("TWITTER", "LINKEDIN", "INSTAGRAM", "FACEBOOK")
+STATUSES = ("DRAFT", "SCHEDULED", "PUBLISHED", "FAILED")
+
+# The enum types already exist from 0001; Postgres must not try to create them again
+platform_type = sa.Enum(*PLATFORMS, name="platformtype").with_variant(
+    postgresql.ENUM(*PLATFORMS, name="platformtype", create_type=False), "postgresql"
+)
+content_status = sa.Enum(*STATUSES, name="contentstatus").with_variant(
+    postgresql.ENUM(*STATUSES, name="contentstatus", create_type=False), "postgresql"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "post_daily_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("platform", platform_type, nullable=False),
+        sa.Column("status", content_status, nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("author_id", "day", "platform", "status", name="uq_post_daily_rollups_key"),
+    )
+
+    # Backfill from existing posts; unscheduled posts go to the 1970-01-01 bucket
+    if op.get_bind().dialect.name == "postgresql":
+        day = "COALESCE(CAST(scheduled_time AT TIME ZONE 'UTC' AS DATE), DATE '1970-01-01')"
+    else:
+        day = "COALESCE(DATE(scheduled_time), '1970-01-01')"
+    op.execute(
+        f"""
+        INSERT INTO post_daily_rollups (author_id, day, platform, status, count)
+        SELECT author_id, {day}, platform, status, COUNT(*)
+        FROM posts
+        WHERE author_id IS NOT NULL AND platform IS NOT NULL AND status IS NOT NULL
+        GROUP BY author_id, {day}, platform, status
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("post_daily_rollups")
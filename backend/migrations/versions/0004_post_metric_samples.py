@@ -0,0 +1,52 @@
+"""Post metric time series and one analytics row per post
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "post_metric_samples",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=False),
+        sa.Column("observed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("shares", sa.Integer(), nullable=False),
+        sa.Column("comments", sa.Integer(), nullable=False),
+        sa.Column("impressions", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_post_metric_samples_post_bucket", "post_metric_samples", ["post_id", "bucket"])
+    op.create_index("ix_post_metric_samples_bucket", "post_metric_samples", ["bucket"])
+
+    # Keep only the newest analytics row per post before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM post_analytics
+        WHERE post_id IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM post_analytics WHERE post_id IS NOT NULL GROUP BY post_id
+        )
+        """
+    )
+    op.create_index("ix_post_analytics_post_id", "post_analytics", ["post_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_post_analytics_post_id", table_name="post_analytics")
+    op.drop_index("ix_post_metric_samples_bucket", table_name="post_metric_samples")
+    op.drop_index("ix_post_metric_samples_post_bucket", table_name="post_metric_samples")
+    op.drop_table("post_metric_samples")
@@ -0,0 +1,36 @@
+"""Content-addressed media uploads
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("media_attachments") as batch_op:
+        batch_op.add_column(sa.Column("content_hash", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("content_type", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("size", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("filename", sa.String(), nullable=True))
+        batch_op.create_index("ix_media_attachments_content_hash", ["content_hash"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("media_attachments") as batch_op:
+        batch_op.drop_index("ix_media_attachments_content_hash")
+        batch_op.drop_column("filename")
+        batch_op.drop_column("size")
+        batch_op.drop_column("content_type")
+        batch_op.drop_column("content_hash")
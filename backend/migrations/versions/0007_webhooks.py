@@ -0,0 +1,55 @@
+"""Webhook subscriptions and dead letters
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_subscriptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("secret", sa.String(length=64), nullable=False),
+        sa.Column("event_types", sa.JSON(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_webhook_subscriptions_id", "webhook_subscriptions", ["id"])
+    op.create_index("ix_webhook_subscriptions_user_id", "webhook_subscriptions", ["user_id"])
+
+    op.create_table(
+        "webhook_dead_letters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("subscription_id", sa.Integer(), sa.ForeignKey("webhook_subscriptions.id"), nullable=False),
+        sa.Column("event_key", sa.String(length=32), nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_status", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_webhook_dead_letters_subscription_id", "webhook_dead_letters", ["subscription_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_dead_letters_subscription_id", table_name="webhook_dead_letters")
+    op.drop_table("webhook_dead_letters")
+    op.drop_index("ix_webhook_subscriptions_user_id", table_name="webhook_subscriptions")
+    op.drop_index("ix_webhook_subscriptions_id", table_name="webhook_subscriptions")
+    op.drop_table("webhook_subscriptions")
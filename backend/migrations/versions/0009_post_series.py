@@ -0,0 +1,72 @@
+"""Recurring post series
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from backend.models import PlatformType
+from backend.services.search import SQLITE_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _restore_search_triggers() -> None:
+    # SQLite batch mode recreates posts, which drops the full-text triggers from 0008
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "post_series",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        # The type exists since 0001; PostgreSQL must not create it again
+        sa.Column("platform", postgresql.ENUM(PlatformType, name="platformtype", create_type=False), nullable=False),
+        sa.Column("rrule", sa.String(length=512), nullable=False),
+        sa.Column("dtstart", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("timezone", sa.String(length=64), nullable=False),
+        sa.Column("ends_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("exdates", sa.JSON(), nullable=True),
+        sa.Column("expand_from", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("materialized_through", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_post_series_author_id", "post_series", ["author_id"])
+    op.create_index("ix_post_series_active_materialized", "post_series", ["is_active", "materialized_through"])
+
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.add_column(sa.Column(
+            "series_id", sa.Integer(), sa.ForeignKey("post_series.id", name="fk_posts_series_id"), nullable=True
+        ))
+        batch_op.add_column(sa.Column("series_occurrence", sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index("ux_posts_series_occurrence", ["series_id", "series_occurrence"], unique=True)
+    _restore_search_triggers()
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_index("ux_posts_series_occurrence")
+        batch_op.drop_column("series_occurrence")
+        batch_op.drop_column("series_id")
+    _restore_search_triggers()
+
+    op.drop_index("ix_post_series_active_materialized", table_name="post_series")
+    op.drop_index("ix_post_series_author_id", table_name="post_series")
+    op.drop_table("post_series")
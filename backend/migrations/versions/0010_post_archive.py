@@ -0,0 +1,103 @@
+"""Archive tables for published posts
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from backend.models import ContentStatus, PlatformType
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The archiver moves attachments by post_id; until now every lookup by it scanned the table
+    op.create_index("ix_media_attachments_post_id", "media_attachments", ["post_id"])
+
+    # Partitioned by month on PostgreSQL; services/archive.py creates the
+    # partitions as it moves posts into them
+    op.create_table(
+        "posts_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("scheduled_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        # The types exist since 0001; PostgreSQL must not create them again
+        sa.Column("platform", postgresql.ENUM(PlatformType, name="platformtype", create_type=False), nullable=True),
+        sa.Column("status", postgresql.ENUM(ContentStatus, name="contentstatus", create_type=False), nullable=True),
+        sa.Column("published_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("series_id", sa.Integer(), nullable=True),
+        sa.Column("series_occurrence", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", "scheduled_time"),
+        postgresql_partition_by="RANGE (scheduled_time)",
+    )
+    op.create_index("ix_posts_archive_author_scheduled_time", "posts_archive", ["author_id", "scheduled_time"])
+
+    op.create_table(
+        "media_attachments_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, primary_key=True),
+        sa.Column("url", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=True),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_media_attachments_archive_post_id", "media_attachments_archive", ["post_id"])
+
+    op.create_table(
+        "post_analytics_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, primary_key=True),
+        sa.Column("likes", sa.Integer(), nullable=True),
+        sa.Column("shares", sa.Integer(), nullable=True),
+        sa.Column("comments", sa.Integer(), nullable=True),
+        sa.Column("impressions", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_post_analytics_archive_post_id", "post_analytics_archive", ["post_id"], unique=True)
+
+    op.create_table(
+        "post_metric_samples_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, primary_key=True),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("observed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("shares", sa.Integer(), nullable=False),
+        sa.Column("comments", sa.Integer(), nullable=False),
+        sa.Column("impressions", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_post_metric_samples_archive_post_bucket", "post_metric_samples_archive", ["post_id", "bucket"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_post_metric_samples_archive_post_bucket", table_name="post_metric_samples_archive")
+    op.drop_table("post_metric_samples_archive")
+    op.drop_index("ix_post_analytics_archive_post_id", table_name="post_analytics_archive")
+    op.drop_table("post_analytics_archive")
+    op.drop_index("ix_media_attachments_archive_post_id", table_name="media_attachments_archive")
+    op.drop_table("media_attachments_archive")
+    # Drops the monthly partitions with it
+    op.drop_index("ix_posts_archive_author_scheduled_time", table_name="posts_archive")
+    op.drop_table("posts_archive")
+
+    op.drop_index("ix_media_attachments_post_id", table_name="media_attachments")
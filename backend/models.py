@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Date, ForeignKey, Enum, Text, Boolean, Index, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from datetime import datetime, timezone
 from .database import Base
 
 class PlatformType(enum.Enum):
@@ -42,9 +43,24 @@ class Post(Base):
     
     author_id = Column(Integer, ForeignKey("users.id"))
     author = relationship("User", back_populates="posts")
+
+    # Set on posts materialized from a recurring series; series_occurrence is the
+    # occurrence's original time, which stays put if the post is rescheduled
+    series_id = Column(Integer, ForeignKey("post_series.id"), nullable=True)
+    series_occurrence = Column(DateTime(timezone=True), nullable=True)
     
     media_attachments = relationship("MediaAttachment", back_populates="post")
-    analytics = relationship("PostAnalytics", back_populates="post")
+    analytics = relationship("PostAnalytics", back_populates="post", uselist=False)
+
+    __table_args__ = (
+        # Range scans for the scheduler: upcoming SCHEDULED posts by due time
+        Index("ix_posts_status_scheduled_time", "status", "scheduled_time"),
+        # Per-author calendar windows and platform/status filters
+        Index("ix_posts_author_scheduled_time", "author_id", "scheduled_time"),
+        Index("ix_posts_author_status_platform", "author_id", "status", "platform"),
+        # Each occurrence of a series is materialized at most once
+        Index("ux_posts_series_occurrence", "series_id", "series_occurrence", unique=True),
+    )
 
 class MediaAttachment(Base):
     __tablename__ = "media_attachments"
@@ -54,7 +70,14 @@ class MediaAttachment(Base):
     type = Column(String)  # image, video, etc.
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    post_id = Column(Integer, ForeignKey("posts.id"))
+    # Set for uploaded files: the SHA-256 is the key in the media store
+    content_hash = Column(String(64), index=True)
+    content_type = Column(String)
+    size = Column(BigInteger)
+    filename = Column(String)
+    
+    # Indexed for loading a page's attachments and for moving them to the archive
+    post_id = Column(Integer, ForeignKey("posts.id"), index=True)
     post = relationship("Post", back_populates="media_attachments")
 
 class PostAnalytics(Base):
@@ -67,5 +90,217 @@ class PostAnalytics(Base):
     impressions = Column(Integer, default=0)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    post_id = Column(Integer, ForeignKey("posts.id"))
-    post = relationship("Post", back_populates="analytics") 
\ No newline at end of file
+    # One latest-value row per post; the ingestion worker upserts on it
+    post_id = Column(Integer, ForeignKey("posts.id"), unique=True, index=True)
+    post = relationship("Post", back_populates="analytics") 
+
+class PostMetricSample(Base):
+    """Append-only engagement snapshots; the values are cumulative at ``observed_at``."""
+    __tablename__ = "post_metric_samples"
+
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+    # observed_at truncated to the ingestion bucket size, for range scans
+    bucket = Column(DateTime(timezone=True), nullable=False)
+    likes = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    impressions = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_post_metric_samples_post_bucket", "post_id", "bucket"),
+        Index("ix_post_metric_samples_bucket", "bucket"),
+    )
+
+class PostDailyRollup(Base):
+    """Post counts per author, day, platform and status, kept current by the post write paths."""
+    __tablename__ = "post_daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # UTC date of scheduled_time; unscheduled posts use UNSCHEDULED_DAY
+    day = Column(Date, nullable=False)
+    platform = Column(Enum(PlatformType), nullable=False)
+    status = Column(Enum(ContentStatus), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("author_id", "day", "platform", "status", name="uq_post_daily_rollups_key"),
+    )
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class OutboxEvent(Base):
+    """Post lifecycle events, written in the same transaction as the change.
+
+    The outbox dispatcher delivers pending rows to its consumers and sets
+    ``processed_at``; until then a row is redelivered after a crash.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    # Stable across redeliveries, so consumers can drop duplicates
+    idempotency_key = Column(String(32), nullable=False, unique=True)
+    event_type = Column(String(64), nullable=False)
+    author_id = Column(Integer, nullable=False)
+    post_id = Column(Integer)
+    payload = Column(JSON, nullable=False)
+    # Set in Python rather than by the server, for sub-second lag figures
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    available_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    processed_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0)
+    # Consumers still owed this event after a partial failure; NULL means all
+    pending_consumers = Column(JSON)
+    last_error = Column(Text)
+
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "processed_at", "available_at"),
+    )
+
+class WebhookSubscription(Base):
+    __tablename__ = "webhook_subscriptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    # Key for the HMAC-SHA256 signature on every delivery
+    secret = Column(String(64), nullable=False)
+    # Outbox event types to send; NULL means all of them
+    event_types = Column(JSON)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WebhookDeadLetter(Base):
+    """A delivery that ran out of attempts (or was cut off by shutdown), kept for redelivery."""
+    __tablename__ = "webhook_dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    subscription_id = Column(Integer, ForeignKey("webhook_subscriptions.id"), nullable=False, index=True)
+    event_key = Column(String(32), nullable=False)
+    event_type = Column(String(64), nullable=False)
+    body = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_status = Column(Integer)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+class PostSeries(Base):
+    """A post repeated on an RFC 5545 recurrence rule.
+
+    Occurrences are expanded on demand from ``rrule``; the scheduler only
+    creates ``Post`` rows for them shortly before they are due. Every
+    occurrence up to ``materialized_through`` already has its row (or was
+    skipped), so the rule is only expanded after it.
+    """
+    __tablename__ = "post_series"
+
+    id = Column(Integer, primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    content = Column(Text, nullable=False)
+    platform = Column(Enum(PlatformType), nullable=False)
+    # RRULE properties without the "RRULE:" prefix, e.g. "FREQ=WEEKLY;BYDAY=MO,TH"
+    rrule = Column(String(512), nullable=False)
+    # First occurrence; the rule repeats its wall-clock time in ``timezone``
+    dtstart = Column(DateTime(timezone=True), nullable=False)
+    timezone = Column(String(64), nullable=False, default="UTC")
+    # Last occurrence for rules with COUNT or UNTIL, NULL for endless ones
+    ends_at = Column(DateTime(timezone=True), nullable=True)
+    # ISO timestamps of skipped occurrences
+    exdates = Column(JSON, nullable=True)
+    # A recent occurrence that expansion restarts from instead of dtstart, so
+    # its cost does not grow with the age of the series; NULL means dtstart
+    expand_from = Column(DateTime(timezone=True), nullable=True)
+    materialized_through = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # The scheduler's scan for series that need their next occurrences
+        Index("ix_post_series_active_materialized", "is_active", "materialized_through"),
+    )
+
+class PostArchive(Base):
+    """Published posts moved out of ``posts`` by the archiver (services/archive.py).
+
+    Read-only copies with the columns of ``posts``; their attachments,
+    analytics and metric samples move to the matching ``*_archive`` tables.
+    On PostgreSQL the table is partitioned by month of ``scheduled_time``,
+    which is why that column is part of the key.
+    """
+    __tablename__ = "posts_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    scheduled_time = Column(DateTime(timezone=True), primary_key=True)
+    content = Column(Text)
+    platform = Column(Enum(PlatformType))
+    status = Column(Enum(ContentStatus))
+    published_time = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    author_id = Column(Integer, ForeignKey("users.id"))
+    series_id = Column(Integer, nullable=True)
+    series_occurrence = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+    # Joined without foreign keys: PostgreSQL only allows those onto a
+    # partitioned table's whole key
+    media_attachments = relationship(
+        "MediaAttachmentArchive",
+        primaryjoin="PostArchive.id == foreign(MediaAttachmentArchive.post_id)",
+        viewonly=True
+    )
+    analytics = relationship(
+        "PostAnalyticsArchive",
+        primaryjoin="PostArchive.id == foreign(PostAnalyticsArchive.post_id)",
+        uselist=False,
+        viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_posts_archive_author_scheduled_time", "author_id", "scheduled_time"),
+        {"postgresql_partition_by": "RANGE (scheduled_time)"},
+    )
+
+class MediaAttachmentArchive(Base):
+    __tablename__ = "media_attachments_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    url = Column(String)
+    type = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    content_hash = Column(String(64))
+    content_type = Column(String)
+    size = Column(BigInteger)
+    filename = Column(String)
+    post_id = Column(Integer, nullable=False, index=True)
+
+class PostAnalyticsArchive(Base):
+    __tablename__ = "post_analytics_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    likes = Column(Integer, default=0)
+    shares = Column(Integer, default=0)
+    comments = Column(Integer, default=0)
+    impressions = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True))
+    post_id = Column(Integer, nullable=False, unique=True, index=True)
+
+class PostMetricSampleArchive(Base):
+    __tablename__ = "post_metric_samples_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    post_id = Column(Integer, nullable=False)
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+    bucket = Column(DateTime(timezone=True), nullable=False)
+    likes = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    impressions = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_post_metric_samples_archive_post_bucket", "post_id", "bucket"),
+    )
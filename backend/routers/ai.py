@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from ..schemas import AIContentRequest, AIContentResponse
+from fastapi.responses import StreamingResponse
+from ..schemas import AIContentRequest, AIContentResponse, AIBatchRequest, AIBatchResult
 from ..services.ai_service import ai_service
 from .auth import get_current_user
 from typing import List
+import asyncio
+import json
 
 router = APIRouter()
 
@@ -21,4 +24,74 @@ async def generate_content(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate content: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+def sse_event(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/generate/stream")
+async def generate_content_stream(
+    request: AIContentRequest,
+    current_user = Depends(get_current_user)
+):
+    """Server-sent events: ``data`` chunks as text arrives, then a ``done`` event
+    carrying the parsed content and suggestions (or an ``error`` event)."""
+    _, max_length = ai_service.build_messages(request)
+
+    async def events():
+        chunks = []
+        try:
+            async for delta in ai_service.stream_content(request):
+                chunks.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            yield sse_event({"detail": f"Failed to generate content: {str(e)}"}, event="error")
+            return
+        content, suggestions = ai_service.parse_response("".join(chunks), max_length)
+        yield sse_event(AIContentResponse(content=content, suggestions=suggestions).model_dump(), event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate/batch")
+async def generate_content_batch(
+    request: AIBatchRequest,
+    current_user = Depends(get_current_user)
+):
+    """Generate every topic x platform pair concurrently, at most ``max_parallel``
+    at a time, streaming one NDJSON ``AIBatchResult`` line as each finishes."""
+    semaphore = asyncio.Semaphore(request.max_parallel)
+
+    async def generate(topic: str, platform) -> AIBatchResult:
+        async with semaphore:
+            try:
+                content, suggestions = await ai_service.generate_content(AIContentRequest(
+                    platform=platform,
+                    topic=topic,
+                    tone=request.tone,
+                    length=request.length
+                ))
+                return AIBatchResult(topic=topic, platform=platform, content=content, suggestions=suggestions)
+            except Exception as e:
+                return AIBatchResult(topic=topic, platform=platform, error=str(e))
+
+    async def results():
+        tasks = [
+            asyncio.create_task(generate(topic, platform))
+            for topic in request.topics
+            for platform in request.platforms
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                yield result.model_dump_json() + "\n"
+        finally:
+            # Client went away: stop the generations that have not finished
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
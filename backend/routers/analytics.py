@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from ..database import get_db, get_read_db
+from ..models import Post, User
+from ..schemas import MetricIngestRequest, MetricIngestResponse, PostCurveResponse, PlatformCurveResponse
+from ..services.analytics import metrics_ingestor, post_curve, platform_curves, as_utc
+from ..services.optimizer import best_time_optimizer
+from .auth import get_current_user
+
+router = APIRouter()
+
+# Keeps a platform curve to at most a few thousand buckets per platform
+MAX_CURVE_BUCKETS = 5000
+
+@router.post("/ingest", response_model=MetricIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_metrics(
+    request: MetricIngestRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue engagement snapshots for the current user's posts.
+
+    Snapshots are buffered and written in bulk shortly after; those for
+    unknown or foreign posts are counted as rejected.
+    """
+    post_ids = {snapshot.post_id for snapshot in request.snapshots}
+    result = await db.execute(
+        select(Post.id).where(Post.id.in_(post_ids), Post.author_id == current_user.id)
+    )
+    owned = set(result.scalars().all())
+
+    snapshots = [
+        {**snapshot.model_dump(), "observed_at": as_utc(snapshot.observed_at)}
+        for snapshot in request.snapshots
+        if snapshot.post_id in owned
+    ]
+    accepted = metrics_ingestor.submit(snapshots) if snapshots else 0
+    if snapshots and not accepted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Metrics buffer is full",
+            headers={"Retry-After": "1"}
+        )
+    # Keeps a cached best-time model current without rebuilding it
+    best_time_optimizer.observe(current_user.id, snapshots[:accepted])
+    return MetricIngestResponse(accepted=accepted, rejected=len(request.snapshots) - accepted)
+
+@router.get("/posts/{post_id}/curve", response_model=PostCurveResponse)
+async def get_post_curve(
+    post_id: int,
+    resolution: int = Query(3600, ge=60, le=7 * 86400),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cumulative metrics of one post, downsampled to ``resolution`` seconds."""
+    result = await db.execute(
+        select(Post.id).where(Post.id == post_id, Post.author_id == current_user.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return await post_curve(db, post_id, resolution)
+
+@router.get("/platforms/curve", response_model=PlatformCurveResponse)
+async def get_platform_curves(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: int = Query(3600, ge=60, le=7 * 86400),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Engagement gained per platform in each ``resolution``-second bucket of [start, end).
+
+    Defaults to the last 7 days.
+    """
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = as_utc(start) if start else end - timedelta(days=7)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if (end - start).total_seconds() / resolution > MAX_CURVE_BUCKETS:
+        raise HTTPException(status_code=400, detail="Range too large for this resolution")
+    return await platform_curves(db, current_user.id, start, end, resolution)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from ..database import get_db, get_read_db
+from ..models import ContentStatus, Post, User
+from ..schemas import EngagementAnalysis, OptimizeRequest, OptimizeResponse
+from ..services.optimizer import best_time_optimizer
+from .auth import get_current_user
+
+router = APIRouter()
+
+MAX_DRAFTS = 500
+
+@router.get("/analyze", response_model=EngagementAnalysis)
+async def analyze(
+    tz: str = "UTC",
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Expected engagement by platform, weekday and hour, from the user's published posts.
+
+    Hours follow the current UTC offset of ``tz``.
+    """
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+    offset = round(datetime.now(zone).utcoffset().total_seconds() / 3600)
+    return {"timezone": tz, **await best_time_optimizer.heatmap(db, current_user.id, offset)}
+
+@router.post("/optimize", response_model=OptimizeResponse)
+async def optimize(
+    request: OptimizeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Propose a posting time for unscheduled drafts.
+
+    Each draft gets the free hour in the window with the highest expected
+    engagement on its platform, at least ``min_gap_minutes`` from scheduled
+    posts and from the other proposals. Nothing is saved; schedule a draft
+    by updating it with the proposed time.
+    """
+    query = select(Post.id, Post.platform).where(
+        Post.author_id == current_user.id,
+        Post.status == ContentStatus.DRAFT,
+        Post.scheduled_time.is_(None)
+    )
+    if request.post_ids is not None:
+        query = query.where(Post.id.in_(request.post_ids))
+    result = await db.execute(query.order_by(Post.id).limit(MAX_DRAFTS))
+    drafts = result.all()
+
+    return await best_time_optimizer.recommend(
+        db,
+        current_user.id,
+        drafts,
+        request.start or datetime.now(timezone.utc),
+        request.days,
+        timedelta(minutes=request.min_gap_minutes)
+    )
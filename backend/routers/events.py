@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from starlette.background import BackgroundTask
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from jose import jwt
+
+from ..database import SessionLocal
+from ..models import User
+from ..services.realtime import Subscription, TooManyConnections, realtime_hub
+from .auth import authenticate
+
+router = APIRouter()
+
+# Browsers cannot set headers on EventSource or WebSocket requests, so the
+# token may also come as ?token=; the access log records paths only
+optional_bearer = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# Sent first: events from here on will arrive, so refetch now to catch up
+READY = json.dumps({"type": "ready"}, separators=(",", ":"))
+# Sent before closing when the token expires; reconnect with a fresh one
+EXPIRED = json.dumps({"type": "expired"}, separators=(",", ":"))
+
+async def _authenticate(token: Optional[str]) -> Tuple[User, float]:
+    """The token's user and expiry; the session is closed again before streaming starts."""
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    async with SessionLocal() as db:
+        user = await authenticate(token, db)
+    return user, jwt.get_unverified_claims(token)["exp"]
+
+def _subscribe(user: User) -> Subscription:
+    try:
+        return realtime_hub.subscribe(user.id)
+    except TooManyConnections as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@router.get("/stream")
+async def stream_events(
+    token: Optional[str] = Query(None),
+    bearer: Optional[str] = Depends(optional_bearer)
+):
+    """Server-sent events for the current user's posts.
+
+    Each ``data:`` line is the same JSON as a WebSocket message. Comment
+    lines are sent while idle so proxies keep the connection open.
+    """
+    user, expires_at = await _authenticate(token or bearer)
+    subscription = _subscribe(user)
+
+    async def stream():
+        yield f"retry: 3000\n\ndata: {READY}\n\n"
+        while not subscription.closed:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                yield f"data: {EXPIRED}\n\n"
+                break
+            messages = await subscription.next(min(realtime_hub.heartbeat, remaining))
+            if messages:
+                yield "".join(f"data: {message}\n\n" for message in messages)
+            elif not subscription.closed and remaining > realtime_hub.heartbeat:
+                yield ": keepalive\n\n"
+
+    async def unsubscribe():
+        realtime_hub.unsubscribe(subscription)
+
+    # The background task runs however the response ends, including a
+    # disconnect before the stream was first read
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(unsubscribe)
+    )
+
+async def _watch_disconnect(websocket: WebSocket, subscription: Subscription):
+    # Client messages are ignored; reading them is how a close is noticed
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except (OSError, RuntimeError):
+        pass
+    finally:
+        subscription.close()
+
+@router.websocket("/ws")
+async def event_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """The current user's post events, one JSON text message each.
+
+    Authentication and connection-limit failures close the socket with
+    code 1008 or 1013 right after the handshake. A client that stops
+    reading for longer than the send timeout is disconnected.
+    """
+    await websocket.accept()
+    try:
+        user, expires_at = await _authenticate(token)
+        subscription = _subscribe(user)
+    except HTTPException as e:
+        code = status.WS_1013_TRY_AGAIN_LATER if e.status_code == 429 else status.WS_1008_POLICY_VIOLATION
+        await websocket.close(code=code, reason=str(e.detail))
+        return
+
+    watcher = asyncio.create_task(_watch_disconnect(websocket, subscription))
+    try:
+        await websocket.send_text(READY)
+        while not subscription.closed:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                await websocket.send_text(EXPIRED)
+                break
+            messages = await subscription.next(remaining)
+            async with asyncio.timeout(realtime_hub.send_timeout):
+                for message in messages:
+                    await websocket.send_text(message)
+    except (WebSocketDisconnect, OSError, RuntimeError, TimeoutError):
+        pass
+    finally:
+        watcher.cancel()
+        realtime_hub.unsubscribe(subscription)
+    try:
+        await websocket.close()
+    except (OSError, RuntimeError):
+        # The client went first
+        pass
@@ -0,0 +1,187 @@
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
+from ..database import get_db, get_read_db
+from ..models import MediaAttachment, MediaAttachmentArchive, Post, PostArchive, User
+from ..schemas import MediaAttachmentResponse, MediaUploadResponse
+from ..services.media import CHUNK_SIZE, UploadTooLarge, media_service, parse_range
+from ..services.response_cache import response_cache
+from .auth import get_current_user
+
+router = APIRouter()
+
+async def _owned_post(db: AsyncSession, post_id: int, user: User) -> Post:
+    result = await db.execute(select(Post).where(Post.id == post_id, Post.author_id == user.id))
+    post = result.scalars().first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
+async def _store_upload(
+    db: AsyncSession,
+    user: User,
+    post_id: int,
+    chunks: AsyncIterator[bytes],
+    filename: Optional[str],
+    content_type: Optional[str],
+) -> MediaUploadResponse:
+    # Check ownership before reading the body
+    await _owned_post(db, post_id, user)
+    # Ending the transaction returns the connection to the pool; a slow
+    # upload must not hold one while the body streams in
+    await db.commit()
+    try:
+        blob = await media_service.save(chunks)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    # The post may have been deleted meanwhile; the blob stays for deduplication
+    await _owned_post(db, post_id, user)
+
+    content_type = content_type or "application/octet-stream"
+    attachment = MediaAttachment(
+        post_id=post_id,
+        type=content_type.split("/")[0],
+        content_hash=blob.sha256,
+        content_type=content_type,
+        size=blob.size,
+        filename=filename
+    )
+    db.add(attachment)
+    await db.flush()
+    attachment.url = f"/api/media/{attachment.id}"
+    await db.commit()
+    await db.refresh(attachment)
+
+    await response_cache.invalidate_user(user.id)
+    # Also for duplicates: renders only sizes that are missing, e.g. after a failure
+    media_service.schedule_thumbnails(blob.sha256, content_type)
+    return MediaUploadResponse(
+        **MediaAttachmentResponse.model_validate(attachment).model_dump(),
+        duplicate=blob.duplicate
+    )
+
+@router.post("/upload", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    post_id: int,
+    filename: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Attach the raw request body to a post, streamed to storage as it arrives.
+
+    Send the file as the body (chunked transfer encoding works) with its
+    ``Content-Type``. Prefer this over ``/upload/form`` for large files: the
+    multipart parser spools the whole file to disk before the handler runs.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > media_service.max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds {media_service.max_bytes} bytes"
+        )
+    return await _store_upload(
+        db, current_user, post_id, request.stream(), filename, request.headers.get("content-type")
+    )
+
+@router.post("/upload/form", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media_form(
+    post_id: int = Form(...),
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Attach a multipart form upload to a post."""
+    async def chunks():
+        while chunk := await file.read(CHUNK_SIZE):
+            yield chunk
+
+    return await _store_upload(db, current_user, post_id, chunks(), file.filename, file.content_type)
+
+async def _owned_attachment(db: AsyncSession, attachment_id: int, user: User) -> MediaAttachment:
+    # Falls back to the archive: links to published media must keep working
+    for attachment_model, post_model in ((MediaAttachment, Post), (MediaAttachmentArchive, PostArchive)):
+        result = await db.execute(
+            select(attachment_model).join(post_model, post_model.id == attachment_model.post_id).where(
+                attachment_model.id == attachment_id,
+                post_model.author_id == user.id
+            )
+        )
+        attachment = result.scalars().first()
+        if attachment:
+            break
+    if not attachment or not attachment.content_hash:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return attachment
+
+async def _serve(request: Request, key: str, etag: str, content_type: str) -> Response:
+    """The blob at ``key``, honouring ``If-None-Match`` and single ``Range`` requests."""
+    url = media_service.store.url(key)
+    if url:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Content-addressed, so a given URL's bytes never change
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = await media_service.store.size(key)
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        media_service.store.read_range(key, start, end),
+        status_code=status_code,
+        media_type=content_type,
+        headers=headers
+    )
+
+@router.get("/{attachment_id}")
+async def download_media(
+    request: Request,
+    attachment_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    attachment = await _owned_attachment(db, attachment_id, current_user)
+    return await _serve(
+        request,
+        media_service.blob_key(attachment.content_hash),
+        f'"{attachment.content_hash}"',
+        attachment.content_type or "application/octet-stream"
+    )
+
+@router.get("/{attachment_id}/thumbnail")
+async def download_thumbnail(
+    request: Request,
+    attachment_id: int,
+    size: Optional[int] = Query(None, description="One of MEDIA_THUMBNAIL_SIZES; defaults to the smallest"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """JPEG thumbnail of an image upload; 404 until the background render has finished."""
+    size = size or min(media_service.thumbnail_sizes)
+    if size not in media_service.thumbnail_sizes:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(media_service.thumbnail_sizes)}")
+    attachment = await _owned_attachment(db, attachment_id, current_user)
+    key = media_service.thumbnail_key(attachment.content_hash, size)
+    if not await media_service.store.exists(key):
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+    return await _serve(request, key, f'"{attachment.content_hash}-{size}"', "image/jpeg")
@@ -1,120 +1,628 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from ..database import get_db
-from ..models import Post, User, PlatformType, ContentStatus, MediaAttachment
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import base64
+import csv
+import io
+import json
+from ..database import get_db, get_read_db, replica_router
+from ..models import (
+    Post, PostArchive, User, PlatformType, ContentStatus, MediaAttachment, PostAnalytics, PostMetricSample
+)
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from ..schemas import PostCreate, PostUpdate, PostResponse, SeriesOccurrence
 from .auth import oauth2_scheme, get_current_user
+from ..services.scheduler import post_scheduler
+from ..services.response_cache import response_cache
+from ..services.reports import apply_rollup_deltas, rollup_deltas, rollup_key
+from ..services.recurrence import author_occurrences
+from ..services.search import search_posts, search_terms
+from ..services.outbox import (
+    POST_CREATED, POST_DELETED, POST_SCHEDULED, POST_UPDATED, POSTS_BULK_CREATED, POSTS_BULK_DELETED,
+    POSTS_BULK_STATUS_CHANGED, outbox_dispatcher, post_payload, record_event
+)
 
 router = APIRouter()
 
-class PostBase(BaseModel):
-    content: str
-    platform: PlatformType
-    scheduled_time: Optional[datetime] = None
+# Every query whose posts are serialized as PostResponse loads the nested
+# relationships up front: one extra SELECT ... IN per relationship, however
+# many posts the page holds
+POST_LOAD_OPTIONS = (selectinload(Post.media_attachments), selectinload(Post.analytics))
+ARCHIVE_LOAD_OPTIONS = (selectinload(PostArchive.media_attachments), selectinload(PostArchive.analytics))
 
-class PostCreate(PostBase):
-    pass
+# Requests only read posts_archive when they pass include_archived=true, so
+# the hot path never touches it
+INCLUDE_ARCHIVED = Query(False, description="Also return published posts moved to the archive")
 
-class PostUpdate(PostBase):
-    status: Optional[ContentStatus] = None
+BULK_MAX_ITEMS = 10000
 
-class PostResponse(PostBase):
-    id: int
+class BulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., max_length=BULK_MAX_ITEMS)
     status: ContentStatus
-    created_at: datetime
-    updated_at: Optional[datetime]
-    author_id: int
 
-    class Config:
-        from_attributes = True
+class BulkDelete(BaseModel):
+    ids: List[int] = Field(..., max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+post_list_adapter = TypeAdapter(List[PostResponse])
+
+def serialize_posts(posts) -> bytes:
+    """JSON for a list of posts, encoded by pydantic-core in one pass.
+
+    Skips the response_model route (validate, ``jsonable_encoder`` to dicts,
+    then ``json.dumps``), which dominates the time of large pages.
+    """
+    return post_list_adapter.dump_json(post_list_adapter.validate_python(posts, from_attributes=True))
+
+async def load_post(db: AsyncSession, post_id: int) -> Post:
+    result = await db.execute(select(Post).options(*POST_LOAD_OPTIONS).where(Post.id == post_id))
+    return result.scalars().one()
+
+class CalendarDay(BaseModel):
+    date: date
+    posts: List[PostResponse]
+    # Recurring series occurrences that are not posts yet
+    occurrences: List[SeriesOccurrence] = []
+
+class CalendarResponse(BaseModel):
+    timezone: str
+    start: date
+    end: date
+    days: List[CalendarDay]
+
+class PostSearchHit(BaseModel):
+    post: PostResponse
+    score: float
+    highlight: str
+
+class PostSearchResponse(BaseModel):
+    query: str
+    results: List[PostSearchHit]
 
 @router.post("/", response_model=PostResponse)
 async def create_post(
     post: PostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     db_post = Post(
-        **post.dict(),
+        **post.dict(exclude={"media_attachments"}),
         author_id=current_user.id,
-        status=ContentStatus.DRAFT
+        status=ContentStatus.DRAFT,
+        media_attachments=[MediaAttachment(**media.dict()) for media in post.media_attachments or []]
     )
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.flush()
+    await apply_rollup_deltas(db, rollup_deltas(added=[db_post]))
+    record_event(db, POST_CREATED, current_user.id, db_post.id, post_payload(db_post))
+    await db.commit()
+    outbox_dispatcher.notify()
+    db_post = await load_post(db, db_post.id)
+    post_scheduler.track(db_post)
+    await response_cache.invalidate_user(current_user.id)
     return db_post
 
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    failed = sum(1 for item in results if item.error)
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+def _missing_results(ids: List[int], found: set, errors: Optional[Dict[int, str]] = None) -> List[BulkItemResult]:
+    errors = errors or {}
+    return [
+        BulkItemResult(
+            index=index, id=post_id, error=None if post_id in found else errors.get(post_id, "Post not found")
+        )
+        for index, post_id in enumerate(ids)
+    ]
+
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_posts(
+    items: List[Dict[str, Any]],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many posts in one transaction; invalid items are reported, not fatal."""
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} posts per request")
+
+    results = [BulkItemResult(index=index) for index in range(len(items))]
+    rows, row_indexes, media = [], [], []
+    for index, item in enumerate(items):
+        try:
+            post = PostCreate.model_validate(item)
+        except ValidationError as e:
+            results[index].error = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+            )
+            continue
+        rows.append({
+            **post.model_dump(exclude={"media_attachments"}),
+            "author_id": current_user.id,
+            "status": ContentStatus.DRAFT
+        })
+        row_indexes.append(index)
+        media.append(post.media_attachments or [])
+
+    if rows:
+        # One executemany INSERT ... RETURNING; ids come back in parameter order
+        result = await db.execute(
+            insert(Post).returning(Post.id, sort_by_parameter_order=True),
+            rows
+        )
+        post_ids = result.scalars().all()
+        for index, post_id in zip(row_indexes, post_ids):
+            results[index].id = post_id
+        attachments = [
+            {**attachment.model_dump(), "post_id": post_id}
+            for post_id, post_media in zip(post_ids, media)
+            for attachment in post_media
+        ]
+        if attachments:
+            await db.execute(insert(MediaAttachment), attachments)
+        await apply_rollup_deltas(db, rollup_deltas(added=rows))
+        platforms = {}
+        for row in rows:
+            platforms[row["platform"].value] = platforms.get(row["platform"].value, 0) + 1
+        # One event for the whole request rather than one row per post
+        record_event(db, POSTS_BULK_CREATED, current_user.id, payload={
+            "post_ids": list(post_ids), "count": len(rows), "platforms": platforms
+        })
+        await db.commit()
+        outbox_dispatcher.notify()
+        await response_cache.invalidate_user(current_user.id)
+
+    return _bulk_response(results)
+
+@router.post("/bulk/status", response_model=BulkResponse)
+async def bulk_update_status(
+    request: BulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Lock the current rows first so the rollup can move them out of their old buckets
+    result = await db.execute(
+        select(Post.id, Post.author_id, Post.platform, Post.status, Post.scheduled_time)
+        .where(Post.id.in_(request.ids), Post.author_id == current_user.id)
+        .with_for_update()
+    )
+    previous = result.all()
+    errors = {}
+    if request.status == ContentStatus.SCHEDULED:
+        # The scheduler could never fire these
+        errors = {row.id: "Post has no scheduled_time" for row in previous if row.scheduled_time is None}
+        previous = [row for row in previous if row.id not in errors]
+    result = await db.execute(
+        update(Post)
+        .where(Post.id.in_([row.id for row in previous]))
+        .values(status=request.status)
+        .returning(Post.id, Post.author_id, Post.platform, Post.status, Post.scheduled_time)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.all()
+    await apply_rollup_deltas(db, rollup_deltas(added=updated, removed=previous))
+    if updated:
+        record_event(db, POSTS_BULK_STATUS_CHANGED, current_user.id, payload={
+            "post_ids": [row.id for row in updated], "count": len(updated), "status": request.status.value
+        })
+    await db.commit()
+
+    for row in updated:
+        post_scheduler.track(row)
+    if updated:
+        outbox_dispatcher.notify()
+        await response_cache.invalidate_user(current_user.id)
+    return _bulk_response(_missing_results(request.ids, {row.id for row in updated}, errors))
+
+@router.post("/bulk/delete", response_model=BulkResponse)
+async def bulk_delete_posts(
+    request: BulkDelete,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.execute(
+        select(Post.id, Post.author_id, Post.platform, Post.status, Post.scheduled_time)
+        .where(Post.id.in_(request.ids), Post.author_id == current_user.id)
+        .with_for_update()
+    )
+    rows = result.all()
+    owned = [row.id for row in rows]
+    if owned:
+        # Detach children the same way the single-post delete does
+        for model in (MediaAttachment, PostAnalytics):
+            await db.execute(
+                update(model).where(model.post_id.in_(owned)).values(post_id=None)
+                .execution_options(synchronize_session=False)
+            )
+        await db.execute(delete(PostMetricSample).where(PostMetricSample.post_id.in_(owned)))
+        await db.execute(
+            delete(Post).where(Post.id.in_(owned)).execution_options(synchronize_session=False)
+        )
+        await apply_rollup_deltas(db, rollup_deltas(removed=rows))
+        record_event(db, POSTS_BULK_DELETED, current_user.id, payload={"post_ids": owned, "count": len(owned)})
+        await db.commit()
+        outbox_dispatcher.notify()
+        for post_id in owned:
+            post_scheduler.untrack(post_id)
+        await response_cache.invalidate_user(current_user.id)
+    return _bulk_response(_missing_results(request.ids, set(owned)))
+
+def encode_cursor(post: Post) -> str:
+    """Opaque keyset cursor pointing just past ``post`` in (scheduled_time, id) order."""
+    scheduled_time = post.scheduled_time.isoformat() if post.scheduled_time else None
+    raw = json.dumps({"t": scheduled_time, "id": post.id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        scheduled_time = datetime.fromisoformat(data["t"]) if data["t"] else None
+        return scheduled_time, int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def filter_posts(
+    query, current_user: User, platform: Optional[PlatformType], status: Optional[ContentStatus], model=Post
+):
+    query = query.where(model.author_id == current_user.id)
+    if platform:
+        query = query.where(model.platform == platform)
+    if status:
+        query = query.where(model.status == status)
+    return query
+
+def post_order(model=Post):
+    # Unscheduled posts sort after every scheduled one, ties broken by id
+    return (model.scheduled_time.asc().nulls_last(), model.id.asc())
+
+POST_ORDER = post_order(Post)
+
+def post_sort_key(post):
+    """``POST_ORDER`` in Python, for merging live and archived posts."""
+    return (post.scheduled_time is None, post.scheduled_time or datetime.min, post.id)
+
+async def missing_post(db: AsyncSession, current_user: User, post_id: int) -> HTTPException:
+    """The error for a write to a post that is not in ``posts``."""
+    result = await db.execute(
+        select(PostArchive.id).where(PostArchive.id == post_id, PostArchive.author_id == current_user.id)
+    )
+    if result.first():
+        return HTTPException(status_code=409, detail="Archived posts are read-only")
+    return HTTPException(status_code=404, detail="Post not found")
+
 @router.get("/", response_model=List[PostResponse])
 async def get_posts(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     platform: Optional[PlatformType] = None,
     status: Optional[ContentStatus] = None,
-    db: Session = Depends(get_db),
+    include_archived: bool = INCLUDE_ARCHIVED,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Post).filter(Post.author_id == current_user.id)
-    
-    if platform:
-        query = query.filter(Post.platform == platform)
-    if status:
-        query = query.filter(Post.status == status)
+    """List posts ordered by (scheduled_time, id).
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; the header is absent on the last page.
+    """
+    async def page(model, options):
+        query = filter_posts(select(model).options(*options), current_user, platform, status, model)
         
-    return query.offset(skip).limit(limit).all()
+        if cursor:
+            after_time, after_id = decode_cursor(cursor)
+            if after_time is None:
+                query = query.where(model.scheduled_time.is_(None), model.id > after_id)
+            else:
+                query = query.where(or_(
+                    model.scheduled_time > after_time,
+                    and_(model.scheduled_time == after_time, model.id > after_id),
+                    model.scheduled_time.is_(None)
+                ))
+            
+        # Fetch one extra row to learn whether another page exists
+        result = await db.execute(query.order_by(*post_order(model)).limit(limit + 1))
+        return result.scalars().all()
+
+    async def build():
+        posts = await page(Post, POST_LOAD_OPTIONS)
+        if include_archived:
+            # Both are in cursor order, so the next page is the head of their merge
+            posts = sorted([*posts, *await page(PostArchive, ARCHIVE_LOAD_OPTIONS)], key=post_sort_key)[:limit + 1]
+        headers = {}
+        if len(posts) > limit:
+            posts = posts[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(posts[-1])
+        return serialize_posts(posts), headers
+
+    return await response_cache.respond(request, await response_cache.list_key(current_user.id, request), build)
+
+EXPORT_COLUMNS = ("id", "content", "platform", "status", "scheduled_time", "published_time", "created_at", "updated_at")
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+@router.get("/export")
+async def export_posts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    platform: Optional[PlatformType] = None,
+    status: Optional[ContentStatus] = None,
+    include_archived: bool = INCLUDE_ARCHIVED,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every matching post as NDJSON or CSV in constant memory.
+
+    Archived posts, when included, follow the live ones.
+    """
+    queries = [
+        filter_posts(
+            select(*(getattr(model, name) for name in EXPORT_COLUMNS)), current_user, platform, status, model
+        ).order_by(*post_order(model))
+        for model in ((Post, PostArchive) if include_archived else (Post,))
+    ]
+
+    async def rows():
+        # Own session: dependency cleanup runs before a streaming body is sent
+        async with replica_router.session(current_user.email) as db:
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+            for query in queries:
+                result = await db.stream(query.execution_options(yield_per=1000))
+                if format == "csv":
+                    async for partition in result.partitions():
+                        for row in partition:
+                            writer.writerow([_export_value(value) for value in row])
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                else:
+                    async for partition in result.partitions():
+                        yield "".join(
+                            json.dumps(dict(zip(EXPORT_COLUMNS, map(_export_value, row)))) + "\n"
+                            for row in partition
+                        )
+            if format == "csv":
+                yield buffer.getvalue()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=posts.{format}"}
+    )
+
+MAX_CALENDAR_DAYS = 366
+
+@router.get("/calendar", response_model=CalendarResponse)
+async def get_calendar(
+    request: Request,
+    start: date,
+    end: date,
+    tz: str = "UTC",
+    include_archived: bool = INCLUDE_ARCHIVED,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Scheduled posts from ``start`` to ``end`` (inclusive), grouped by local day in ``tz``."""
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range may span at most {MAX_CALENDAR_DAYS} days")
+
+    window_start = datetime.combine(start, time.min, tzinfo=zone).astimezone(timezone.utc)
+    window_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone).astimezone(timezone.utc)
+
+    async def build():
+        async def window(model, options):
+            # Served by ix_posts_author_scheduled_time (ix_posts_archive_author_scheduled_time)
+            result = await db.execute(
+                select(model).options(*options).where(
+                    model.author_id == current_user.id,
+                    model.scheduled_time >= window_start,
+                    model.scheduled_time < window_end
+                ).order_by(model.scheduled_time, model.id)
+            )
+            return result.scalars().all()
+
+        posts = await window(Post, POST_LOAD_OPTIONS)
+        if include_archived:
+            posts = sorted([*posts, *await window(PostArchive, ARCHIVE_LOAD_OPTIONS)], key=post_sort_key)
+
+        days = {}
+        for post in posts:
+            scheduled_time = post.scheduled_time
+            if scheduled_time.tzinfo is None:
+                # SQLite returns naive values; they are stored as UTC
+                scheduled_time = scheduled_time.replace(tzinfo=timezone.utc)
+            days.setdefault(scheduled_time.astimezone(zone).date(), ([], []))[0].append(post)
+
+        # Expanded from the rules on every request; only due occurrences have rows
+        virtual = await author_occurrences(
+            db, current_user.id, window_start - timedelta(microseconds=1), window_end - timedelta(microseconds=1)
+        )
+        for series, scheduled_time in virtual:
+            days.setdefault(scheduled_time.astimezone(zone).date(), ([], []))[1].append(SeriesOccurrence(
+                series_id=series.id, scheduled_time=scheduled_time, content=series.content, platform=series.platform
+            ))
+
+        calendar = CalendarResponse(
+            timezone=tz,
+            start=start,
+            end=end,
+            days=[
+                CalendarDay(date=day, posts=posts, occurrences=virtual)
+                for day, (posts, virtual) in sorted(days.items())
+            ]
+        )
+        return calendar.model_dump_json().encode(), {}
+
+    return await response_cache.respond(request, await response_cache.list_key(current_user.id, request), build)
+
+@router.get("/search", response_model=PostSearchResponse)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    platform: Optional[PlatformType] = None,
+    status: Optional[ContentStatus] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Posts whose content contains every word of ``q``, best match first.
+
+    End ``q`` with ``*`` to match the last word as a prefix. Each hit carries an excerpt with
+    the matches wrapped in ``<mark>`` tags; the excerpt is not HTML-escaped.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Query must contain at least one word")
+
+    async def build():
+        # Served by the full-text index (services/search.py); only the page of hits is loaded
+        hits = await search_posts(db, current_user.id, terms, platform, status, limit, offset)
+        posts = {}
+        if hits:
+            result = await db.execute(
+                select(Post).options(*POST_LOAD_OPTIONS).where(Post.id.in_([post_id for post_id, _, _ in hits]))
+            )
+            posts = {post.id: post for post in result.scalars().all()}
+        response = PostSearchResponse(
+            query=q,
+            results=[
+                PostSearchHit(post=PostResponse.model_validate(posts[post_id]), score=score, highlight=highlight)
+                for post_id, score, highlight in hits
+                if post_id in posts
+            ]
+        )
+        return response.model_dump_json().encode(), {}
+
+    return await response_cache.respond(request, await response_cache.list_key(current_user.id, request), build)
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
+    request: Request,
     post_id: int,
-    db: Session = Depends(get_db),
+    include_archived: bool = INCLUDE_ARCHIVED,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(
-        Post.id == post_id,
-        Post.author_id == current_user.id
-    ).first()
-    
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    async def build():
+        result = await db.execute(
+            select(Post).options(*POST_LOAD_OPTIONS).where(
+                Post.id == post_id,
+                Post.author_id == current_user.id
+            )
+        )
+        post = result.scalars().first()
+        if not post and include_archived:
+            result = await db.execute(
+                select(PostArchive).options(*ARCHIVE_LOAD_OPTIONS).where(
+                    PostArchive.id == post_id,
+                    PostArchive.author_id == current_user.id
+                )
+            )
+            post = result.scalars().first()
+        
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        return PostResponse.model_validate(post).model_dump_json().encode(), {}
+
+    # include_archived changes the answer, so that lookup is keyed on its query string like a list
+    if include_archived:
+        key = await response_cache.list_key(current_user.id, request)
+    else:
+        key = await response_cache.item_key(current_user.id, post_id)
+    return await response_cache.respond(request, key, build)
 
 @router.put("/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: int,
     post_update: PostUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_post = db.query(Post).filter(
-        Post.id == post_id,
-        Post.author_id == current_user.id
-    ).first()
+    # Locked like the bulk paths: the rollup deltas are computed from the row as read,
+    # and a concurrent edit or scheduler dispatch must not change it in between
+    result = await db.execute(
+        select(Post).where(
+            Post.id == post_id,
+            Post.author_id == current_user.id
+        ).with_for_update()
+    )
+    db_post = result.scalars().first()
     
     if not db_post:
-        raise HTTPException(status_code=404, detail="Post not found")
+        raise await missing_post(db, current_user, post_id)
     
+    previous_key = rollup_key(db_post)
     for key, value in post_update.dict(exclude_unset=True).items():
         setattr(db_post, key, value)
+    if db_post.status == ContentStatus.SCHEDULED and db_post.scheduled_time is None:
+        raise HTTPException(status_code=400, detail="A scheduled post needs a scheduled_time")
+    deltas = rollup_deltas(added=[db_post])
+    deltas[previous_key] -= 1
+    await apply_rollup_deltas(db, deltas)
+    payload = post_payload(db_post)
+    record_event(db, POST_UPDATED, current_user.id, post_id, payload)
+    if db_post.status == ContentStatus.SCHEDULED and previous_key[3] != ContentStatus.SCHEDULED:
+        record_event(db, POST_SCHEDULED, current_user.id, post_id, payload)
     
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    outbox_dispatcher.notify()
+    db_post = await load_post(db, post_id)
+    post_scheduler.track(db_post)
+    await response_cache.invalidate_user(current_user.id)
     return db_post
 
 @router.delete("/{post_id}")
 async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(
-        Post.id == post_id,
-        Post.author_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Post).where(
+            Post.id == post_id,
+            Post.author_id == current_user.id
+        ).with_for_update()
+    )
+    post = result.scalars().first()
     
     if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
+        raise await missing_post(db, current_user, post_id)
     
-    db.delete(post)
-    db.commit()
+    record_event(db, POST_DELETED, current_user.id, post_id, post_payload(post))
+    # Samples are meaningless without their post (and post_id is NOT NULL)
+    await db.execute(delete(PostMetricSample).where(PostMetricSample.post_id == post_id))
+    await db.delete(post)
+    await apply_rollup_deltas(db, rollup_deltas(removed=[post]))
+    await db.commit()
+    outbox_dispatcher.notify()
+    post_scheduler.untrack(post_id)
+    await response_cache.invalidate_user(current_user.id)
     return {"message": "Post deleted successfully"} 
\ No newline at end of file
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+from ..database import get_read_db
+from ..models import User
+from ..schemas import ReportResponse
+from ..services.reports import build_report
+from .auth import get_current_user
+
+router = APIRouter()
+
+@router.get("/", response_model=ReportResponse)
+async def get_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Post counts by platform, status, day and week (of scheduled_time, UTC).
+
+    With ``start``/``end`` only scheduled posts in that inclusive range count.
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    return await build_report(db, current_user.id, start, end)
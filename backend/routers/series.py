@@ -0,0 +1,185 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from datetime import datetime, timedelta, timezone
+from ..database import get_db, get_read_db
+from ..models import Post, PostSeries, User
+from ..schemas import PostSeriesCreate, PostSeriesResponse, PostSeriesUpdate, SeriesOccurrence, SeriesSkip
+from ..services.outbox import outbox_dispatcher
+from ..services.recurrence import (
+    RecurrenceError, as_utc, build_rule, get_zone, is_occurrence, last_occurrence, materialize, occurrences
+)
+from ..services.response_cache import response_cache
+from ..services.scheduler import post_scheduler
+from .auth import get_current_user
+
+router = APIRouter()
+
+MAX_SERIES_PER_USER = 100
+MAX_PREVIEW_DAYS = 366
+
+async def _owned_series(db: AsyncSession, series_id: int, user: User) -> PostSeries:
+    result = await db.execute(
+        select(PostSeries).where(PostSeries.id == series_id, PostSeries.author_id == user.id)
+    )
+    series = result.scalars().first()
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    return series
+
+def _apply_rule(series: PostSeries):
+    """Validate the series' rule and time zone and recompute ``ends_at``."""
+    # An anchor from the previous rule may not be an occurrence of the new one
+    series.expand_from = None
+    try:
+        build_rule(series.rrule, as_utc(series.dtstart), series.timezone)
+        series.ends_at = last_occurrence(series.rrule, as_utc(series.dtstart), series.timezone)
+    except RecurrenceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _materialize_due(db: AsyncSession, series: PostSeries, user: User):
+    """Create posts for occurrences the scheduler's next refill would be too late for, then commit."""
+    posts = []
+    if series.is_active:
+        posts = await materialize(db, [series], post_scheduler.materialize_through(datetime.now(timezone.utc)))
+    await db.commit()
+    await db.refresh(series)
+    if posts:
+        outbox_dispatcher.notify()
+    for post in posts:
+        post_scheduler.track(post)
+    await response_cache.invalidate_user(user.id)
+
+@router.post("/", response_model=PostSeriesResponse, status_code=201)
+async def create_series(
+    series: PostSeriesCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Repeat a post on an RFC 5545 recurrence rule.
+
+    Occurrences show up in the calendar straight away but only become posts
+    shortly before they are due; occurrences before now are never created.
+    """
+    count = await db.scalar(
+        select(func.count()).select_from(PostSeries).where(PostSeries.author_id == current_user.id)
+    )
+    if count >= MAX_SERIES_PER_USER:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_PER_USER} series per user")
+    try:
+        zone = get_zone(series.timezone)
+    except RecurrenceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    dtstart = series.dtstart if series.dtstart.tzinfo else series.dtstart.replace(tzinfo=zone)
+
+    db_series = PostSeries(
+        author_id=current_user.id,
+        content=series.content,
+        platform=series.platform,
+        rrule=series.rrule,
+        dtstart=dtstart.astimezone(timezone.utc),
+        timezone=series.timezone,
+        # Everything before dtstart (or before now) is already "done"
+        materialized_through=min(datetime.now(timezone.utc), dtstart - timedelta(microseconds=1)),
+        is_active=True
+    )
+    _apply_rule(db_series)
+    db.add(db_series)
+    await db.flush()
+    await _materialize_due(db, db_series, current_user)
+    return db_series
+
+@router.get("/", response_model=List[PostSeriesResponse])
+async def list_series(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.execute(
+        select(PostSeries).where(PostSeries.author_id == current_user.id).order_by(PostSeries.id)
+    )
+    return result.scalars().all()
+
+@router.get("/{series_id}", response_model=PostSeriesResponse)
+async def get_series(
+    series_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await _owned_series(db, series_id, current_user)
+
+@router.put("/{series_id}", response_model=PostSeriesResponse)
+async def update_series(
+    series_id: int,
+    series_update: PostSeriesUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Change the series from its next unmaterialized occurrence on; existing posts are left alone."""
+    series = await _owned_series(db, series_id, current_user)
+    update_data = series_update.dict(exclude_unset=True)
+    resumed = update_data.get("is_active") and not series.is_active
+    for field, value in update_data.items():
+        setattr(series, field, value)
+    if {"rrule", "timezone"} & update_data.keys():
+        _apply_rule(series)
+    if resumed:
+        # Occurrences missed while the series was paused are not caught up
+        series.materialized_through = max(as_utc(series.materialized_through), datetime.now(timezone.utc))
+    await _materialize_due(db, series, current_user)
+    return series
+
+@router.delete("/{series_id}")
+async def delete_series(
+    series_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stop the series. Posts already created from it are kept as ordinary posts."""
+    series = await _owned_series(db, series_id, current_user)
+    await db.execute(update(Post).where(Post.series_id == series.id).values(series_id=None))
+    await db.delete(series)
+    await db.commit()
+    await response_cache.invalidate_user(current_user.id)
+    return {"message": "Series deleted successfully"}
+
+@router.get("/{series_id}/occurrences", response_model=List[SeriesOccurrence])
+async def list_occurrences(
+    series_id: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Occurrences from ``start`` to ``end`` that have not become posts yet."""
+    series = await _owned_series(db, series_id, current_user)
+    start, end = as_utc(start), as_utc(end)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if end - start > timedelta(days=MAX_PREVIEW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range may span at most {MAX_PREVIEW_DAYS} days")
+    return [
+        SeriesOccurrence(series_id=series.id, scheduled_time=time, content=series.content, platform=series.platform)
+        for time in occurrences(series, start - timedelta(microseconds=1), end)
+    ]
+
+@router.post("/{series_id}/skip", response_model=PostSeriesResponse)
+async def skip_occurrence(
+    series_id: int,
+    skip: SeriesSkip,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Leave out one future occurrence. Delete the post instead once it has been created."""
+    series = await _owned_series(db, series_id, current_user)
+    occurrence = as_utc(skip.occurrence)
+    if not is_occurrence(series, occurrence):
+        raise HTTPException(status_code=400, detail="Not an occurrence of this series")
+    if occurrence <= as_utc(series.materialized_through):
+        raise HTTPException(status_code=409, detail="Occurrence already has a post; delete the post instead")
+    # Reassign rather than append, so the JSON column is seen as changed
+    series.exdates = sorted({*(series.exdates or ()), occurrence.isoformat()})
+    await db.commit()
+    await db.refresh(series)
+    await response_cache.invalidate_user(current_user.id)
+    return series
@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from ..database import get_db, get_read_db
+from ..models import User, WebhookDeadLetter, WebhookSubscription
+from ..schemas import (
+    WebhookDeadLetterResponse, WebhookSubscriptionCreate, WebhookSubscriptionCreated, WebhookSubscriptionResponse
+)
+from ..services.outbox import EVENT_TYPES
+from ..services.webhooks import Delivery, check_target, generate_secret, webhook_service
+from .auth import get_current_user
+
+router = APIRouter()
+
+MAX_SUBSCRIPTIONS_PER_USER = 20
+
+async def _owned_subscription(db: AsyncSession, subscription_id: int, user: User) -> WebhookSubscription:
+    result = await db.execute(
+        select(WebhookSubscription).where(
+            WebhookSubscription.id == subscription_id,
+            WebhookSubscription.user_id == user.id
+        )
+    )
+    subscription = result.scalars().first()
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Webhook subscription not found")
+    return subscription
+
+@router.post("/", response_model=WebhookSubscriptionCreated, status_code=201)
+async def create_subscription(
+    subscription: WebhookSubscriptionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Subscribe a URL to post events.
+
+    Each delivery is a JSON POST signed with the returned secret: the
+    ``X-Webhook-Signature`` header holds ``sha256=`` plus the hex HMAC-SHA256
+    of ``"<X-Webhook-Timestamp>." + body``. ``X-Webhook-Id`` is the same on
+    every retry of an event, so receivers can drop duplicates.
+    """
+    unknown = set(subscription.event_types or ()) - set(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown event types: {', '.join(sorted(unknown))}; expected some of {', '.join(EVENT_TYPES)}"
+        )
+    if not webhook_service.allow_private_targets:
+        # Loopback, private and link-local targets would let users probe internal hosts
+        reason = await check_target(str(subscription.url))
+        if reason:
+            raise HTTPException(status_code=400, detail=f"Webhook URL not allowed: {reason}")
+    count = await db.scalar(
+        select(func.count()).select_from(WebhookSubscription).where(WebhookSubscription.user_id == current_user.id)
+    )
+    if count >= MAX_SUBSCRIPTIONS_PER_USER:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SUBSCRIPTIONS_PER_USER} webhook subscriptions per user")
+
+    db_subscription = WebhookSubscription(
+        user_id=current_user.id,
+        url=str(subscription.url),
+        secret=generate_secret(),
+        event_types=subscription.event_types,
+        is_active=True
+    )
+    db.add(db_subscription)
+    await db.commit()
+    await db.refresh(db_subscription)
+    return db_subscription
+
+@router.get("/", response_model=List[WebhookSubscriptionResponse])
+async def list_subscriptions(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.execute(
+        select(WebhookSubscription).where(WebhookSubscription.user_id == current_user.id).order_by(WebhookSubscription.id)
+    )
+    return result.scalars().all()
+
+@router.delete("/{subscription_id}")
+async def delete_subscription(
+    subscription_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    subscription = await _owned_subscription(db, subscription_id, current_user)
+    await db.execute(delete(WebhookDeadLetter).where(WebhookDeadLetter.subscription_id == subscription.id))
+    await db.delete(subscription)
+    await db.commit()
+    webhook_service.cancel_subscription(subscription_id)
+    return {"message": "Webhook subscription deleted successfully"}
+
+@router.get("/dead-letters", response_model=List[WebhookDeadLetterResponse])
+async def list_dead_letters(
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Deliveries that gave up, newest first."""
+    result = await db.execute(
+        select(WebhookDeadLetter)
+        .join(WebhookSubscription, WebhookSubscription.id == WebhookDeadLetter.subscription_id)
+        .where(WebhookSubscription.user_id == current_user.id)
+        .order_by(WebhookDeadLetter.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+@router.post("/dead-letters/{dead_letter_id}/redeliver", status_code=202)
+async def redeliver_dead_letter(
+    dead_letter_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a dead letter again with a fresh set of attempts; it is removed from the list."""
+    result = await db.execute(
+        select(WebhookDeadLetter, WebhookSubscription)
+        .join(WebhookSubscription, WebhookSubscription.id == WebhookDeadLetter.subscription_id)
+        .where(WebhookDeadLetter.id == dead_letter_id, WebhookSubscription.user_id == current_user.id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Dead letter not found")
+    dead_letter, subscription = row
+    await db.delete(dead_letter)
+    await db.commit()
+    webhook_service.submit(Delivery(
+        subscription_id=subscription.id,
+        url=subscription.url,
+        secret=subscription.secret,
+        event_key=dead_letter.event_key,
+        event_type=dead_letter.event_type,
+        body=dead_letter.body.encode()
+    ))
+    return {"message": "Redelivery queued"}
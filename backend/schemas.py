@@ -1,19 +1,7 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
-from datetime import datetime
-from enum import Enum
-
-class PlatformType(str, Enum):
-    TWITTER = "twitter"
-    LINKEDIN = "linkedin"
-    INSTAGRAM = "instagram"
-    FACEBOOK = "facebook"
-
-class ContentStatus(str, Enum):
-    DRAFT = "draft"
-    SCHEDULED = "scheduled"
-    PUBLISHED = "published"
-    FAILED = "failed"
+from pydantic import AnyHttpUrl, BaseModel, EmailStr, Field, validator
+from typing import Dict, Optional, List
+from datetime import date, datetime, timezone
+from .models import PlatformType, ContentStatus
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -28,7 +16,7 @@ class UserResponse(UserBase):
     created_at: datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class MediaAttachmentBase(BaseModel):
     url: str
@@ -41,9 +29,17 @@ class MediaAttachmentResponse(MediaAttachmentBase):
     id: int
     created_at: datetime
     post_id: int
+    content_hash: Optional[str] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    filename: Optional[str] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class MediaUploadResponse(MediaAttachmentResponse):
+    # The same content was already stored, so no new blob was written
+    duplicate: bool
 
 class PostAnalyticsResponse(BaseModel):
     id: int
@@ -51,26 +47,49 @@ class PostAnalyticsResponse(BaseModel):
     shares: int
     comments: int
     impressions: int
-    updated_at: datetime
+    updated_at: Optional[datetime]
     post_id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class PostBase(BaseModel):
     content: str
     platform: PlatformType
-    scheduled_time: datetime
+    scheduled_time: Optional[datetime] = None
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Times are stored as UTC; naive input is taken to be UTC already.
+
+    SQLite keeps the wall-clock value and drops the offset, so anything else
+    would be read back (by the scheduler, reports, cursors) as a different time.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
 
 class PostCreate(PostBase):
     media_attachments: Optional[List[MediaAttachmentCreate]] = None
 
+    _utc = validator("scheduled_time", allow_reuse=True)(to_utc)
+
+def reject_null(value):
+    """For partial updates: a field may be left out, but not set to null."""
+    if value is None:
+        raise ValueError("may be omitted but not null")
+    return value
+
 class PostUpdate(BaseModel):
     content: Optional[str] = None
     platform: Optional[PlatformType] = None
     scheduled_time: Optional[datetime] = None
     status: Optional[ContentStatus] = None
 
+    _not_null = validator("content", "platform", "status", allow_reuse=True)(reject_null)
+    _utc = validator("scheduled_time", allow_reuse=True)(to_utc)
+
 class PostResponse(PostBase):
     id: int
     status: ContentStatus
@@ -78,11 +97,173 @@ class PostResponse(PostBase):
     created_at: datetime
     updated_at: Optional[datetime]
     author_id: int
+    # Set when the post was materialized from a recurring series
+    series_id: Optional[int] = None
+    # Set on archived posts, which are read-only (services/archive.py)
+    archived_at: Optional[datetime] = None
+    # Eager-load both (POST_LOAD_OPTIONS in routers/posts.py); async sessions cannot lazy-load
     media_attachments: List[MediaAttachmentResponse]
     analytics: Optional[PostAnalyticsResponse]
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class DayCount(BaseModel):
+    date: date
+    count: int
+
+class WeekCount(BaseModel):
+    week_start: date
+    count: int
+
+class ReportResponse(BaseModel):
+    total: int
+    unscheduled: int
+    by_platform: Dict[PlatformType, int]
+    by_status: Dict[ContentStatus, int]
+    by_day: List[DayCount]
+    by_week: List[WeekCount]
+
+class MetricSnapshot(BaseModel):
+    post_id: int
+    observed_at: datetime
+    likes: int = Field(0, ge=0)
+    shares: int = Field(0, ge=0)
+    comments: int = Field(0, ge=0)
+    impressions: int = Field(0, ge=0)
+
+class MetricIngestRequest(BaseModel):
+    snapshots: List[MetricSnapshot] = Field(..., min_length=1, max_length=10000)
+
+class MetricIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+
+class CurvePoint(BaseModel):
+    time: datetime
+    likes: int
+    shares: int
+    comments: int
+    impressions: int
+    engagement: int
+    engagement_rate: float
+
+class PostCurveResponse(BaseModel):
+    post_id: int
+    resolution: int
+    points: List[CurvePoint]
+
+class PlatformCurveResponse(BaseModel):
+    resolution: int
+    buckets: List[datetime]
+    platforms: Dict[PlatformType, List[int]]
+
+class WebhookSubscriptionCreate(BaseModel):
+    url: AnyHttpUrl
+    # Outbox event types such as "post.published"; omit for all of them
+    event_types: Optional[List[str]] = Field(None, min_length=1)
+
+class WebhookSubscriptionResponse(BaseModel):
+    id: int
+    url: str
+    event_types: Optional[List[str]] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class WebhookSubscriptionCreated(WebhookSubscriptionResponse):
+    # Only returned once, when the subscription is created
+    secret: str
+
+class WebhookDeadLetterResponse(BaseModel):
+    id: int
+    subscription_id: int
+    event_key: str
+    event_type: str
+    attempts: int
+    last_status: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class PostSeriesCreate(BaseModel):
+    content: str
+    platform: PlatformType
+    # RRULE properties, e.g. "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=20"
+    rrule: str = Field(..., max_length=512)
+    # First occurrence; a naive value is local time in ``timezone``
+    dtstart: datetime
+    timezone: str = "UTC"
+
+class PostSeriesUpdate(BaseModel):
+    content: Optional[str] = None
+    platform: Optional[PlatformType] = None
+    rrule: Optional[str] = Field(None, max_length=512)
+    timezone: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    _not_null = validator("content", "platform", "rrule", "timezone", "is_active", allow_reuse=True)(reject_null)
+
+class PostSeriesResponse(BaseModel):
+    id: int
+    content: str
+    platform: PlatformType
+    rrule: str
+    dtstart: datetime
+    timezone: str
+    ends_at: Optional[datetime] = None
+    exdates: Optional[List[datetime]] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SeriesOccurrence(BaseModel):
+    """An occurrence of a series that has no post yet."""
+    series_id: int
+    scheduled_time: datetime
+    content: str
+    platform: PlatformType
+
+class SeriesSkip(BaseModel):
+    occurrence: datetime
+
+class OptimizeRequest(BaseModel):
+    # Drafts to place; omit for every unscheduled draft
+    post_ids: Optional[List[int]] = Field(None, max_length=500)
+    # Defaults to now; slots start at the next whole hour
+    start: Optional[datetime] = None
+    days: int = Field(14, ge=1, le=90)
+    # Minimum distance to any other post on the same platform
+    min_gap_minutes: int = Field(120, ge=0, le=1440)
+
+class SlotProposal(BaseModel):
+    post_id: int
+    platform: PlatformType
+    # None when every slot in the window collides with another post
+    scheduled_time: Optional[datetime] = None
+    expected_engagement: Optional[float] = None
+
+class OptimizeResponse(BaseModel):
+    posts_analyzed: int
+    proposals: List[SlotProposal]
+
+class PlatformHeatmap(BaseModel):
+    # 7 x 24, Monday first, in the requested time zone
+    scores: List[List[float]]
+    posts: List[List[int]]
+    best_slots: List[str]
+
+class EngagementAnalysis(BaseModel):
+    timezone: str
+    posts_analyzed: int
+    platforms: Dict[PlatformType, PlatformHeatmap]
 
 class Token(BaseModel):
     access_token: str
@@ -99,4 +280,18 @@ class AIContentRequest(BaseModel):
 
 class AIContentResponse(BaseModel):
     content: str
-    suggestions: List[str] 
\ No newline at end of file
+    suggestions: List[str]
+
+class AIBatchRequest(BaseModel):
+    topics: List[str] = Field(..., min_length=1, max_length=20)
+    platforms: List[PlatformType] = Field(..., min_length=1, max_length=4)
+    tone: Optional[str] = "professional"
+    length: Optional[int] = None
+    max_parallel: int = Field(4, ge=1, le=8)
+
+class AIBatchResult(BaseModel):
+    topic: str
+    platform: PlatformType
+    content: Optional[str] = None
+    suggestions: List[str] = []
+    error: Optional[str] = None 
\ No newline at end of file
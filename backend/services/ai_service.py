@@ -1,11 +1,67 @@
-import openai
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from typing import List, Tuple
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from ..cache import TTLCache
+from ..metrics import track_call
 from ..schemas import PlatformType, AIContentRequest
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    """Failures worth another attempt; anything else (bad request, auth) is final."""
+    # openai takes about half a second to import, so it is only loaded on first use
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
 class AIService:
-    def __init__(self):
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+    """Generates post content through the OpenAI chat API.
+
+    Completions are cached by a hash of the full request, and identical
+    requests that arrive while one is in flight share its upstream call. At
+    most ``max_concurrency`` calls run at once; the rest wait on a semaphore,
+    and their wait is recorded. Each call has a timeout and is retried with
+    exponential backoff and jitter on transient errors.
+    """
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        base_url: Optional[str] = None,
+        cache_size: int = 1000,
+        cache_ttl: float = 3600,
+        max_concurrency: int = 8,
+        timeout: float = 30,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+    ):
+        self.model = model
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._client: Optional["AsyncOpenAI"] = None
+
+        self.upstream_calls = 0
+        self.upstream_failures = 0
+        self.retries = 0
+        self.coalesced = 0
+        self._queue_times = deque(maxlen=1000)
+
         self.platform_prompts = {
             PlatformType.TWITTER: "Create a concise and engaging tweet",
             PlatformType.LINKEDIN: "Write a professional LinkedIn post",
@@ -19,40 +75,164 @@ class AIService:
             PlatformType.FACEBOOK: 63206
         }
 
-    async def generate_content(self, request: AIContentRequest) -> Tuple[str, List[str]]:
-        try:
-            base_prompt = self.platform_prompts[request.platform]
-            max_length = request.length or self.max_lengths[request.platform]
-            
-            prompt = f"{base_prompt} about {request.topic}. "
-            prompt += f"The tone should be {request.tone}. "
-            prompt += f"Keep it under {max_length} characters. "
-            prompt += "Generate the main content followed by 2 alternative suggestions, separated by '|||'."
-
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a social media content expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # Built on first use so importing the app needs no API key
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0  # retries are handled in _complete
             )
+        return self._client
+
+    def build_messages(self, request: AIContentRequest) -> Tuple[List[dict], int]:
+        base_prompt = self.platform_prompts[request.platform]
+        max_length = request.length or self.max_lengths[request.platform]
+
+        prompt = f"{base_prompt} about {request.topic}. "
+        prompt += f"The tone should be {request.tone}. "
+        prompt += f"Keep it under {max_length} characters. "
+        prompt += "Generate the main content followed by 2 alternative suggestions, separated by '|||'."
+
+        messages = [
+            {"role": "system", "content": "You are a social media content expert."},
+            {"role": "user", "content": prompt}
+        ]
+        return messages, max_length
+
+    def completion_params(self, messages: List[dict]) -> dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
 
-            # Split the response into main content and suggestions
-            full_response = response.choices[0].message.content
-            parts = full_response.split("|||")
-            
-            main_content = parts[0].strip()
-            suggestions = [s.strip() for s in parts[1:] if s.strip()]
+    @staticmethod
+    def parse_response(full_response: str, max_length: int) -> Tuple[str, List[str]]:
+        # Split the response into main content and suggestions
+        parts = full_response.split("|||")
 
-            # Validate length
-            if len(main_content) > max_length:
-                main_content = main_content[:max_length]
+        main_content = parts[0].strip()
+        suggestions = [s.strip() for s in parts[1:] if s.strip()]
 
-            return main_content, suggestions
+        # Validate length
+        if len(main_content) > max_length:
+            main_content = main_content[:max_length]
+
+        return main_content, suggestions
+
+    async def generate_content(self, request: AIContentRequest) -> Tuple[str, List[str]]:
+        try:
+            messages, max_length = self.build_messages(request)
+            full_response = await self.complete(self.completion_params(messages))
+            return self.parse_response(full_response, max_length)
 
         except Exception as e:
             raise Exception(f"Error generating content: {str(e)}")
 
-ai_service = AIService() 
\ No newline at end of file
+    @staticmethod
+    def cache_key(params: dict) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    async def stream_content(self, request: AIContentRequest) -> AsyncIterator[str]:
+        """Yield completion text as it arrives; a cached result comes as one chunk.
+
+        Streams are not coalesced or retried, since chunks may already have
+        reached the client, but they do count against the concurrency cap.
+        """
+        messages, _ = self.build_messages(request)
+        params = self.completion_params(messages)
+        key = self.cache_key(params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        queued_at = time.perf_counter()
+        chunks = []
+        async with self._semaphore:
+            self._queue_times.append(time.perf_counter() - queued_at)
+            self.upstream_calls += 1
+            try:
+                # Timed until the last chunk, not just the first byte
+                with track_call("openai", "chat.completions.stream"):
+                    stream = await self.client.chat.completions.create(**params, stream=True)
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            chunks.append(delta)
+                            yield delta
+            except Exception:
+                self.upstream_failures += 1
+                raise
+        self.cache.set(key, "".join(chunks))
+
+    async def complete(self, params: dict) -> str:
+        """Completion text for ``params``, via the cache or one shared upstream call."""
+        key = self.cache_key(params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._complete(params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shield so one caller giving up does not cancel the call for the others
+        content = await asyncio.shield(task)
+        self.cache.set(key, content)
+        return content
+
+    async def _complete(self, params: dict) -> str:
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            self._queue_times.append(time.perf_counter() - queued_at)
+            for attempt in range(self.max_retries + 1):
+                self.upstream_calls += 1
+                try:
+                    with track_call("openai", "chat.completions"):
+                        response = await self.client.chat.completions.create(**params)
+                    return response.choices[0].message.content
+                except retryable_errors() as e:
+                    self.upstream_failures += 1
+                    if attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    delay = self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+                    logger.warning(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                except Exception:
+                    self.upstream_failures += 1
+                    raise
+
+    def metrics(self) -> dict:
+        queue_times = sorted(self._queue_times)
+        return {
+            "cache": self.cache.stats(),
+            "in_flight": len(self._in_flight),
+            "max_concurrency": self.max_concurrency,
+            "upstream_calls": self.upstream_calls,
+            "upstream_failures": self.upstream_failures,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "queue_time_p50": queue_times[len(queue_times) // 2] if queue_times else None,
+            "queue_time_p99": queue_times[min(len(queue_times) - 1, int(len(queue_times) * 0.99))] if queue_times else None,
+        }
+
+ai_service = AIService(
+    model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
+    cache_size=int(os.getenv("AI_CACHE_SIZE", "1000")),
+    cache_ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+    max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", "8")),
+    timeout=float(os.getenv("AI_TIMEOUT_SECONDS", "30")),
+    max_retries=int(os.getenv("AI_MAX_RETRIES", "2")),
+)
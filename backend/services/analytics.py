@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import SessionLocal
+from ..models import Post, PostAnalytics, PostMetricSample, PlatformType
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("likes", "shares", "comments", "impressions")
+UPSERT_CHUNK_SIZE = 1000
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite returns naive values; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+class MetricsIngestor:
+    """Buffers metric snapshots in memory and writes them in bulk.
+
+    ``submit`` only appends to the buffer, so the ingestion endpoint does no
+    database work. A background task flushes once ``flush_size`` snapshots
+    are waiting or every ``flush_interval`` seconds. Each flush appends all
+    snapshots to ``post_metric_samples`` with one executemany INSERT and
+    upserts the newest snapshot per post into ``post_analytics``, then drops
+    the affected authors' cached post responses, which embed the analytics.
+    When the buffer holds ``max_buffer`` snapshots, further ones are rejected.
+    """
+
+    def __init__(
+        self,
+        flush_size: int = 5000,
+        flush_interval: float = 1.0,
+        max_buffer: int = 200000,
+        bucket_seconds: int = 60,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.bucket_seconds = bucket_seconds
+        self._buffer: List[dict] = []
+        self._flush_needed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.flush_failures = 0
+        self._flush_times = deque(maxlen=100)
+
+    def submit(self, snapshots: List[dict]) -> int:
+        """Buffer ``snapshots``; returns how many fit."""
+        room = max(self.max_buffer - len(self._buffer), 0)
+        accepted = snapshots[:room]
+        self._buffer.extend(accepted)
+        self.accepted += len(accepted)
+        self.rejected += len(snapshots) - len(accepted)
+        if len(self._buffer) >= self.flush_size:
+            self._flush_needed.set()
+        return len(accepted)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it mid-write
+            self._stopping = True
+            self._flush_needed.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+        while self._buffer:
+            await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            while self._buffer:
+                await self.flush()
+                if len(self._buffer) < self.flush_size:
+                    break
+
+    def _bucket(self, observed_at: datetime) -> datetime:
+        timestamp = observed_at.timestamp()
+        return datetime.fromtimestamp(timestamp - timestamp % self.bucket_seconds, tz=timezone.utc)
+
+    async def flush(self):
+        batch, self._buffer = self._buffer[:self.flush_size], self._buffer[self.flush_size:]
+        if not batch:
+            return
+        started = time.perf_counter()
+
+        for snapshot in batch:
+            snapshot["bucket"] = self._bucket(snapshot["observed_at"])
+
+        try:
+            authors = await self._write(batch)
+        except Exception as e:
+            # Usually snapshots for posts deleted or archived since they were
+            # accepted; only those are dropped and the rest is written again
+            self.flush_failures += 1
+            try:
+                async with SessionLocal() as db:
+                    result = await db.execute(
+                        select(Post.id).where(Post.id.in_({snapshot["post_id"] for snapshot in batch}))
+                    )
+                    existing = set(result.scalars().all())
+                kept = [snapshot for snapshot in batch if snapshot["post_id"] in existing]
+                logger.warning(
+                    f"Dropping {len(batch) - len(kept)} metric snapshots for missing posts after failed flush: "
+                    f"{str(e).splitlines()[0]}"
+                )
+                batch = kept
+                authors = await self._write(batch) if batch else set()
+            except Exception as e:
+                logger.error(f"Dropping {len(batch)} metric snapshots after failed flush: {str(e)}")
+                return
+        for author_id in authors:
+            await response_cache.invalidate_user(author_id)
+        self.flushed += len(batch)
+        self._flush_times.append(time.perf_counter() - started)
+
+    async def _write(self, batch: List[dict]) -> Set[int]:
+        """Store ``batch``; returns the ids of the posts' authors."""
+        latest: Dict[int, dict] = {}
+        for snapshot in batch:
+            current = latest.get(snapshot["post_id"])
+            if current is None or snapshot["observed_at"] >= current["observed_at"]:
+                latest[snapshot["post_id"]] = snapshot
+
+        async with SessionLocal() as db:
+            await db.execute(insert(PostMetricSample), batch)
+            await self._upsert_latest(db, list(latest.values()))
+            result = await db.execute(select(Post.author_id).where(Post.id.in_(latest)).distinct())
+            authors = set(result.scalars().all())
+            await db.commit()
+        return authors
+
+    @staticmethod
+    async def _upsert_latest(db: AsyncSession, snapshots: List[dict]):
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        # Chunked to stay under SQLite's bound parameter limit
+        for offset in range(0, len(snapshots), UPSERT_CHUNK_SIZE):
+            stmt = dialect.insert(PostAnalytics).values([
+                {"post_id": s["post_id"], "updated_at": s["observed_at"], **{m: s[m] for m in METRICS}}
+                for s in snapshots[offset:offset + UPSERT_CHUNK_SIZE]
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["post_id"],
+                set_={name: stmt.excluded[name] for name in (*METRICS, "updated_at")},
+                # Late, out-of-order snapshots must not overwrite newer values
+                where=or_(PostAnalytics.updated_at.is_(None), PostAnalytics.updated_at <= stmt.excluded.updated_at)
+            )
+            await db.execute(stmt)
+
+    def metrics(self) -> dict:
+        flush_times = sorted(self._flush_times)
+        return {
+            "buffered": len(self._buffer),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "flush_failures": self.flush_failures,
+            "flush_time_p50": flush_times[len(flush_times) // 2] if flush_times else None,
+        }
+
+def downsample_cumulative(times: np.ndarray, values: np.ndarray, start: float, resolution: float):
+    """Last cumulative value in each ``resolution``-second bucket of time-sorted samples.
+
+    Returns (bucket start timestamps, values) for the buckets that have samples.
+    """
+    if times.size == 0:
+        return times, values
+    buckets = ((times - start) // resolution).astype(np.int64)
+    # Index of the last sample in each run of equal buckets
+    last = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))
+    return start + buckets[last] * resolution, values[last]
+
+def engagement_gain_by_bucket(
+    post_ids: np.ndarray,
+    buckets: np.ndarray,
+    engagement: np.ndarray,
+    groups: np.ndarray,
+    group_count: int,
+    bucket_count: int,
+) -> np.ndarray:
+    """Engagement gained per (group, bucket), from cumulative values sorted by (post, bucket).
+
+    Each value contributes its increase over the post's previous one, so
+    posts with different sampling rates add up correctly.
+    """
+    gains = np.diff(engagement, prepend=0).astype(np.float64)
+    first_of_post = np.ones(post_ids.size, dtype=bool)
+    first_of_post[1:] = post_ids[1:] != post_ids[:-1]
+    gains[first_of_post] = engagement[first_of_post]
+    flat = np.bincount(groups * bucket_count + buckets, weights=gains, minlength=group_count * bucket_count)
+    return flat.reshape(group_count, bucket_count)
+
+def epoch_seconds(column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return cast(func.extract("epoch", column), BigInteger)
+    return cast(func.strftime("%s", column), BigInteger)
+
+async def post_curve(db: AsyncSession, post_id: int, resolution: int) -> dict:
+    result = await db.execute(
+        select(PostMetricSample.observed_at, *(getattr(PostMetricSample, m) for m in METRICS))
+        .where(PostMetricSample.post_id == post_id)
+        .order_by(PostMetricSample.bucket, PostMetricSample.observed_at)
+    )
+    rows = result.all()
+    if not rows:
+        return {"post_id": post_id, "resolution": resolution, "points": []}
+
+    times = np.fromiter((as_utc(row[0]).timestamp() for row in rows), dtype=np.float64, count=len(rows))
+    values = np.array([row[1:] for row in rows], dtype=np.int64)
+    start = times[0] - times[0] % resolution
+    bucket_times, sampled = downsample_cumulative(times, values, start, resolution)
+
+    likes, shares, comments, impressions = sampled.T
+    engagement = likes + shares + comments
+    rate = np.divide(engagement, impressions, out=np.zeros(len(engagement)), where=impressions > 0)
+    return {
+        "post_id": post_id,
+        "resolution": resolution,
+        "points": [
+            {
+                "time": datetime.fromtimestamp(t, tz=timezone.utc),
+                **{m: int(v) for m, v in zip(METRICS, point)},
+                "engagement": int(e),
+                "engagement_rate": float(r),
+            }
+            for t, point, e, r in zip(bucket_times, sampled, engagement, rate)
+        ],
+    }
+
+async def platform_curves(db: AsyncSession, author_id: int, start: datetime, end: datetime, resolution: int) -> dict:
+    start_ts, end_ts = int(as_utc(start).timestamp()), int(as_utc(end).timestamp())
+    bucket_count = max(-(-(end_ts - start_ts) // resolution), 1)
+
+    # Values are cumulative, so the highest one per (post, bucket) is that
+    # bucket's closing value; the database collapses samples to those first
+    bucket = (epoch_seconds(PostMetricSample.bucket, db.bind.dialect.name) - start_ts) // resolution
+    engagement = func.max(PostMetricSample.likes + PostMetricSample.shares + PostMetricSample.comments)
+    result = await db.execute(
+        select(PostMetricSample.post_id, Post.platform, bucket, engagement)
+        .join(Post, Post.id == PostMetricSample.post_id)
+        .where(
+            Post.author_id == author_id,
+            PostMetricSample.bucket >= start,
+            PostMetricSample.bucket < end
+        )
+        .group_by(PostMetricSample.post_id, Post.platform, bucket)
+        .order_by(PostMetricSample.post_id, bucket)
+    )
+    rows = result.all()
+    platforms = list(PlatformType)
+
+    if rows:
+        post_ids, row_platforms, buckets, values = zip(*rows)
+        gains = engagement_gain_by_bucket(
+            np.array(post_ids, dtype=np.int64),
+            np.clip(np.array(buckets, dtype=np.int64), 0, bucket_count - 1),
+            np.array(values, dtype=np.int64),
+            np.array([platforms.index(platform) for platform in row_platforms], dtype=np.int64),
+            len(platforms),
+            bucket_count
+        )
+    else:
+        gains = np.zeros((len(platforms), bucket_count))
+
+    return {
+        "resolution": resolution,
+        "buckets": [datetime.fromtimestamp(start_ts + i * resolution, tz=timezone.utc) for i in range(bucket_count)],
+        "platforms": {
+            platform.value: [int(v) for v in gains[index]]
+            for index, platform in enumerate(platforms)
+        },
+    }
+
+metrics_ingestor = MetricsIngestor(
+    flush_size=int(os.getenv("METRICS_FLUSH_SIZE", "5000")),
+    flush_interval=float(os.getenv("METRICS_FLUSH_SECONDS", "1")),
+    max_buffer=int(os.getenv("METRICS_MAX_BUFFER", "200000")),
+    bucket_seconds=int(os.getenv("METRICS_BUCKET_SECONDS", "60")),
+)
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import DateTime, delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import SessionLocal
+from ..metrics import posts_archived
+from ..models import (
+    ContentStatus, MediaAttachment, MediaAttachmentArchive, Post, PostAnalytics, PostAnalyticsArchive, PostArchive,
+    PostMetricSample, PostMetricSampleArchive
+)
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Rows that belong to a post and move with it
+CHILD_TABLES = (
+    (MediaAttachment, MediaAttachmentArchive),
+    (PostAnalytics, PostAnalyticsArchive),
+    (PostMetricSample, PostMetricSampleArchive),
+)
+
+# Names of the monthly posts_archive partitions on PostgreSQL
+ARCHIVE_PARTITION = re.compile(r"posts_archive_\d{4}_\d{2}")
+
+def month_start(value: datetime) -> datetime:
+    # SQLite returns naive values; they are stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def _next_month(value: datetime) -> datetime:
+    return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+
+def _keeps_newest_rows() -> list:
+    """Conditions that leave each table's newest row in place.
+
+    SQLite hands out ``max(rowid) + 1`` as the next id, so moving a table's
+    newest row away would let a new row reuse its id. Such posts are moved by
+    a later run, once something newer exists.
+    """
+    conditions = [Post.id < select(func.max(Post.id)).scalar_subquery()]
+    for live, _ in CHILD_TABLES:
+        newest_owner = select(live.post_id).where(
+            live.id == select(func.max(live.id)).scalar_subquery(),
+            live.post_id.is_not(None)
+        )
+        conditions.append(Post.id.not_in(newest_owner))
+    return conditions
+
+class PostArchiver:
+    """Moves old published posts out of the hot tables.
+
+    PUBLISHED posts scheduled more than ``after_days`` ago are copied, with
+    their media attachments, analytics row and metric samples, to the
+    ``*_archive`` tables and deleted from the live ones, ``batch_size``
+    posts per transaction. The live tables and their indexes then only grow
+    with recent and upcoming posts, which is what the calendar, the
+    scheduler and the post list read. Archived posts are read-only and only
+    returned when a request asks for them (``include_archived``).
+
+    On PostgreSQL ``posts_archive`` is partitioned by month and each month
+    gets its own partition, optionally in a separate ``tablespace`` on
+    cheaper storage; a month can later be detached, dumped and dropped as a
+    unit. Batches are claimed with ``FOR UPDATE SKIP LOCKED``, so every
+    worker can run the archiver. Post counts in reports are unaffected: the
+    daily rollups are left as they are.
+    """
+
+    def __init__(
+        self,
+        after_days: float = 90,
+        batch_size: int = 500,
+        interval: float = 3600,
+        tablespace: Optional[str] = None,
+    ):
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.tablespace = tablespace
+        self._partitions = set()
+        self._task: Optional[asyncio.Task] = None
+
+        self.archived = 0
+        self.runs = 0
+        self.failures = 0
+        self._batch_times = deque(maxlen=100)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # An interrupted batch rolls back and is moved again next time
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Archiver error: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """Archive everything that is due, one batch at a time."""
+        moved = 0
+        while True:
+            count = await self.archive_batch()
+            moved += count
+            if count < self.batch_size:
+                break
+        self.runs += 1
+        if moved:
+            logger.info(f"Archived {moved} published posts")
+        return moved
+
+    async def _ensure_partitions(self, db: AsyncSession, months: Iterable[datetime]):
+        preparer = db.bind.dialect.identifier_preparer
+        for month in sorted(set(months) - self._partitions):
+            tablespace = f" TABLESPACE {preparer.quote(self.tablespace)}" if self.tablespace else ""
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS posts_archive_{month:%Y_%m} PARTITION OF posts_archive "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}'){tablespace}"
+            ))
+            self._partitions.add(month)
+
+    async def archive_batch(self) -> int:
+        """Move up to ``batch_size`` due posts; returns how many were moved."""
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.after_days)
+        async with SessionLocal() as db:
+            dialect = db.bind.dialect.name
+            query = select(Post.id, Post.author_id, Post.scheduled_time).where(
+                Post.status == ContentStatus.PUBLISHED,
+                Post.scheduled_time < cutoff
+            )
+            if dialect == "sqlite":
+                query = query.where(*_keeps_newest_rows())
+            result = await db.execute(
+                query.order_by(Post.scheduled_time).limit(self.batch_size).with_for_update(skip_locked=True)
+            )
+            rows = result.all()
+            if not rows:
+                return 0
+            post_ids = [row.id for row in rows]
+            if dialect == "postgresql":
+                await self._ensure_partitions(db, (month_start(row.scheduled_time) for row in rows))
+
+            # Plain INSERT ... SELECT and DELETE: nothing is loaded into Python
+            for live, archive in CHILD_TABLES:
+                columns = list(live.__table__.columns)
+                await db.execute(insert(archive.__table__).from_select(
+                    [column.name for column in columns],
+                    select(*columns).where(live.post_id.in_(post_ids))
+                ))
+                await db.execute(delete(live.__table__).where(live.__table__.c.post_id.in_(post_ids)))
+            columns = list(Post.__table__.columns)
+            await db.execute(insert(PostArchive.__table__).from_select(
+                [*(column.name for column in columns), "archived_at"],
+                select(*columns, literal(datetime.now(timezone.utc), DateTime(timezone=True))).where(
+                    Post.id.in_(post_ids)
+                )
+            ))
+            await db.execute(delete(Post.__table__).where(Post.__table__.c.id.in_(post_ids)))
+            await db.commit()
+
+        for author_id in {row.author_id for row in rows}:
+            await response_cache.invalidate_user(author_id)
+        self.archived += len(rows)
+        posts_archived.inc(len(rows))
+        self._batch_times.append(time.perf_counter() - started)
+        return len(rows)
+
+    def metrics(self) -> dict:
+        batch_times = sorted(self._batch_times)
+        return {
+            "after_days": self.after_days,
+            "archived": self.archived,
+            "runs": self.runs,
+            "failures": self.failures,
+            "batch_time_p50": batch_times[len(batch_times) // 2] if batch_times else None,
+        }
+
+post_archiver = PostArchiver(
+    after_days=float(os.getenv("ARCHIVE_AFTER_DAYS", "90")),
+    batch_size=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")),
+    interval=float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600")),
+    tablespace=os.getenv("ARCHIVE_TABLESPACE") or None,
+)
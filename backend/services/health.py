@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Tuple
+
+from sqlalchemy import text
+
+from ..database import engine
+from .realtime import realtime_hub
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+@lru_cache(maxsize=None)
+def schema_heads() -> Tuple[str, ...]:
+    """Head revisions of the migration scripts shipped with this build."""
+    # Alembic is only needed once the first readiness probe comes in
+    from alembic.script import ScriptDirectory
+    return tuple(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+
+async def check_database():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def check_schema():
+    async with engine.connect() as conn:
+        revisions = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all()
+    if set(revisions) != set(schema_heads()):
+        raise RuntimeError(
+            f"Database is at revision {', '.join(revisions) or 'none'}, expected {', '.join(schema_heads())}; "
+            "run alembic upgrade head"
+        )
+
+class ReadinessProbe:
+    """Checks whether this instance can serve traffic.
+
+    Each check runs concurrently under its own timeout, so one hung
+    dependency fails the probe instead of stalling it. Slack and OpenAI are
+    deliberately left out: requests that need them already degrade on their
+    own, and a third-party outage should not take every instance out of the
+    load balancer.
+    """
+
+    def __init__(self, checks: Dict[str, Callable[[], Awaitable[None]]], timeout: float = 2.0):
+        self.checks = checks
+        self.timeout = timeout
+
+    async def _run(self, name: str, check: Callable[[], Awaitable[None]]) -> str:
+        try:
+            async with asyncio.timeout(self.timeout):
+                await check()
+            return "ok"
+        except TimeoutError:
+            logger.warning(f"Readiness check {name} timed out after {self.timeout}s")
+            return f"timed out after {self.timeout}s"
+        except Exception as e:
+            logger.warning(f"Readiness check {name} failed: {str(e)}")
+            return str(e).splitlines()[0] if str(e) else type(e).__name__
+
+    async def check(self) -> Tuple[bool, Dict[str, str]]:
+        """Whether every check passed, and each check's outcome."""
+        outcomes = await asyncio.gather(*(self._run(name, check) for name, check in self.checks.items()))
+        results = dict(zip(self.checks, outcomes))
+        return all(outcome == "ok" for outcome in results.values()), results
+
+readiness_probe = ReadinessProbe(
+    {
+        "database": check_database,
+        "schema": check_schema,
+        "response_cache": response_cache.backend.ping,
+        "realtime_broker": realtime_hub.broker.ping,
+    },
+    timeout=float(os.getenv("READINESS_TIMEOUT_SECONDS", "2")),
+)
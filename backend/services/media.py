@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+try:
+    import boto3
+except ImportError:  # optional dependency
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    duplicate: bool
+
+class LocalMediaStore:
+    """Blobs as files under ``root``, keyed by relative path."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._tmp_dir: Optional[str] = None
+
+    @property
+    def tmp_dir(self) -> str:
+        # Created on first upload so importing the app touches no files
+        if self._tmp_dir is None:
+            path = os.path.join(self.root, "tmp")
+            os.makedirs(path, exist_ok=True)
+            self._tmp_dir = path
+        return self._tmp_dir
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.exists(self.path(key))
+
+    async def size(self, key: str) -> int:
+        return (await aiofiles.os.stat(self.path(key))).st_size
+
+    async def put(self, key: str, source: str):
+        """Move the finished temp file ``source`` into place."""
+        dest = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Same filesystem as tmp_dir, so this is an atomic rename
+        await aiofiles.os.replace(source, dest)
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        yield self.path(key)
+
+    async def read_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start`` to ``end`` (inclusive) in chunks."""
+        async with aiofiles.open(self.path(key), "rb") as f:
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def url(self, key: str) -> Optional[str]:
+        # Served by the API, which handles range requests itself
+        return None
+
+class S3MediaStore:
+    """Blobs in an S3-compatible bucket; downloads redirect to presigned URLs,
+    which handle range requests on the storage side. ``read_range`` streams
+    a range through the API instead, with a ranged GET.
+
+    boto3 is blocking, so every call runs in a worker thread.
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, url_ttl: int = 3600):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.url_ttl = url_ttl
+        self._client = None
+        self._tmp_dir: Optional[str] = None
+
+    @property
+    def client(self):
+        # Built on first use so importing the app creates no boto3 session
+        if self._client is None:
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url)
+        return self._client
+
+    @property
+    def tmp_dir(self) -> str:
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix="media-upload-")
+        return self._tmp_dir
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    async def size(self, key: str) -> int:
+        response = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        return response["ContentLength"]
+
+    async def put(self, key: str, source: str):
+        # upload_file switches to multipart uploads for large files
+        await asyncio.to_thread(self.client.upload_file, source, self.bucket, key)
+        await aiofiles.os.remove(source)
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        await asyncio.to_thread(self.client.download_file, self.bucket, key, path)
+        try:
+            yield path
+        finally:
+            await aiofiles.os.remove(path)
+
+    async def read_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start`` to ``end`` (inclusive) in chunks, with a ranged GET."""
+        response = await asyncio.to_thread(
+            self.client.get_object, Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+        )
+        body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    def url(self, key: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=self.url_ttl
+        )
+
+def render_thumbnail(source: str, dest: str, size: int) -> bool:
+    """Write a JPEG of ``source`` fitting in ``size`` x ``size``; runs in a worker process."""
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size))
+            image.convert("RGB").save(dest, "JPEG", quality=85, optimize=True)
+        return True
+    except Exception:
+        return False
+
+class MediaService:
+    """Content-addressed media storage with background thumbnailing.
+
+    Uploads stream to a temp file in ``CHUNK_SIZE`` pieces while being
+    hashed, so memory use does not depend on file size. The file is then
+    stored under its SHA-256; if that blob already exists the upload is a
+    duplicate and the temp file is discarded. Image thumbnails are rendered
+    in a process pool after the response is sent.
+    """
+
+    def __init__(
+        self,
+        store,
+        max_bytes: int = 100 * 1024 * 1024,
+        thumbnail_sizes: Tuple[int, ...] = (256, 1024),
+        thumbnail_workers: int = 2,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.thumbnail_sizes = thumbnail_sizes
+        self.thumbnail_workers = thumbnail_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.uploads = 0
+        self.duplicates = 0
+        self.thumbnails = 0
+        self.thumbnail_failures = 0
+
+    @staticmethod
+    def blob_key(sha256: str) -> str:
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    @staticmethod
+    def thumbnail_key(sha256: str, size: int) -> str:
+        return f"thumbnails/{size}/{sha256[:2]}/{sha256}.jpg"
+
+    async def save(self, chunks: AsyncIterator[bytes]) -> StoredBlob:
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.store.tmp_dir, uuid.uuid4().hex)
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                    hasher.update(chunk)
+                    await f.write(chunk)
+
+            sha256 = hasher.hexdigest()
+            key = self.blob_key(sha256)
+            duplicate = await self.store.exists(key)
+            if duplicate:
+                await aiofiles.os.remove(tmp_path)
+                self.duplicates += 1
+            else:
+                await self.store.put(key, tmp_path)
+            self.uploads += 1
+            return StoredBlob(sha256=sha256, size=size, duplicate=duplicate)
+        except BaseException:
+            # Also on cancellation (client went away), so no awaits here
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def schedule_thumbnails(self, sha256: str, content_type: Optional[str]):
+        """Render missing thumbnails for an image blob without blocking the caller."""
+        if Image is None or not (content_type or "").startswith("image/"):
+            return
+        if sha256 in self._tasks:
+            return
+        # Keyed by blob, so concurrent duplicate uploads render it once; the
+        # reference also keeps the task from being garbage collected
+        task = asyncio.create_task(self._thumbnails(sha256))
+        self._tasks[sha256] = task
+        task.add_done_callback(lambda _: self._tasks.pop(sha256, None))
+
+    async def _thumbnails(self, sha256: str):
+        sizes = [
+            size for size in self.thumbnail_sizes
+            if not await self.store.exists(self.thumbnail_key(sha256, size))
+        ]
+        if not sizes:
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.thumbnail_workers)
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.store.local_file(self.blob_key(sha256)) as source:
+                for size in sizes:
+                    dest = os.path.join(self.store.tmp_dir, uuid.uuid4().hex)
+                    if await loop.run_in_executor(self._pool, render_thumbnail, source, dest, size):
+                        await self.store.put(self.thumbnail_key(sha256, size), dest)
+                        self.thumbnails += 1
+                    else:
+                        self.thumbnail_failures += 1
+                        if await aiofiles.os.path.exists(dest):
+                            await aiofiles.os.remove(dest)
+        except Exception as e:
+            self.thumbnail_failures += 1
+            logger.error(f"Thumbnail generation failed for {sha256}: {str(e)}")
+
+    async def stop(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def metrics(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "duplicates": self.duplicates,
+            "thumbnails": self.thumbnails,
+            "thumbnail_failures": self.thumbnail_failures,
+            "thumbnails_pending": len(self._tasks),
+        }
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single ``bytes=`` range, or None to send the whole body.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        # Multiple ranges are optional to support; the full body is a valid answer
+        return None
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if not start_text:
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - suffix, 0), size - 1
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+    if start >= size or end < start:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, end
+
+def build_media_service() -> MediaService:
+    bucket = os.getenv("MEDIA_S3_BUCKET")
+    if bucket:
+        if boto3 is None:
+            raise RuntimeError("MEDIA_S3_BUCKET is set but the boto3 package is not installed")
+        store = S3MediaStore(bucket, endpoint_url=os.getenv("MEDIA_S3_ENDPOINT_URL"))
+    else:
+        store = LocalMediaStore(os.getenv("MEDIA_ROOT", "./media"))
+    return MediaService(
+        store,
+        max_bytes=int(os.getenv("MEDIA_MAX_BYTES", str(100 * 1024 * 1024))),
+        thumbnail_sizes=tuple(int(size) for size in os.getenv("MEDIA_THUMBNAIL_SIZES", "256,1024").split(",")),
+        thumbnail_workers=int(os.getenv("MEDIA_THUMBNAIL_WORKERS", "2")),
+    )
+
+# Only reads settings: stores create their directories and clients on first use
+media_service = build_media_service()
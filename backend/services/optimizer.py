@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ContentStatus, PlatformType, Post, PostAnalytics
+from .analytics import as_utc, epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+PLATFORMS = list(PlatformType)
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+def hour_of_week(timestamps: np.ndarray) -> np.ndarray:
+    """Hour of the UTC week, Monday 00:00 = 0, of epoch seconds (1970-01-01 was a Thursday)."""
+    return ((timestamps // 3600 + 72) % HOURS_PER_WEEK).astype(np.int64)
+
+def smooth_week(matrix: np.ndarray, sigma: float) -> np.ndarray:
+    """Gaussian blur of each row across hours, wrapping from Sunday night to Monday morning."""
+    if sigma <= 0:
+        return matrix
+    offsets = np.arange(HOURS_PER_WEEK)
+    offsets = np.minimum(offsets, HOURS_PER_WEEK - offsets)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    # Circular convolution via the FFT: one call for every platform row
+    return np.real(np.fft.ifft(np.fft.fft(matrix, axis=-1) * np.fft.fft(kernel), axis=-1))
+
+class EngagementModel:
+    """Engagement of one user's published posts by platform and hour of the week.
+
+    Holds the latest engagement of every post with analytics, so a new
+    snapshot only moves its post's contribution: scores stay current without
+    re-reading the account. Engagement is ``log1p(likes + shares + comments)``
+    so that a single viral post does not decide the best slot.
+    """
+
+    def __init__(self, post_ids, platforms, hours, engagement, observed):
+        self.index: Dict[int, int] = {int(post_id): i for i, post_id in enumerate(post_ids)}
+        self.platforms = np.asarray(platforms, dtype=np.int64)
+        self.hours = np.asarray(hours, dtype=np.int64)
+        self.values = np.log1p(np.asarray(engagement, dtype=np.float64))
+        self.observed = np.asarray(observed, dtype=np.float64)
+        flat = self.platforms * HOURS_PER_WEEK + self.hours
+        size = len(PLATFORMS) * HOURS_PER_WEEK
+        self.sums = np.bincount(flat, weights=self.values, minlength=size).reshape(len(PLATFORMS), HOURS_PER_WEEK)
+        self.counts = np.bincount(flat, minlength=size).reshape(len(PLATFORMS), HOURS_PER_WEEK).astype(np.float64)
+        # post_id -> (engagement, observed_at) for posts not in the index yet
+        self.unknown: Dict[int, Tuple[int, float]] = {}
+        self.built_at = time.time()
+        self._scores: Optional[np.ndarray] = None
+
+    @property
+    def posts(self) -> int:
+        return len(self.index)
+
+    def observe(self, post_id: int, engagement: int, observed_at: float):
+        i = self.index.get(post_id)
+        if i is None:
+            current = self.unknown.get(post_id)
+            if current is None or observed_at >= current[1]:
+                self.unknown[post_id] = (engagement, observed_at)
+            return
+        if observed_at < self.observed[i]:
+            return
+        value = np.log1p(engagement)
+        self.sums[self.platforms[i], self.hours[i]] += value - self.values[i]
+        self.values[i] = value
+        self.observed[i] = observed_at
+        self._scores = None
+
+    def add(self, post_id: int, platform: int, hour: int, engagement: int, observed_at: float):
+        self.index[post_id] = len(self.values)
+        self.platforms = np.append(self.platforms, platform)
+        self.hours = np.append(self.hours, hour)
+        self.values = np.append(self.values, np.log1p(engagement))
+        self.observed = np.append(self.observed, observed_at)
+        self.sums[platform, hour] += self.values[-1]
+        self.counts[platform, hour] += 1
+        self._scores = None
+
+    def scores(self, sigma: float, prior_weight: float) -> np.ndarray:
+        """Expected log engagement per (platform, hour of week).
+
+        Smoothed sums over smoothed counts, shrunk towards a prior: the
+        account's weekly pattern across all platforms, moved to the
+        platform's mean. Hours with one or two posts cannot dominate, and
+        platforms without posts get the account's pattern.
+        """
+        if self._scores is None:
+            total, total_count = self.sums.sum(axis=0, keepdims=True), self.counts.sum(axis=0, keepdims=True)
+            overall_mean = total.sum() / max(total_count.sum(), 1)
+            overall = (
+                (smooth_week(total, sigma) + prior_weight * overall_mean)
+                / (smooth_week(total_count, sigma) + prior_weight)
+            )
+            platform_counts = self.counts.sum(axis=1)
+            means = np.divide(
+                self.sums.sum(axis=1), platform_counts,
+                out=np.full(len(PLATFORMS), overall_mean), where=platform_counts > 0
+            )
+            prior = overall + (means - overall_mean)[:, None]
+            self._scores = (
+                (smooth_week(self.sums, sigma) + prior_weight * prior)
+                / (smooth_week(self.counts, sigma) + prior_weight)
+            )
+        return self._scores
+
+class BestTimeOptimizer:
+    """Proposes posting times from per-user engagement models.
+
+    Models are built from ``post_analytics`` on first use, kept in an LRU of
+    ``cache_size`` users and rebuilt after ``ttl`` seconds; in between, the
+    analytics ingestion endpoint feeds new snapshots in through ``observe``.
+    Snapshots for posts the model has not seen are resolved with one query
+    by id on the next recommendation.
+    """
+
+    def __init__(self, cache_size: int = 1000, ttl: float = 3600, sigma: float = 1.5, prior_weight: float = 3.0):
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.sigma = sigma
+        self.prior_weight = prior_weight
+        self._models: "OrderedDict[int, EngagementModel]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+        self.builds = 0
+        self.hits = 0
+        self.observed = 0
+        self._build_times: List[float] = []
+
+    def observe(self, author_id: int, snapshots: List[dict]):
+        """Apply engagement snapshots (post_id, observed_at and cumulative metrics) to a cached model."""
+        model = self._models.get(author_id)
+        if model is None:
+            return
+        for snapshot in snapshots:
+            model.observe(
+                snapshot["post_id"],
+                snapshot["likes"] + snapshot["shares"] + snapshot["comments"],
+                as_utc(snapshot["observed_at"]).timestamp()
+            )
+        self.observed += len(snapshots)
+
+    async def model(self, db: AsyncSession, author_id: int) -> EngagementModel:
+        model = self._models.get(author_id)
+        if model is not None and time.time() - model.built_at < self.ttl:
+            self._models.move_to_end(author_id)
+            self.hits += 1
+        else:
+            lock = self._locks.setdefault(author_id, asyncio.Lock())
+            async with lock:
+                model = self._models.get(author_id)
+                if model is None or time.time() - model.built_at >= self.ttl:
+                    model = await self._build(db, author_id)
+                    self._models[author_id] = model
+                    while len(self._models) > self.cache_size:
+                        evicted, _ = self._models.popitem(last=False)
+                        self._locks.pop(evicted, None)
+        if model.unknown:
+            await self._resolve_unknown(db, model)
+        return model
+
+    async def _build(self, db: AsyncSession, author_id: int) -> EngagementModel:
+        started = time.perf_counter()
+        dialect = db.bind.dialect.name
+        # A plain Core execution: the ORM's per-row processing costs as much
+        # as the query itself for accounts with many posts
+        connection = await db.connection()
+        result = await connection.execute(
+            select(
+                Post.id,
+                Post.platform,
+                epoch_seconds(Post.published_time, dialect),
+                PostAnalytics.likes + PostAnalytics.shares + PostAnalytics.comments,
+                epoch_seconds(PostAnalytics.updated_at, dialect),
+            )
+            .join(PostAnalytics, PostAnalytics.post_id == Post.id)
+            .where(Post.author_id == author_id, Post.published_time.is_not(None))
+        )
+        rows = result.all()
+        if rows:
+            post_ids, platforms, published, engagement, observed = zip(*rows)
+        else:
+            post_ids = platforms = published = engagement = observed = ()
+        model = EngagementModel(
+            post_ids,
+            [PLATFORMS.index(platform) for platform in platforms],
+            hour_of_week(np.array(published, dtype=np.int64)),
+            [value or 0 for value in engagement],
+            [value or 0 for value in observed],
+        )
+        self.builds += 1
+        self._build_times = self._build_times[-99:] + [time.perf_counter() - started]
+        return model
+
+    async def _resolve_unknown(self, db: AsyncSession, model: EngagementModel):
+        unknown, model.unknown = model.unknown, {}
+        result = await db.execute(
+            select(Post.id, Post.platform, epoch_seconds(Post.published_time, db.bind.dialect.name))
+            .where(Post.id.in_(list(unknown)), Post.published_time.is_not(None))
+        )
+        for post_id, platform, published in result.all():
+            engagement, observed_at = unknown[post_id]
+            model.add(
+                post_id, PLATFORMS.index(platform), int(hour_of_week(np.array([published]))[0]), engagement, observed_at
+            )
+
+    async def heatmap(self, db: AsyncSession, author_id: int, utc_offset_hours: int = 0, top: int = 3) -> dict:
+        """Expected engagement per platform as 7 x 24 (Monday first), shifted to a local UTC offset."""
+        model = await self.model(db, author_id)
+        scores = np.roll(model.scores(self.sigma, self.prior_weight), utc_offset_hours, axis=1)
+        counts = np.roll(model.counts, utc_offset_hours, axis=1)
+        best = np.argsort(-scores, axis=1, kind="stable")[:, :top]
+        return {
+            "posts_analyzed": model.posts,
+            "platforms": {
+                platform: {
+                    "scores": np.expm1(scores[i]).reshape(7, 24).round(3).tolist(),
+                    "posts": counts[i].reshape(7, 24).astype(int).tolist(),
+                    "best_slots": [f"{WEEKDAYS[hour // 24]} {hour % 24:02d}:00" for hour in best[i]],
+                }
+                for i, platform in enumerate(PLATFORMS)
+            },
+        }
+
+    async def recommend(
+        self,
+        db: AsyncSession,
+        author_id: int,
+        drafts: List[Tuple[int, PlatformType]],
+        start: datetime,
+        days: int,
+        min_gap: timedelta,
+    ) -> dict:
+        """A slot for each (post id, platform) draft, in order, at least ``min_gap`` from other posts.
+
+        Slots are whole hours from ``start``. Posts already scheduled on the
+        same platform block the slots around them, and so does each proposal
+        for the drafts before it, so no two posts on a platform end up closer
+        than ``min_gap``.
+        """
+        model = await self.model(db, author_id)
+        scores = model.scores(self.sigma, self.prior_weight)
+
+        first = int(np.ceil(as_utc(start).timestamp() / 3600)) * 3600
+        slot_times = first + np.arange(days * 24, dtype=np.int64) * 3600
+        slot_scores = scores[:, hour_of_week(slot_times)]
+
+        result = await db.execute(
+            select(Post.platform, epoch_seconds(Post.scheduled_time, db.bind.dialect.name)).where(
+                Post.author_id == author_id,
+                Post.status.in_((ContentStatus.SCHEDULED, ContentStatus.PUBLISHED)),
+                Post.scheduled_time >= datetime.fromtimestamp(first, tz=timezone.utc) - min_gap,
+                Post.scheduled_time <= datetime.fromtimestamp(int(slot_times[-1]), tz=timezone.utc) + min_gap
+            )
+        )
+        # Slots closer than the gap collide; the same hour always does
+        gap = max(min_gap.total_seconds(), 1)
+        available = np.ones(slot_scores.shape, dtype=bool)
+
+        def block(platform: int, at: float):
+            low = np.searchsorted(slot_times, at - gap, side="right")
+            high = np.searchsorted(slot_times, at + gap, side="left")
+            available[platform, low:high] = False
+
+        for platform, scheduled in result.all():
+            block(PLATFORMS.index(platform), scheduled)
+
+        proposals = []
+        for post_id, platform in drafts:
+            row = PLATFORMS.index(platform)
+            masked = np.where(available[row], slot_scores[row], -np.inf)
+            best = int(np.argmax(masked))
+            if masked[best] == -np.inf:
+                proposals.append({"post_id": post_id, "platform": platform, "scheduled_time": None, "expected_engagement": None})
+                continue
+            block(row, slot_times[best])
+            proposals.append({
+                "post_id": post_id,
+                "platform": platform,
+                "scheduled_time": datetime.fromtimestamp(int(slot_times[best]), tz=timezone.utc),
+                "expected_engagement": float(np.expm1(masked[best])),
+            })
+        return {"posts_analyzed": model.posts, "proposals": proposals}
+
+    def metrics(self) -> dict:
+        build_times = sorted(self._build_times)
+        return {
+            "cached_users": len(self._models),
+            "builds": self.builds,
+            "hits": self.hits,
+            "observed_snapshots": self.observed,
+            "build_time_p50": build_times[len(build_times) // 2] if build_times else None,
+        }
+
+best_time_optimizer = BestTimeOptimizer(
+    cache_size=int(os.getenv("OPTIMIZER_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("OPTIMIZER_CACHE_TTL_SECONDS", "3600")),
+    sigma=float(os.getenv("OPTIMIZER_SMOOTHING_HOURS", "1.5")),
+    prior_weight=float(os.getenv("OPTIMIZER_PRIOR_WEIGHT", "3")),
+)
@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Protocol
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import TTLCache
+from ..database import SessionLocal
+from ..metrics import outbox_delivery_lag, outbox_events, outbox_oldest_pending_age, outbox_pending
+from ..models import OutboxEvent
+from .response_cache import response_cache
+from .slack_service import slack_service
+
+logger = logging.getLogger(__name__)
+
+POST_CREATED = "post.created"
+POST_UPDATED = "post.updated"
+# Recorded alongside post.updated when an update moves a post to SCHEDULED
+POST_SCHEDULED = "post.scheduled"
+POST_DELETED = "post.deleted"
+POST_PUBLISHED = "post.published"
+POST_FAILED = "post.failed"
+POSTS_BULK_CREATED = "posts.bulk_created"
+POSTS_BULK_STATUS_CHANGED = "posts.bulk_status_changed"
+POSTS_BULK_DELETED = "posts.bulk_deleted"
+
+EVENT_TYPES = (
+    POST_CREATED, POST_UPDATED, POST_SCHEDULED, POST_DELETED, POST_PUBLISHED, POST_FAILED,
+    POSTS_BULK_CREATED, POSTS_BULK_STATUS_CHANGED, POSTS_BULK_DELETED,
+)
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive values; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def post_payload(post) -> dict:
+    """JSON-safe snapshot of a post as it is at the time of the change."""
+    return {
+        "id": post.id,
+        "content": post.content,
+        "platform": post.platform.value,
+        "status": post.status.value,
+        "scheduled_time": post.scheduled_time.isoformat() if post.scheduled_time else None,
+    }
+
+def record_event(
+    db: AsyncSession,
+    event_type: str,
+    author_id: int,
+    post_id: Optional[int] = None,
+    payload: Optional[dict] = None,
+):
+    """Add an event to the caller's transaction; it is only delivered if that commits.
+
+    Call ``outbox_dispatcher.notify()`` after the commit to deliver it right away
+    instead of at the next poll.
+    """
+    db.add(OutboxEvent(
+        idempotency_key=uuid.uuid4().hex,
+        event_type=event_type,
+        author_id=author_id,
+        post_id=post_id,
+        payload=payload or {}
+    ))
+
+@dataclass(frozen=True)
+class Event:
+    key: str
+    type: str
+    author_id: int
+    post_id: Optional[int]
+    payload: dict
+    created_at: datetime
+
+class Consumer(Protocol):
+    """Receives batches of events in commit order.
+
+    Raising makes the dispatcher hand this consumer the whole batch again
+    later, so ``handle`` must tolerate events it has already seen (their
+    ``key`` stays the same). It runs while the batch is claimed, so it
+    should hand events off rather than wait on slow external calls.
+    """
+    name: str
+
+    async def handle(self, events: List[Event]) -> None:
+        ...
+
+class CacheInvalidationConsumer:
+    """Drops the cached post responses of every author with changed posts.
+
+    Request handlers invalidate right after their commit as well, so users
+    read their own writes; this covers changes made outside a request and
+    processes that die between the commit and that call. Repeating an
+    invalidation is harmless.
+    """
+    name = "cache"
+
+    async def handle(self, events: List[Event]) -> None:
+        for author_id in {event.author_id for event in events}:
+            await response_cache.invalidate_user(author_id)
+
+class SlackConsumer:
+    """Queues Slack notifications for post events, at most once per event key per process."""
+    name = "slack"
+
+    def __init__(self, service, dedupe_size: int = 10000):
+        self.service = service
+        self._seen = TTLCache(maxsize=dedupe_size, ttl=24 * 3600)
+
+    async def handle(self, events: List[Event]) -> None:
+        for event in events:
+            if event.key in self._seen:
+                continue
+            if not await self._notify(event):
+                # Slack's queue is full; the dispatcher retries after a backoff
+                raise RuntimeError("Slack notification queue is full")
+            self._seen.set(event.key, True)
+
+    async def _notify(self, event: Event) -> bool:
+        payload = event.payload
+        if event.type in (POST_CREATED, POST_UPDATED):
+            scheduled_time = payload["scheduled_time"]
+            return await self.service.send_post_event({
+                "id": event.post_id,
+                "action": event.type.split(".", 1)[1],
+                "platform": payload["platform"],
+                "status": payload["status"],
+                "scheduled_time": (
+                    datetime.fromisoformat(scheduled_time).strftime("%Y-%m-%d %H:%M:%S")
+                    if scheduled_time else "Not scheduled"
+                ),
+                "content": payload["content"],
+            })
+        if event.type == POST_FAILED:
+            return await self.service.send_error_notification(payload.get("error", "Publishing failed"), event.post_id)
+        if event.type == POSTS_BULK_CREATED:
+            return await self.service.send_bulk_notification("created", payload["count"], payload["platforms"])
+        if event.type == POSTS_BULK_STATUS_CHANGED:
+            return await self.service.send_bulk_notification(f"marked {payload['status']}", payload["count"])
+        if event.type == POSTS_BULK_DELETED:
+            return await self.service.send_bulk_notification("deleted", payload["count"])
+        return True
+
+class OutboxDispatcher:
+    """Delivers outbox events to its consumers in batches, at least once.
+
+    Write paths only add an ``outbox_events`` row to their own transaction
+    (``record_event``), so a change and its event commit or roll back
+    together, and write latency does not grow with the number of
+    integrations. A background task claims up to ``batch_size`` pending
+    events in id order with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+    several workers can drain the table, passes them to every consumer and
+    marks them processed in the same transaction. A consumer that raises
+    gets the batch again after an exponential backoff; the consumers that
+    succeeded are not repeated. Events still failing after ``max_attempts``
+    are marked processed with ``last_error`` set. Processed events are
+    deleted after ``retention`` seconds.
+    """
+
+    def __init__(
+        self,
+        consumers: Optional[List[Consumer]] = None,
+        batch_size: int = 200,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_base: float = 2.0,
+        retry_max: float = 300.0,
+        retention: float = 24 * 3600,
+    ):
+        self.consumers: List[Consumer] = list(consumers or [])
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.retention = retention
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._next_observe = 0.0
+        self._next_purge = 0.0
+
+        self.pending = 0
+        self.oldest_pending_age = 0.0
+        self.delivered = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self._lags = deque(maxlen=1000)
+
+    def register(self, consumer: Consumer):
+        if any(existing.name == consumer.name for existing in self.consumers):
+            raise ValueError(f"Outbox consumer {consumer.name} is already registered")
+        self.consumers.append(consumer)
+
+    def notify(self):
+        """Wake the dispatcher after a commit that recorded events."""
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let an in-progress batch finish; undelivered events stay in the table
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                if await self.dispatch() >= self.batch_size:
+                    continue
+                now = time.monotonic()
+                if now >= self._next_observe:
+                    await self.observe_backlog()
+                    self._next_observe = now + self.poll_interval
+                if now >= self._next_purge:
+                    await self.purge()
+                    self._next_purge = now + min(self.retention, 3600)
+            except Exception as e:
+                logger.error(f"Outbox dispatcher error: {str(e)}", exc_info=True)
+            if self._stopping:
+                break
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    @staticmethod
+    def _event(row: OutboxEvent) -> Event:
+        return Event(
+            key=row.idempotency_key,
+            type=row.event_type,
+            author_id=row.author_id,
+            post_id=row.post_id,
+            payload=row.payload,
+            created_at=_as_utc(row.created_at)
+        )
+
+    async def dispatch(self) -> int:
+        """Deliver one batch of due events; returns how many were claimed."""
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(OutboxEvent).where(
+                    OutboxEvent.processed_at.is_(None),
+                    OutboxEvent.available_at <= datetime.now(timezone.utc)
+                ).order_by(OutboxEvent.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+            events = [self._event(row) for row in rows]
+
+            failures: Dict[str, str] = {}
+            for consumer in self.consumers:
+                owed = [
+                    event for row, event in zip(rows, events)
+                    if row.pending_consumers is None or consumer.name in row.pending_consumers
+                ]
+                if not owed:
+                    continue
+                try:
+                    await consumer.handle(owed)
+                except Exception as e:
+                    failures[consumer.name] = f"{consumer.name}: {str(e)}"
+                    logger.error(f"Outbox consumer {consumer.name} failed on {len(owed)} events: {str(e)}")
+
+            now = datetime.now(timezone.utc)
+            for row, event in zip(rows, events):
+                failed = [
+                    name for name in failures
+                    if row.pending_consumers is None or name in row.pending_consumers
+                ]
+                if not failed:
+                    row.processed_at = now
+                    row.pending_consumers = None
+                    lag = (now - event.created_at).total_seconds()
+                    self._lags.append(lag)
+                    outbox_delivery_lag.observe(lag)
+                    outbox_events.inc(event_type=row.event_type, outcome="delivered")
+                    self.delivered += 1
+                    continue
+                row.attempts += 1
+                row.last_error = "; ".join(failures[name] for name in failed)
+                if row.attempts >= self.max_attempts:
+                    row.processed_at = now
+                    outbox_events.inc(event_type=row.event_type, outcome="dead_lettered")
+                    self.dead_lettered += 1
+                    logger.error(f"Giving up on outbox event {row.id} after {row.attempts} attempts: {row.last_error}")
+                else:
+                    row.pending_consumers = failed
+                    backoff = min(self.retry_base * 2 ** (row.attempts - 1), self.retry_max)
+                    row.available_at = now + timedelta(seconds=backoff)
+                    outbox_events.inc(event_type=row.event_type, outcome="retried")
+                    self.retried += 1
+            await db.commit()
+        return len(rows)
+
+    async def observe_backlog(self):
+        """Refresh the pending count and the age of the oldest pending event."""
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(func.count(), func.min(OutboxEvent.created_at)).where(OutboxEvent.processed_at.is_(None))
+            )
+            count, oldest = result.one()
+        self.pending = count
+        self.oldest_pending_age = (
+            (datetime.now(timezone.utc) - _as_utc(oldest)).total_seconds() if oldest else 0.0
+        )
+        outbox_pending.set(self.pending)
+        outbox_oldest_pending_age.set(self.oldest_pending_age)
+
+    async def purge(self) -> int:
+        """Delete events processed more than ``retention`` seconds ago."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        async with SessionLocal() as db:
+            result = await db.execute(delete(OutboxEvent).where(OutboxEvent.processed_at < cutoff))
+            await db.commit()
+        return result.rowcount
+
+    def metrics(self) -> dict:
+        lags = sorted(self._lags)
+        return {
+            "consumers": [consumer.name for consumer in self.consumers],
+            "pending": self.pending,
+            "oldest_pending_seconds": self.oldest_pending_age,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "delivery_lag_p50": lags[len(lags) // 2] if lags else None,
+            "delivery_lag_p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else None,
+        }
+
+outbox_dispatcher = OutboxDispatcher(
+    consumers=[CacheInvalidationConsumer(), SlackConsumer(slack_service)],
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "200")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_SECONDS", "1")),
+    max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+    retention=float(os.getenv("OUTBOX_RETENTION_HOURS", "24")) * 3600,
+)
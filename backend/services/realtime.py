@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Set
+
+from ..metrics import realtime_connections, realtime_messages
+from .outbox import Event
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the events a slow client missed; it should refetch what it shows
+RESYNC = json.dumps({"type": "resync"}, separators=(",", ":"))
+
+def event_message(event: Event) -> str:
+    """The JSON text sent to clients for an outbox event."""
+    return json.dumps({
+        "id": event.key,
+        "type": event.type,
+        "post_id": event.post_id,
+        "created_at": event.created_at.isoformat(),
+        "data": event.payload,
+    }, separators=(",", ":"))
+
+class MemoryBroker:
+    """Hands published messages straight to this process' hub; for a single worker and tests."""
+
+    def __init__(self):
+        self._handler: Optional[Callable[[bytes], None]] = None
+
+    async def start(self, handler: Callable[[bytes], None], on_reconnect: Optional[Callable[[], None]] = None):
+        self._handler = handler
+
+    async def publish(self, message: bytes):
+        if self._handler is not None:
+            self._handler(message)
+
+    async def stop(self):
+        self._handler = None
+
+    async def ping(self):
+        pass
+
+class RedisBroker:
+    """Redis pub/sub on one channel, so every worker sees every event.
+
+    Workers drop messages for users with no connection to them, which is
+    cheaper than subscribing and unsubscribing per user as clients come and
+    go. Messages published while a worker is disconnected from Redis are
+    lost; its clients get a resync once the subscription is back.
+    """
+
+    def __init__(self, client, channel: str = "realtime:events", reconnect_delay: float = 1.0):
+        self.client = client
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Callable[[bytes], None], on_reconnect: Optional[Callable[[], None]] = None):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(handler, on_reconnect))
+
+    async def _listen(self, handler: Callable[[bytes], None], on_reconnect: Optional[Callable[[], None]]):
+        connected_before = False
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if connected_before and on_reconnect is not None:
+                        on_reconnect()
+                    connected_before = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            handler(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Realtime broker subscription failed: {str(e)}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def publish(self, message: bytes):
+        await self.client.publish(self.channel, message)
+
+    async def ping(self):
+        await self.client.ping()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class Subscription:
+    """One client connection's pending messages.
+
+    Holds at most ``max_pending`` messages. When a client reads too slowly
+    to keep up, its backlog is replaced by a single resync message rather
+    than growing without bound or slowing down delivery to everyone else.
+    """
+    __slots__ = ("user_id", "max_pending", "dropped", "closed", "_pending", "_wakeup")
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.closed = False
+        self._pending: List[str] = []
+        self._wakeup = asyncio.Event()
+
+    def push(self, message: str) -> bool:
+        """Queue a message; returns False if it overflowed the backlog."""
+        overflowed = len(self._pending) >= self.max_pending
+        if overflowed:
+            self.dropped += len(self._pending)
+            self._pending = []
+            message = RESYNC
+        self._pending.append(message)
+        self._wakeup.set()
+        return not overflowed
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def next(self, timeout: Optional[float] = None) -> List[str]:
+        """Wait up to ``timeout`` seconds for messages and take all of them.
+
+        Returns an empty list on timeout or once the subscription is closed.
+        """
+        if not self._pending and not self.closed:
+            # Unlike wait_for, no extra task per idle connection
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+        self._wakeup.clear()
+        messages, self._pending = self._pending, []
+        return messages
+
+class TooManyConnections(Exception):
+    pass
+
+class RealtimeHub:
+    """Pushes post events to the connected clients of their author.
+
+    Registered as an outbox consumer: each event is serialized once and
+    published to the broker, and every worker's hub hands it to that
+    author's subscriptions in this process. Publishing happens while the
+    outbox batch is claimed, so a broker failure makes the dispatcher retry
+    the batch; clients may see an event twice and can dedupe on ``id``.
+    """
+    name = "realtime"
+
+    def __init__(
+        self,
+        broker=None,
+        max_pending: int = 100,
+        max_per_user: int = 20,
+        heartbeat: float = 15.0,
+        send_timeout: float = 10.0,
+    ):
+        self.broker = broker or MemoryBroker()
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self.heartbeat = heartbeat
+        self.send_timeout = send_timeout
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._started = False
+
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    async def start(self):
+        if not self._started:
+            self._started = True
+            await self.broker.start(self._receive, on_reconnect=self.resync_all)
+
+    async def stop(self):
+        if self._started:
+            self._started = False
+            await self.broker.stop()
+            for subscriptions in list(self._subscriptions.values()):
+                for subscription in list(subscriptions):
+                    subscription.close()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscriptions = self._subscriptions.setdefault(user_id, set())
+        if len(subscriptions) >= self.max_per_user:
+            raise TooManyConnections(f"At most {self.max_per_user} live connections per user")
+        subscription = Subscription(user_id, self.max_pending)
+        subscriptions.add(subscription)
+        self.connections += 1
+        realtime_connections.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+        subscription.close()
+        self.connections -= 1
+        realtime_connections.dec()
+
+    async def handle(self, events: List[Event]) -> None:
+        for event in events:
+            await self.broker.publish(f"{event.author_id}\n{event_message(event)}".encode())
+            self.published += 1
+
+    def _receive(self, message: bytes):
+        user_id, _, body = message.partition(b"\n")
+        subscriptions = self._subscriptions.get(int(user_id))
+        if not subscriptions:
+            return
+        text = body.decode()
+        queued = 0
+        for subscription in subscriptions:
+            if subscription.push(text):
+                queued += 1
+            else:
+                self.overflows += 1
+                realtime_messages.inc(outcome="overflow")
+        self.delivered += queued
+        realtime_messages.inc(queued, outcome="queued")
+
+    def resync_all(self):
+        """Tell every client to refetch, after events may have been missed."""
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.push(RESYNC)
+
+    def metrics(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "connections": self.connections,
+            "users": len(self._subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+def build_realtime_hub() -> RealtimeHub:
+    options = dict(
+        max_pending=int(os.getenv("REALTIME_MAX_PENDING", "100")),
+        max_per_user=int(os.getenv("REALTIME_MAX_CONNECTIONS_PER_USER", "20")),
+        heartbeat=float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "15")),
+        send_timeout=float(os.getenv("REALTIME_SEND_TIMEOUT_SECONDS", "10")),
+    )
+    redis_url = os.getenv("REALTIME_REDIS_URL")
+    if redis_url:
+        if redis is None:
+            raise RuntimeError("REALTIME_REDIS_URL is set but the redis package is not installed")
+        return RealtimeHub(RedisBroker(redis.from_url(redis_url)), **options)
+    return RealtimeHub(MemoryBroker(), **options)
+
+realtime_hub = build_realtime_hub()
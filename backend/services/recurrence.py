@@ -0,0 +1,182 @@
+import itertools
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import HOURLY, rrule, rrulestr
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ContentStatus, Post, PostSeries
+from .outbox import POST_CREATED, post_payload, record_event
+from .reports import apply_rollup_deltas, rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+# Rules with COUNT or UNTIL are walked to their end once, on save, to find ends_at;
+# longer ones are treated as endless
+MAX_FINITE_OCCURRENCES = 100000
+
+class RecurrenceError(ValueError):
+    """The recurrence rule or time zone of a series is invalid."""
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def get_zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise RecurrenceError(f"Unknown timezone: {name}")
+
+@lru_cache(maxsize=1024)
+def build_rule(rule: str, dtstart: datetime, tz: str) -> rrule:
+    """Parse an RRULE for a series starting at ``dtstart``.
+
+    Expansion runs on local time in ``tz``, so a 09:00 post stays at 09:00
+    across daylight saving changes.
+    """
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    if not rule or any(char in rule for char in ":\r\n"):
+        raise RecurrenceError("Expected the properties of a single RRULE, e.g. FREQ=WEEKLY;BYDAY=MO")
+    try:
+        parsed = rrulestr(rule, dtstart=as_utc(dtstart).astimezone(get_zone(tz)))
+    except (ValueError, TypeError) as e:
+        raise RecurrenceError(f"Invalid recurrence rule: {e}")
+    # MINUTELY and SECONDLY rules would flood the calendar
+    if parsed._freq > HOURLY:
+        raise RecurrenceError("Series may repeat at most hourly")
+    return parsed
+
+def last_occurrence(rule: str, dtstart: datetime, tz: str) -> Optional[datetime]:
+    """The final occurrence of a rule with COUNT or UNTIL, or None if it never ends."""
+    parsed = build_rule(rule, dtstart, tz)
+    if "COUNT=" not in rule.upper() and "UNTIL=" not in rule.upper():
+        return None
+    last, seen = None, 0
+    for last in itertools.islice(parsed, MAX_FINITE_OCCURRENCES + 1):
+        seen += 1
+    if seen > MAX_FINITE_OCCURRENCES:
+        return None
+    return as_utc(last) if last else as_utc(dtstart)
+
+def _expansion(series: PostSeries) -> rrule:
+    # Restarting a rule at one of its own occurrences yields the same later
+    # occurrences, except that it would reset a COUNT
+    start = series.dtstart
+    if series.expand_from and "COUNT=" not in series.rrule.upper():
+        start = series.expand_from
+    return build_rule(series.rrule, as_utc(start), series.timezone)
+
+def advance_expansion(series: PostSeries, through: datetime):
+    """Move ``expand_from`` up to the last occurrence at or before ``through``."""
+    if "COUNT=" in series.rrule.upper():
+        return
+    last = _expansion(series).before(through, inc=True)
+    # A wall time skipped by a DST change does not survive the round trip
+    # through UTC, and would shift every later occurrence
+    if last and as_utc(last).astimezone(last.tzinfo).replace(tzinfo=None) == last.replace(tzinfo=None):
+        series.expand_from = as_utc(last)
+
+def occurrences(series: PostSeries, after: datetime, until: datetime) -> List[datetime]:
+    """UTC times of the series' occurrences in ``(after, until]`` that have no ``Post`` yet.
+
+    That excludes everything up to ``materialized_through`` and skipped occurrences.
+    """
+    after = max(as_utc(after), as_utc(series.materialized_through))
+    until = as_utc(until)
+    if until <= after or (series.ends_at and as_utc(series.ends_at) <= after):
+        return []
+    skipped = {as_utc(datetime.fromisoformat(value)) for value in series.exdates or ()}
+    return [
+        time for time in map(as_utc, _expansion(series).between(after, until, inc=True))
+        if after < time <= until and time not in skipped
+    ]
+
+def is_occurrence(series: PostSeries, when: datetime) -> bool:
+    when = as_utc(when)
+    return any(as_utc(time) == when for time in _expansion(series).between(when, when, inc=True))
+
+async def author_occurrences(
+    db: AsyncSession, author_id: int, after: datetime, until: datetime
+) -> List[Tuple[PostSeries, datetime]]:
+    """Unmaterialized occurrences of the author's active series in ``(after, until]``, by time."""
+    result = await db.execute(
+        select(PostSeries).where(
+            PostSeries.author_id == author_id,
+            PostSeries.is_active.is_(True),
+            PostSeries.dtstart <= until,
+            PostSeries.materialized_through < until,
+            or_(PostSeries.ends_at.is_(None), PostSeries.ends_at > after)
+        )
+    )
+    found = []
+    for series in result.scalars().all():
+        try:
+            found.extend((series, time) for time in occurrences(series, after, until))
+        except RecurrenceError as e:
+            logger.error(f"Skipping series {series.id}: {str(e)}")
+    found.sort(key=lambda item: (item[1], item[0].id))
+    return found
+
+async def materialize(db: AsyncSession, series_rows: List[PostSeries], through: datetime) -> List[Post]:
+    """Create SCHEDULED posts for the occurrences of ``series_rows`` due up to ``through``.
+
+    Advances each series' ``materialized_through``, in the caller's transaction.
+    """
+    posts = []
+    for series in series_rows:
+        try:
+            times = occurrences(series, series.materialized_through, through)
+            advance_expansion(series, through)
+        except RecurrenceError as e:
+            # Rules are validated on save; only a tzdata change could get here
+            logger.error(f"Deactivating series {series.id}: {str(e)}")
+            series.is_active = False
+            continue
+        posts.extend(
+            Post(
+                content=series.content,
+                platform=series.platform,
+                status=ContentStatus.SCHEDULED,
+                scheduled_time=time,
+                author_id=series.author_id,
+                series_id=series.id,
+                series_occurrence=time,
+            )
+            for time in times
+        )
+        if as_utc(series.materialized_through) < through:
+            series.materialized_through = through
+    if posts:
+        db.add_all(posts)
+        await db.flush()
+        await apply_rollup_deltas(db, rollup_deltas(added=posts))
+        for post in posts:
+            record_event(db, POST_CREATED, post.author_id, post.id, {**post_payload(post), "series_id": post.series_id})
+    return posts
+
+async def materialize_due(db: AsyncSession, through: datetime, batch_size: int = 100) -> Tuple[int, List[Post]]:
+    """Materialize up to ``batch_size`` series with occurrences due up to ``through``.
+
+    Series are claimed with ``FOR UPDATE SKIP LOCKED``, so concurrent workers
+    never materialize the same occurrence; the unique index on
+    ``(series_id, series_occurrence)`` backs that up. Returns the number of
+    series claimed and the posts created.
+    """
+    result = await db.execute(
+        select(PostSeries).where(
+            PostSeries.is_active.is_(True),
+            PostSeries.materialized_through < through,
+            PostSeries.dtstart <= through,
+            or_(PostSeries.ends_at.is_(None), PostSeries.ends_at > PostSeries.materialized_through)
+        ).order_by(PostSeries.materialized_through).limit(batch_size).with_for_update(skip_locked=True)
+    )
+    series_rows = result.scalars().all()
+    return len(series_rows), await materialize(db, series_rows, through)
@@ -0,0 +1,103 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PostDailyRollup
+
+# Rollup bucket for posts without a scheduled_time (the key columns are NOT NULL)
+UNSCHEDULED_DAY = date(1970, 1, 1)
+
+RollupKey = Tuple[int, date, object, object]
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite returns naive values; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def rollup_day(scheduled_time: Optional[datetime]) -> date:
+    if scheduled_time is None:
+        return UNSCHEDULED_DAY
+    return as_utc(scheduled_time).date()
+
+def rollup_key(post) -> RollupKey:
+    """Bucket of a post, or of a row/dict with author_id, scheduled_time, platform and status."""
+    if isinstance(post, dict):
+        return (post["author_id"], rollup_day(post.get("scheduled_time")), post["platform"], post["status"])
+    return (post.author_id, rollup_day(post.scheduled_time), post.platform, post.status)
+
+def rollup_deltas(added: Iterable = (), removed: Iterable = ()) -> Counter:
+    deltas = Counter()
+    for post in added:
+        deltas[rollup_key(post)] += 1
+    for post in removed:
+        deltas[rollup_key(post)] -= 1
+    return deltas
+
+async def apply_rollup_deltas(db: AsyncSession, deltas: Counter):
+    """Add ``deltas`` to the rollup counts inside the caller's transaction."""
+    rows = [
+        {"author_id": author_id, "day": day, "platform": platform, "status": status, "count": delta}
+        for (author_id, day, platform, status), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(PostDailyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["author_id", "day", "platform", "status"],
+        set_={"count": PostDailyRollup.count + stmt.excluded["count"]}
+    )
+    await db.execute(stmt)
+
+async def build_report(db: AsyncSession, author_id: int, start: Optional[date], end: Optional[date]) -> dict:
+    """Counts by platform, status, day and week from the rollup table.
+
+    The cost depends on the number of (day, platform, status) buckets in the
+    range, not on how many posts the account has.
+    """
+    query = select(
+        PostDailyRollup.day,
+        PostDailyRollup.platform,
+        PostDailyRollup.status,
+        func.sum(PostDailyRollup.count)
+    ).where(PostDailyRollup.author_id == author_id)
+    if start or end:
+        # A date range only makes sense for scheduled posts
+        query = query.where(PostDailyRollup.day != UNSCHEDULED_DAY)
+    if start:
+        query = query.where(PostDailyRollup.day >= start)
+    if end:
+        query = query.where(PostDailyRollup.day <= end)
+    query = query.group_by(
+        PostDailyRollup.day, PostDailyRollup.platform, PostDailyRollup.status
+    ).having(func.sum(PostDailyRollup.count) > 0)
+
+    result = await db.execute(query)
+
+    total = 0
+    by_platform, by_status, by_day, by_week = Counter(), Counter(), Counter(), Counter()
+    unscheduled = 0
+    for day, platform, status, count in result.all():
+        total += count
+        by_platform[platform.value] += count
+        by_status[status.value] += count
+        if day == UNSCHEDULED_DAY:
+            unscheduled += count
+            continue
+        by_day[day] += count
+        by_week[day - timedelta(days=day.weekday())] += count
+
+    return {
+        "total": total,
+        "unscheduled": unscheduled,
+        "by_platform": dict(by_platform),
+        "by_status": dict(by_status),
+        "by_day": [{"date": day, "count": count} for day, count in sorted(by_day.items())],
+        "by_week": [{"week_start": week, "count": count} for week, count in sorted(by_week.items())],
+    }
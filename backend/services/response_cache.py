@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import math
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from ..cache import TTLCache
+from ..database import DB_REPLICA_MAX_LAG_SECONDS
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """In-process LRU storage; each worker keeps its own copy."""
+
+    def __init__(self, maxsize: int = 10000):
+        self._entries = TTLCache(maxsize=maxsize)
+        # Versions must never be evicted, or stale entries could become visible again
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key, count=False)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key)
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        return self._versions[key]
+
+    async def ping(self):
+        pass
+
+class RedisBackend:
+    """Shared storage on any client speaking the redis.asyncio API."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def get_version(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def ping(self):
+        await self.client.ping()
+
+class ResponseCache:
+    """Caches serialized post responses per user, with ETag support.
+
+    Every key carries the user's current version: list responses add the
+    query string, single-post responses the post id. Any write by that user
+    (``invalidate_user``) bumps the version and so makes all of them
+    unreachable at once. The version is read before the response is built,
+    so a read that loaded data just before a concurrent write committed
+    stores it under the old version, where nobody finds it. Backend errors
+    are logged and treated as misses.
+
+    The memory backend is per process; with several workers an invalidation
+    would only reach one of them, so multi-worker deployments must set
+    ``CACHE_REDIS_URL`` (``build_response_cache`` enforces this).
+
+    Responses built from a read replica are kept for at most ``replica_ttl``
+    seconds: a replica that was behind may have missed a write whose
+    invalidation already happened, and must not pin that for the full ``ttl``.
+    """
+
+    def __init__(self, backend, ttl: int = 300, replica_ttl: Optional[int] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.replica_ttl = min(ttl, replica_ttl) if replica_ttl is not None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"posts:version:{user_id}"
+
+    async def list_key(self, user_id: int, request: Request) -> str:
+        version = await self.backend.get_version(self._version_key(user_id))
+        query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+        return f"posts:list:{user_id}:{version}:{request.url.path}?{query}"
+
+    async def item_key(self, user_id: int, post_id: int) -> str:
+        version = await self.backend.get_version(self._version_key(user_id))
+        return f"posts:item:{user_id}:{version}:{post_id}"
+
+    async def invalidate_user(self, user_id: int):
+        try:
+            await self.backend.incr(self._version_key(user_id))
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed: {str(e)}")
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]],
+    ) -> Response:
+        """Serve ``key`` from cache, or call ``build`` for (JSON body, headers) and store it."""
+        cached = None
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+
+        if cached is not None:
+            self.hits += 1
+            header_line, body = cached.split(b"\n", 1)
+            headers = dict(
+                item.split("=", 1) for item in header_line.decode().split("\t") if item
+            )
+        else:
+            self.misses += 1
+            body, headers = await build()
+            headers = {**headers, "ETag": f'"{hashlib.sha1(body).hexdigest()}"'}
+            entry = "\t".join(f"{name}={value}" for name, value in headers.items()).encode() + b"\n" + body
+            ttl = self.replica_ttl if getattr(request.state, "read_replica", None) else self.ttl
+            try:
+                await self.backend.set(key, entry, ttl)
+            except Exception as e:
+                logger.error(f"Response cache write failed: {str(e)}")
+
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def build_response_cache() -> ResponseCache:
+    ttl = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    replica_ttl = max(1, math.ceil(DB_REPLICA_MAX_LAG_SECONDS))
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    if redis_url:
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        return ResponseCache(RedisBackend(redis.from_url(redis_url)), ttl=ttl, replica_ttl=replica_ttl)
+    # uvicorn and gunicorn both take their worker count from WEB_CONCURRENCY
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise RuntimeError("CACHE_REDIS_URL must be set with more than one worker (WEB_CONCURRENCY)")
+    return ResponseCache(
+        MemoryBackend(int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))), ttl=ttl, replica_ttl=replica_ttl
+    )
+
+response_cache = build_response_cache()
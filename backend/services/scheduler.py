@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Protocol
+
+from sqlalchemy import select
+
+from ..database import SessionLocal
+from ..models import ContentStatus, Post
+from .outbox import POST_FAILED, POST_PUBLISHED, outbox_dispatcher, post_payload, record_event
+from .recurrence import materialize_due
+from .reports import apply_rollup_deltas, rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+class Publisher(Protocol):
+    """Pushes a post to its platform; raising marks the post as FAILED."""
+
+    async def publish(self, post: Post) -> None:
+        ...
+
+class LogPublisher:
+    """Default publisher until real platform integrations exist: only logs."""
+
+    async def publish(self, post: Post) -> None:
+        logger.info(f"Publishing post {post.id} to {post.platform.value}")
+
+def _timestamp(value: datetime) -> float:
+    # SQLite hands back naive datetimes; everything is stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class PostScheduler:
+    """Publishes SCHEDULED posts once their ``scheduled_time`` has passed.
+
+    Only posts due within ``lookahead`` seconds are kept in memory, in a
+    min-heap keyed by due time. The window is refilled with an indexed range
+    query on ``(status, scheduled_time)`` every ``refill_interval`` seconds,
+    which also picks up posts scheduled by other workers, so the table is
+    never scanned as a whole. Due posts are claimed with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` so that concurrent workers publish
+    each post exactly once.
+
+    Each refill first materializes the occurrences of recurring series due
+    within ``materialize_ahead`` seconds as SCHEDULED posts; later ones stay
+    virtual and are expanded on demand by the calendar.
+    """
+
+    def __init__(
+        self,
+        publisher: Optional[Publisher] = None,
+        batch_size: int = 100,
+        lookahead: float = 900,
+        refill_interval: float = 60,
+        materialize_ahead: float = 3600,
+    ):
+        self.publisher = publisher or LogPublisher()
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.refill_interval = refill_interval
+        # Never shorter than the lookahead, or due occurrences would miss the window
+        self.materialize_ahead = max(materialize_ahead, lookahead)
+        self._heap: List[tuple] = []
+        # post_id -> due timestamp; heap entries that disagree with it are stale
+        self._due: Dict[int, float] = {}
+        self._horizon = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._due)
+
+    async def start(self):
+        # The first refill runs in the loop, so startup never waits on the
+        # database and retries until it is reachable
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def track(self, post: Post):
+        """Keep the in-memory schedule in step with a created or updated post."""
+        if post.status != ContentStatus.SCHEDULED or post.scheduled_time is None:
+            self.untrack(post.id)
+            return
+        due = _timestamp(post.scheduled_time)
+        if due > self._horizon:
+            # Beyond the loaded window; a later refill will pick it up
+            self.untrack(post.id)
+            return
+        self._push(post.id, due)
+
+    def untrack(self, post_id: int):
+        self._due.pop(post_id, None)
+
+    def _push(self, post_id: int, due: float):
+        if self._due.get(post_id) == due:
+            return
+        self._due[post_id] = due
+        heapq.heappush(self._heap, (due, post_id))
+        if self._heap[0] == (due, post_id):
+            self._wakeup.set()
+
+    def materialize_through(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.materialize_ahead)
+
+    async def materialize(self, now: datetime) -> int:
+        """Turn series occurrences due within ``materialize_ahead`` into posts."""
+        through = self.materialize_through(now)
+        created = 0
+        while True:
+            async with SessionLocal() as db:
+                claimed, posts = await materialize_due(db, through, self.batch_size)
+                await db.commit()
+            created += len(posts)
+            if posts:
+                outbox_dispatcher.notify()
+            if claimed < self.batch_size:
+                return created
+
+    async def refill(self):
+        """Load every SCHEDULED post due before the new lookahead horizon."""
+        now = datetime.now(timezone.utc)
+        await self.materialize(now)
+        horizon = now + timedelta(seconds=self.lookahead)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Post.id, Post.scheduled_time).where(
+                    Post.status == ContentStatus.SCHEDULED,
+                    Post.scheduled_time <= horizon
+                )
+            )
+            rows = result.all()
+        self._horizon = horizon.timestamp()
+        for post_id, scheduled_time in rows:
+            self._push(post_id, _timestamp(scheduled_time))
+
+    def _pop_due(self, now: float) -> List[int]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+            due, post_id = heapq.heappop(self._heap)
+            if self._due.get(post_id) == due:
+                del self._due[post_id]
+                batch.append(post_id)
+        return batch
+
+    async def dispatch(self, post_ids: List[int]) -> int:
+        """Claim and publish a batch of posts; returns how many were published."""
+        now = datetime.now(timezone.utc)
+        published = 0
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Post).where(
+                    Post.id.in_(post_ids),
+                    Post.status == ContentStatus.SCHEDULED,
+                    Post.scheduled_time <= now
+                ).with_for_update(skip_locked=True)
+            )
+            posts = result.scalars().all()
+            deltas = rollup_deltas(removed=posts)
+            for post in posts:
+                try:
+                    await self.publisher.publish(post)
+                except Exception as e:
+                    logger.error(f"Failed to publish post {post.id}: {str(e)}")
+                    post.status = ContentStatus.FAILED
+                    record_event(db, POST_FAILED, post.author_id, post.id, {
+                        **post_payload(post), "error": f"Failed to publish post: {str(e)}"
+                    })
+                    continue
+                post.status = ContentStatus.PUBLISHED
+                post.published_time = now
+                record_event(db, POST_PUBLISHED, post.author_id, post.id, post_payload(post))
+                published += 1
+            deltas.update(rollup_deltas(added=posts))
+            await apply_rollup_deltas(db, deltas)
+            await db.commit()
+        if posts:
+            # The outbox's cache consumer drops the authors' cached responses
+            outbox_dispatcher.notify()
+        return published
+
+    async def _run(self):
+        next_refill = 0.0
+        while True:
+            try:
+                now = time.time()
+                if now >= next_refill:
+                    await self.refill()
+                    next_refill = now + self.refill_interval
+                batch = self._pop_due(now)
+                if batch:
+                    await self.dispatch(batch)
+                    continue
+                deadline = next_refill
+                if self._heap:
+                    deadline = min(deadline, self._heap[0][0])
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(deadline - time.time(), 0))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler loop error: {str(e)}", exc_info=True)
+                await asyncio.sleep(1)
+
+post_scheduler = PostScheduler(
+    batch_size=int(os.getenv("SCHEDULER_BATCH_SIZE", "100")),
+    lookahead=float(os.getenv("SCHEDULER_LOOKAHEAD_SECONDS", "900")),
+    refill_interval=float(os.getenv("SCHEDULER_REFILL_SECONDS", "60")),
+    materialize_ahead=float(os.getenv("SERIES_MATERIALIZE_AHEAD_SECONDS", "3600")),
+)
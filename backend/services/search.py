@@ -0,0 +1,131 @@
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ContentStatus, PlatformType, Post
+
+MAX_QUERY_TERMS = 16
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# SQLite: an external-content FTS5 table over posts.content, kept in sync by
+# triggers. author_id is indexed too, so a user's matches are found by
+# intersecting two posting lists instead of filtering every match. Batch
+# migrations that recreate ``posts`` drop these triggers and must recreate them.
+SQLITE_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        content, author_id,
+        content='posts', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, content, author_id) VALUES (new.id, new.content, new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, content, author_id) VALUES ('delete', old.id, old.content, old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF content, author_id ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, content, author_id) VALUES ('delete', old.id, old.content, old.author_id);
+        INSERT INTO posts_fts(rowid, content, author_id) VALUES (new.id, new.content, new.author_id);
+    END
+    """,
+)
+
+# PostgreSQL: a generated tsvector column, so every write path keeps it current, with a GIN index
+POSTGRES_DDL = (
+    """
+    ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector)",
+)
+
+# Databases built with create_all rather than migrations get the index as well
+for _statement in SQLITE_DDL:
+    event.listen(Post.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_DDL:
+    event.listen(Post.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+def search_terms(query: str) -> List[str]:
+    """Words of a free-text query; operators and punctuation are dropped, so any input is safe.
+
+    A trailing ``*`` is kept on the last word, which then also matches as a prefix.
+    """
+    terms = re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+    if terms and query.rstrip().endswith("*"):
+        terms[-1] += "*"
+    return terms
+
+def _sqlite_match(author_id: int, terms: List[str]) -> str:
+    # Every term must match. Prefix matching merges the posting lists of every
+    # word it covers, which is why it is opt-in rather than applied to the last word
+    phrases = [f'"{term[:-1]}"*' if term.endswith("*") else f'"{term}"' for term in terms]
+    return f'author_id : "{author_id}" AND content : ({" ".join(phrases)})'
+
+def _postgres_tsquery(terms: List[str]) -> str:
+    return " & ".join(f"{term[:-1]}:*" if term.endswith("*") else term for term in terms)
+
+async def search_posts(
+    db: AsyncSession,
+    author_id: int,
+    terms: List[str],
+    platform: Optional[PlatformType] = None,
+    status: Optional[ContentStatus] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Tuple[int, float, str]]:
+    """(post id, score, highlighted excerpt) for the best matches, best first.
+
+    Scores are BM25 on SQLite and ``ts_rank_cd`` on PostgreSQL; higher is
+    better, but they are only comparable within one result list. Excerpts
+    wrap matches in ``<mark>`` and are not HTML-escaped.
+    """
+    filters = ""
+    params = {"limit": limit, "offset": offset}
+    if platform:
+        filters += " AND posts.platform = :platform"
+        params["platform"] = platform.name
+    if status:
+        filters += " AND posts.status = :status"
+        params["status"] = status.name
+
+    if db.bind.dialect.name == "postgresql":
+        # Headlines are costly, so only the page of results gets them
+        stmt = text(f"""
+            SELECT hits.id, hits.rank,
+                   ts_headline('english', hits.content, hits.query,
+                               'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MaxWords=24, MinWords=8')
+            FROM (
+                SELECT posts.id, posts.content, query, ts_rank_cd(posts.search_vector, query) AS rank
+                FROM posts, to_tsquery('english', :tsquery) AS query
+                WHERE posts.author_id = :author_id AND posts.search_vector @@ query{filters}
+                ORDER BY rank DESC, posts.id
+                LIMIT :limit OFFSET :offset
+            ) AS hits
+            ORDER BY hits.rank DESC, hits.id
+        """)
+        params.update(tsquery=_postgres_tsquery(terms), author_id=author_id)
+    else:
+        join = " JOIN posts ON posts.id = posts_fts.rowid" if filters else ""
+        # bm25 is lower for better matches; the zero weight ignores the author column
+        stmt = text(f"""
+            SELECT posts_fts.rowid, -bm25(posts_fts, 1.0, 0.0) AS score,
+                   snippet(posts_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 24)
+            FROM posts_fts{join}
+            WHERE posts_fts MATCH :match{filters}
+            ORDER BY bm25(posts_fts, 1.0, 0.0), posts_fts.rowid
+            LIMIT :limit OFFSET :offset
+        """)
+        params["match"] = _sqlite_match(author_id, terms)
+
+    result = await db.execute(stmt, params)
+    return [(post_id, float(score), highlight or "") for post_id, score, highlight in result.all()]
@@ -1,23 +1,276 @@
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+import asyncio
+import logging
 import os
-from datetime import datetime
+import time
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Dict, List, Optional
+from ..metrics import track_call
+
+if TYPE_CHECKING:
+    from slack_sdk.web.async_client import AsyncWebClient
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Allows ``rate`` sends per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, seconds: float):
+        """Hold the bucket empty for ``seconds``, e.g. after a 429 Retry-After."""
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+        self.updated = time.monotonic()
 
 class SlackService:
-    def __init__(self):
-        self.client = WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
-        self.channel = os.getenv("SLACK_CHANNEL_ID")
+    """Queues Slack notifications and sends them from background workers.
+
+    Callers only enqueue, so request handlers never wait on the Slack API.
+    Post events for a channel that arrive within ``coalesce_window`` seconds
+    of each other are merged into a single digest message. Sends are paced
+    per channel by a token bucket and retried after Slack's ``Retry-After``
+    when rate limited. When the queue is full new events are dropped and
+    counted rather than applying backpressure to the API.
+    """
+
+    DIGEST_MAX_LINES = 20
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        channel: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_queue_size: int = 1000,
+        workers: int = 2,
+        rate_per_channel: float = 1.0,
+        burst: int = 3,
+        coalesce_window: float = 2.0,
+        max_retries: int = 3,
+    ):
+        self._client_kwargs = {"token": token or os.getenv("SLACK_BOT_TOKEN")}
+        if base_url:
+            self._client_kwargs["base_url"] = base_url
+        self._client: Optional["AsyncWebClient"] = None
+        self.channel = channel or os.getenv("SLACK_CHANNEL_ID")
+        self.workers = workers
+        self.rate_per_channel = rate_per_channel
+        self.burst = burst
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+
+        self._max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, list] = defaultdict(list)
+        self._flush_at: Dict[str, float] = {}
+        self._limiters: Dict[str, TokenBucket] = {}
+
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._latencies = deque(maxlen=1000)
+
+    @property
+    def client(self) -> "AsyncWebClient":
+        # Built on first send: slack_sdk is slow to import and nothing at startup needs it
+        if self._client is None:
+            from slack_sdk.web.async_client import AsyncWebClient
+            self._client = AsyncWebClient(**self._client_kwargs)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    # Public API
+
+    async def send_post_notification(self, post, action="created") -> bool:
+        return await self.send_post_event(self._snapshot(post, action))
+
+    async def send_post_event(self, snapshot: dict) -> bool:
+        """Queue a post change given as plain fields (see ``_snapshot``)."""
+        return self._enqueue({"kind": "post", "channel": self.channel, "post": snapshot})
+
+    async def send_error_notification(self, error_message: str, post_id: int = None) -> bool:
+        blocks = [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": "❌ Post Error"
+                }
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*Error:*\n{error_message}"
+                }
+            }
+        ]
+
+        if post_id:
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*Post ID:*\n{post_id}"
+                }
+            })
+
+        return self._enqueue({"kind": "message", "channel": self.channel, "blocks": blocks, "text": "Post error"})
+
+    async def send_bulk_notification(self, action: str, count: int, platforms: Optional[Dict[str, int]] = None) -> bool:
+        """One summary message for a bulk operation, instead of one event per post."""
+        blocks = [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": f"{count} Posts {action.capitalize()}"
+                }
+            }
+        ]
+
+        if platforms:
+            blocks.append({
+                "type": "section",
+                "fields": [
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*{platform}:*\n{platform_count}"
+                    }
+                    for platform, platform_count in sorted(platforms.items())
+                ]
+            })
+
+        return self._enqueue({"kind": "message", "channel": self.channel, "blocks": blocks, "text": f"{count} posts {action}"})
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_digest_events": sum(len(events) for events in self._pending.values()),
+            "outbox_depth": self._outbox.qsize() if self._outbox else 0,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "send_latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "send_latency_p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None,
+        }
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._outbox = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._collect()))
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._send_worker()))
 
-    async def send_post_notification(self, post, action="created"):
+    async def stop(self, timeout: float = 5.0):
+        """Flush buffered events, wait briefly for in-flight sends, then stop the workers."""
+        if not self._tasks:
+            return
+        collector, senders = self._tasks[0], self._tasks[1:]
+        collector.cancel()
+        await asyncio.gather(collector, return_exceptions=True)
+        while not self._queue.empty():
+            self._buffer(self._queue.get_nowait())
+        for channel in list(self._pending):
+            self._flush(channel)
         try:
-            scheduled_time = post.scheduled_time.strftime("%Y-%m-%d %H:%M:%S") if post.scheduled_time else "Not scheduled"
-            
+            await asyncio.wait_for(self._outbox.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._outbox.qsize()} unsent Slack messages on shutdown")
+        for task in senders:
+            task.cancel()
+        await asyncio.gather(*senders, return_exceptions=True)
+        self._tasks = []
+
+    # Queueing and coalescing
+
+    def _enqueue(self, event: dict) -> bool:
+        if not self._tasks:
+            self.start()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    @staticmethod
+    def _snapshot(post, action: str) -> dict:
+        # Copy the fields now; the ORM object may change before the digest is sent
+        scheduled_time = post.scheduled_time.strftime("%Y-%m-%d %H:%M:%S") if post.scheduled_time else "Not scheduled"
+        return {
+            "id": post.id,
+            "action": action,
+            "platform": post.platform.value,
+            "status": post.status.value,
+            "scheduled_time": scheduled_time,
+            "content": post.content,
+        }
+
+    def _buffer(self, event: dict):
+        channel = event["channel"]
+        if event["kind"] == "message":
+            self._outbox.put_nowait(event)
+            return
+        if not self._pending[channel]:
+            self._flush_at[channel] = time.monotonic() + self.coalesce_window
+        self._pending[channel].append(event["post"])
+
+    def _flush(self, channel: str):
+        posts = self._pending.pop(channel, [])
+        self._flush_at.pop(channel, None)
+        if posts:
+            blocks, text = self._build_post_blocks(posts)
+            self._outbox.put_nowait({"kind": "message", "channel": channel, "blocks": blocks, "text": text})
+
+    async def _collect(self):
+        while True:
+            timeout = None
+            if self._flush_at:
+                timeout = max(min(self._flush_at.values()) - time.monotonic(), 0)
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                self._buffer(event)
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            for channel, flush_at in list(self._flush_at.items()):
+                if flush_at <= now:
+                    self._flush(channel)
+
+    def _build_post_blocks(self, posts: list):
+        if len(posts) == 1:
+            post = posts[0]
             blocks = [
                 {
                     "type": "header",
                     "text": {
                         "type": "plain_text",
-                        "text": f"Post {action.capitalize()}"
+                        "text": f"Post {post['action'].capitalize()}"
                     }
                 },
                 {
@@ -25,15 +278,15 @@ class SlackService:
                     "fields": [
                         {
                             "type": "mrkdwn",
-                            "text": f"*Platform:*\n{post.platform.value}"
+                            "text": f"*Platform:*\n{post['platform']}"
                         },
                         {
                             "type": "mrkdwn",
-                            "text": f"*Status:*\n{post.status.value}"
+                            "text": f"*Status:*\n{post['status']}"
                         },
                         {
                             "type": "mrkdwn",
-                            "text": f"*Scheduled Time:*\n{scheduled_time}"
+                            "text": f"*Scheduled Time:*\n{post['scheduled_time']}"
                         }
                     ]
                 },
@@ -41,51 +294,84 @@ class SlackService:
                     "type": "section",
                     "text": {
                         "type": "mrkdwn",
-                        "text": f"*Content:*\n{post.content}"
+                        "text": f"*Content:*\n{post['content']}"
                     }
                 }
             ]
+            return blocks, f"Post {post['action']}"
 
-            await self.client.chat_postMessage(
-                channel=self.channel,
-                blocks=blocks
-            )
-        except SlackApiError as e:
-            print(f"Error sending Slack notification: {str(e)}")
-
-    async def send_error_notification(self, error_message: str, post_id: int = None):
-        try:
-            blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "❌ Post Error"
-                    }
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*Error:*\n{error_message}"
-                    }
+        lines = [
+            f"• *{post['action'].capitalize()}* {post['platform']} ({post['status']}, {post['scheduled_time']}): "
+            f"{post['content'][:80]}"
+            for post in posts[:self.DIGEST_MAX_LINES]
+        ]
+        if len(posts) > self.DIGEST_MAX_LINES:
+            lines.append(f"…and {len(posts) - self.DIGEST_MAX_LINES} more")
+        blocks = [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": f"{len(posts)} Posts Changed"
                 }
-            ]
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": "\n".join(lines)
+                }
+            }
+        ]
+        return blocks, f"{len(posts)} posts changed"
 
-            if post_id:
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*Post ID:*\n{post_id}"
-                    }
-                })
+    # Sending
+
+    def _limiter(self, channel: str) -> TokenBucket:
+        if channel not in self._limiters:
+            self._limiters[channel] = TokenBucket(self.rate_per_channel, self.burst)
+        return self._limiters[channel]
+
+    async def _send_worker(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self._send(message)
+            finally:
+                self._outbox.task_done()
 
-            await self.client.chat_postMessage(
-                channel=self.channel,
-                blocks=blocks
-            )
-        except SlackApiError as e:
-            print(f"Error sending Slack notification: {str(e)}")
+    async def _send(self, message: dict):
+        from slack_sdk.errors import SlackApiError
+        limiter = self._limiter(message["channel"])
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with track_call("slack", "chat.postMessage"):
+                    await self.client.chat_postMessage(
+                        channel=message["channel"],
+                        blocks=message["blocks"],
+                        text=message["text"]
+                    )
+                self._latencies.append(time.perf_counter() - started)
+                self.sent += 1
+                return
+            except SlackApiError as e:
+                if e.response.status_code == 429 and attempt < self.max_retries:
+                    self.rate_limited += 1
+                    # Pause the whole channel, not just this worker
+                    limiter.penalize(float(e.response.headers.get("Retry-After", 1)))
+                    continue
+                self.failed += 1
+                logger.error(f"Error sending Slack notification: {str(e)}")
+                return
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error sending Slack notification: {str(e)}")
+                return
 
-slack_service = SlackService() 
\ No newline at end of file
+slack_service = SlackService(
+    max_queue_size=int(os.getenv("SLACK_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("SLACK_WORKERS", "2")),
+    coalesce_window=float(os.getenv("SLACK_COALESCE_SECONDS", "2")),
+)
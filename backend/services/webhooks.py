@@ -0,0 +1,534 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import secrets
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from sqlalchemy import insert, select
+
+from ..cache import TTLCache
+from ..database import SessionLocal
+from ..metrics import track_call, webhook_circuits_open, webhook_deliveries
+from ..models import WebhookDeadLetter, WebhookSubscription
+from .outbox import Event
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+def generate_secret() -> str:
+    return secrets.token_hex(32)
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """``sha256=<hex>`` HMAC of ``"<timestamp>." + body``.
+
+    Receivers recompute it from the ``X-Webhook-Timestamp`` header and the raw
+    body, and should reject old timestamps to stop replays.
+    """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+def is_public_address(address: str) -> bool:
+    """False for loopback, private, link-local (cloud metadata), reserved and multicast addresses."""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+async def check_target(url: str) -> Optional[str]:
+    """Why ``url`` may not receive webhooks, or None if every address it resolves to is public."""
+    host = urlsplit(url).hostname
+    if not host:
+        return "URL has no host"
+    if _is_ip(host):
+        addresses = [host]
+    else:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except OSError:
+            return f"{host} could not be resolved"
+        addresses = [info[4][0] for info in infos]
+    if not all(is_public_address(address) for address in addresses):
+        return f"{host} is not a public address"
+    return None
+
+class PublicResolver(AbstractResolver):
+    """Resolves like aiohttp's default resolver, minus non-public addresses.
+
+    Checked again on every connection, so a host that passed ``check_target``
+    cannot later be pointed at an internal address (DNS rebinding).
+    """
+
+    def __init__(self):
+        self._resolver = aiohttp.ThreadedResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict]:
+        hosts = [entry for entry in await self._resolver.resolve(host, port, family) if is_public_address(entry["host"])]
+        if not hosts:
+            raise OSError(f"{host} resolves to no public address")
+        return hosts
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+def event_body(event: Event) -> bytes:
+    return json.dumps({
+        "id": event.key,
+        "type": event.type,
+        "created_at": event.created_at.isoformat(),
+        "data": event.payload,
+    }, separators=(",", ":")).encode()
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open nothing is sent. After ``reset_timeout`` seconds a single
+    probe is let through (half-open): success closes the circuit, failure
+    opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() < self.opened_at + self.reset_timeout:
+            return False
+        self.probing = True
+        return True
+
+    def retry_after(self) -> Optional[float]:
+        """Seconds until a probe may go out; None while one is in flight."""
+        if self.probing:
+            return None
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def record_success(self) -> bool:
+        """Returns True if this closed the circuit."""
+        was_open = self.is_open
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        return was_open
+
+    def record_failure(self) -> bool:
+        """Returns True if this opened the circuit."""
+        was_open = self.is_open
+        self.failures += 1
+        self.probing = False
+        if was_open or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        return self.is_open and not was_open
+
+@dataclass(eq=False)
+class Delivery:
+    subscription_id: int
+    url: str
+    secret: str
+    event_key: str
+    event_type: str
+    body: bytes
+    attempts: int = 0
+
+class Endpoint:
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.queue: Deque[Delivery] = deque()
+        self.active = 0
+        # Set while the circuit is open: resumes the queue when a probe is due
+        self.wake: Optional[asyncio.TimerHandle] = None
+
+class DeliveryFailed(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+class WebhookService:
+    """Delivers outbox events to users' webhook subscriptions.
+
+    Registered as an outbox consumer: ``handle`` looks up the subscriptions
+    for a batch and only queues deliveries, so slow endpoints never hold up
+    the outbox. Requests go out over one shared aiohttp session whose
+    connector keeps connections alive and caps them in total and per host.
+    Each endpoint URL has its own queue, drained by at most
+    ``endpoint_concurrency`` tasks, so one slow receiver cannot delay the
+    others. Connection errors, timeouts, 408, 429 and 5xx are retried with
+    exponential backoff and jitter (at least ``Retry-After``); other 4xx and
+    deliveries out of attempts go to ``webhook_dead_letters``. After
+    ``failure_threshold`` consecutive failures an endpoint's circuit opens
+    and its queue waits for a probe. At most ``max_pending`` deliveries are
+    held in memory; beyond that ``handle`` raises and the outbox retries the
+    batch later. Unless ``allow_private_targets`` is set, only public
+    addresses are connected to (``PublicResolver``).
+    """
+    name = "webhooks"
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        endpoint_concurrency: int = 4,
+        timeout: float = 10.0,
+        max_attempts: int = 8,
+        retry_base: float = 1.0,
+        retry_max: float = 600.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_pending: int = 50000,
+        allow_private_targets: bool = False,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.endpoint_concurrency = endpoint_concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_pending = max_pending
+        self.allow_private_targets = allow_private_targets
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._waiting: Dict[Delivery, asyncio.TimerHandle] = {}
+        self._in_flight: Set[Delivery] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # (subscription id, event key) already queued, so outbox redeliveries are not sent twice
+        self._queued = TTLCache(maxsize=100000, ttl=24 * 3600)
+        # Deleted subscriptions whose in-flight deliveries are dropped when they return
+        self._cancelled = TTLCache(maxsize=100000, ttl=24 * 3600)
+
+        # Queued, waiting for a retry, or in flight
+        self.pending = 0
+        self.delivered = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self._latencies = deque(maxlen=1000)
+
+    # Lifecycle
+
+    def start(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+                resolver=None if self.allow_private_targets else PublicResolver()
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json", "User-Agent": "content-calendar-webhooks/1.0"}
+            )
+
+    async def stop(self, timeout: float = 5.0):
+        """Wait briefly for pending deliveries, then dead-letter the rest so they can be redelivered."""
+        if self._session is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        leftovers = list(self._in_flight) + list(self._waiting)
+        for handle in self._waiting.values():
+            handle.cancel()
+        for endpoint in self._endpoints.values():
+            leftovers.extend(endpoint.queue)
+            if endpoint.wake is not None:
+                endpoint.wake.cancel()
+        self._waiting.clear()
+        self._in_flight.clear()
+        self._endpoints.clear()
+        if leftovers:
+            logger.warning(f"Dead-lettering {len(leftovers)} undelivered webhooks on shutdown")
+            await self._dead_letter([(delivery, None, "Undelivered at shutdown") for delivery in leftovers])
+        self.pending = 0
+        self._idle.set()
+        await self._session.close()
+        self._session = None
+
+    # Outbox consumer
+
+    async def handle(self, events: List[Event]) -> None:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(WebhookSubscription).where(
+                    WebhookSubscription.user_id.in_({event.author_id for event in events}),
+                    WebhookSubscription.is_active.is_(True)
+                )
+            )
+            subscriptions = result.scalars().all()
+        if not subscriptions:
+            return
+
+        by_user: Dict[int, List[WebhookSubscription]] = {}
+        for subscription in subscriptions:
+            by_user.setdefault(subscription.user_id, []).append(subscription)
+        deliveries = []
+        for event in events:
+            body = None
+            for subscription in by_user.get(event.author_id, ()):
+                if subscription.event_types and event.type not in subscription.event_types:
+                    continue
+                if (subscription.id, event.key) in self._queued:
+                    continue
+                body = body or event_body(event)
+                deliveries.append(Delivery(
+                    subscription_id=subscription.id,
+                    url=subscription.url,
+                    secret=subscription.secret,
+                    event_key=event.key,
+                    event_type=event.type,
+                    body=body
+                ))
+
+        if self.pending + len(deliveries) > self.max_pending:
+            raise RuntimeError(f"{self.pending} webhook deliveries pending")
+        for delivery in deliveries:
+            self._queued.set((delivery.subscription_id, delivery.event_key), True)
+            self.submit(delivery)
+
+    def cancel_subscription(self, subscription_id: int):
+        """Drop a deleted subscription's queued and waiting deliveries; in-flight ones are dropped on return."""
+        self._cancelled.set(subscription_id, True)
+        dropped = 0
+        for delivery, handle in list(self._waiting.items()):
+            if delivery.subscription_id == subscription_id:
+                handle.cancel()
+                del self._waiting[delivery]
+                dropped += 1
+        for endpoint in self._endpoints.values():
+            kept = [delivery for delivery in endpoint.queue if delivery.subscription_id != subscription_id]
+            dropped += len(endpoint.queue) - len(kept)
+            endpoint.queue = deque(kept)
+        for _ in range(dropped):
+            self._finish()
+
+    def submit(self, delivery: Delivery):
+        """Queue a delivery; it is retried or dead-lettered on its own from here."""
+        if self._session is None:
+            self.start()
+        self.pending += 1
+        self._idle.clear()
+        self._enqueue(delivery)
+
+    # Per-endpoint queues
+
+    def _enqueue(self, delivery: Delivery):
+        endpoint = self._endpoints.get(delivery.url)
+        if endpoint is None:
+            endpoint = self._endpoints[delivery.url] = Endpoint(
+                CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            )
+        endpoint.queue.append(delivery)
+        self._spawn(delivery.url, endpoint)
+
+    def _spawn(self, url: str, endpoint: Endpoint):
+        if endpoint.wake is not None:
+            return
+        while endpoint.active < self.endpoint_concurrency and len(endpoint.queue) > endpoint.active:
+            endpoint.active += 1
+            task = asyncio.create_task(self._drain(url, endpoint))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _resume(self, url: str, endpoint: Endpoint):
+        endpoint.wake = None
+        self._spawn(url, endpoint)
+
+    async def _drain(self, url: str, endpoint: Endpoint):
+        try:
+            while endpoint.queue:
+                if not endpoint.breaker.allow():
+                    delay = endpoint.breaker.retry_after()
+                    # While a probe is in flight, its outcome restarts the queue
+                    if delay is not None and endpoint.wake is None:
+                        endpoint.wake = asyncio.get_running_loop().call_later(delay, self._resume, url, endpoint)
+                    return
+                await self._attempt(endpoint, endpoint.queue.popleft())
+                self._spawn(url, endpoint)
+        finally:
+            endpoint.active -= 1
+            idle = not endpoint.active and not endpoint.queue and endpoint.wake is None
+            # Endpoints with recent failures stay, or their breaker would start over
+            if idle and not endpoint.breaker.failures and self._endpoints.get(url) is endpoint:
+                del self._endpoints[url]
+
+    # Sending
+
+    async def _attempt(self, endpoint: Endpoint, delivery: Delivery):
+        if delivery.subscription_id in self._cancelled:
+            self._finish()
+            return
+        delivery.attempts += 1
+        timestamp = int(time.time())
+        headers = {
+            "X-Webhook-Id": delivery.event_key,
+            "X-Webhook-Event": delivery.event_type,
+            "X-Webhook-Timestamp": str(timestamp),
+            SIGNATURE_HEADER: sign(delivery.secret, timestamp, delivery.body),
+        }
+        status = retry_after = error = None
+        self._in_flight.add(delivery)
+        started = time.perf_counter()
+        try:
+            host = urlsplit(delivery.url).hostname or ""
+            # aiohttp does not resolve IP literals, so PublicResolver never sees them
+            if not self.allow_private_targets and _is_ip(host) and not is_public_address(host):
+                raise aiohttp.ClientConnectionError(f"{host} is not a public address")
+            with track_call("webhooks", "deliver"):
+                async with self._session.post(delivery.url, data=delivery.body, headers=headers, allow_redirects=False) as response:
+                    # Reading the body lets the connection go back to the pool
+                    await response.read()
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+                    if not 200 <= status < 300:
+                        raise DeliveryFailed(status)
+        except DeliveryFailed as e:
+            error = str(e)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+        finally:
+            self._in_flight.discard(delivery)
+        if delivery.subscription_id in self._cancelled:
+            self._finish()
+            return
+
+        retryable = status is None or status in (408, 429) or status >= 500
+        if error is None or not retryable:
+            # The endpoint answered, so it is healthy even if it rejected this one
+            if endpoint.breaker.record_success():
+                webhook_circuits_open.dec()
+                logger.info(f"Webhook circuit closed for {delivery.url}")
+        elif endpoint.breaker.record_failure():
+            webhook_circuits_open.inc()
+            logger.warning(f"Webhook circuit opened for {delivery.url} after {endpoint.breaker.failures} failures")
+
+        if error is None:
+            self._latencies.append(time.perf_counter() - started)
+            self.delivered += 1
+            webhook_deliveries.inc(outcome="delivered")
+            self._finish()
+            return
+        if retryable and delivery.attempts < self.max_attempts:
+            self.retried += 1
+            webhook_deliveries.inc(outcome="retried")
+            delay = self._backoff(delivery.attempts, retry_after)
+            self._waiting[delivery] = asyncio.get_running_loop().call_later(delay, self._retry, delivery)
+            return
+        logger.error(f"Webhook {delivery.event_key} to {delivery.url} failed after {delivery.attempts} attempts: {error}")
+        self.dead_lettered += 1
+        webhook_deliveries.inc(outcome="dead_lettered")
+        await self._dead_letter([(delivery, status, error)])
+        self._finish()
+
+    def _backoff(self, attempts: int, retry_after: Optional[str]) -> float:
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        # Jitter spreads out retries from many deliveries that failed together
+        delay = random.uniform(delay / 2, delay)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.retry_max))
+        return delay
+
+    def _retry(self, delivery: Delivery):
+        self._waiting.pop(delivery, None)
+        self._enqueue(delivery)
+
+    def _finish(self):
+        self.pending -= 1
+        if self.pending <= 0:
+            self._idle.set()
+
+    async def _dead_letter(self, failures: List[Tuple[Delivery, Optional[int], Optional[str]]]):
+        try:
+            async with SessionLocal() as db:
+                # Subscriptions deleted meanwhile, possibly by another worker, take their deliveries with them
+                result = await db.execute(
+                    select(WebhookSubscription.id).where(
+                        WebhookSubscription.id.in_({delivery.subscription_id for delivery, _, _ in failures})
+                    )
+                )
+                existing = set(result.scalars().all())
+                failures = [failure for failure in failures if failure[0].subscription_id in existing]
+                if not failures:
+                    return
+                await db.execute(insert(WebhookDeadLetter), [
+                    {
+                        "subscription_id": delivery.subscription_id,
+                        "event_key": delivery.event_key,
+                        "event_type": delivery.event_type,
+                        "body": delivery.body.decode(),
+                        "attempts": delivery.attempts,
+                        "last_status": status,
+                        "last_error": error,
+                    }
+                    for delivery, status, error in failures
+                ])
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Could not store {len(failures)} webhook dead letters: {str(e)}")
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "pending": self.pending,
+            "waiting_for_retry": len(self._waiting),
+            "endpoints": len(self._endpoints),
+            "open_circuits": sum(1 for endpoint in self._endpoints.values() if endpoint.breaker.is_open),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None,
+        }
+
+webhook_service = WebhookService(
+    max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100")),
+    max_connections_per_host=int(os.getenv("WEBHOOK_MAX_CONNECTIONS_PER_HOST", "10")),
+    endpoint_concurrency=int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "4")),
+    timeout=float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10")),
+    max_attempts=int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8")),
+    failure_threshold=int(os.getenv("WEBHOOK_CIRCUIT_FAILURES", "5")),
+    reset_timeout=float(os.getenv("WEBHOOK_CIRCUIT_RESET_SECONDS", "30")),
+    max_pending=int(os.getenv("WEBHOOK_MAX_PENDING", "50000")),
+    allow_private_targets=os.getenv("WEBHOOK_ALLOW_PRIVATE_TARGETS", "false").lower() in ("1", "true", "yes"),
+)
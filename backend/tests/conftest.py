@@ -0,0 +1,103 @@
+"""Shared fixtures: a migrated SQLite database per test, an API client,
+a signed-in user, and local HTTP servers standing in for outside services.
+
+The backend reads its settings when it is imported, so the environment is
+set up here before anything from it is.
+"""
+import os
+import shutil
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="content-calendar-tests-")
+DB_PATH = os.path.join(TEST_DIR, "test.db")
+TEMPLATE_PATH = os.path.join(TEST_DIR, "template.db")
+
+# Empty values count as set, so a developer's .env cannot switch these on
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DB_PATH}",
+    DATABASE_REPLICA_URLS="",
+    CACHE_REDIS_URL="",
+    REALTIME_REDIS_URL="",
+    WEB_CONCURRENCY="1",
+    OPENAI_API_KEY="test",
+    SLACK_BOT_TOKEN="xoxb-test",
+    SLACK_CHANNEL_ID="C-TEST",
+    SCHEDULER_ENABLED="false",
+    ARCHIVE_ENABLED="false",
+    MEDIA_ROOT=os.path.join(TEST_DIR, "media"),
+)
+
+import httpx
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+
+from backend.database import SessionLocal, engine
+from backend.main import app
+from backend.models import User
+from backend.routers.auth import create_access_token, token_cache
+from backend.services.response_cache import MemoryBackend, response_cache
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")
+
+@event.listens_for(engine.sync_engine, "connect")
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys unless asked; PostgreSQL always enforces them
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+@pytest.fixture(scope="session")
+def migrated_template():
+    """Run the migrations once; every test starts from a copy of the result."""
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    shutil.copy(DB_PATH, TEMPLATE_PATH)
+    yield TEMPLATE_PATH
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(autouse=True)
+async def fresh_state(anyio_backend, migrated_template):
+    shutil.copy(migrated_template, DB_PATH)
+    response_cache.backend = MemoryBackend()
+    token_cache.evict(lambda user: True)
+    yield
+    # Pooled connections still point at this test's copy of the database
+    await engine.dispose()
+
+@pytest.fixture
+async def user():
+    async with SessionLocal() as db:
+        user = User(email="author@example.com", hashed_password="x", full_name="Author", is_active=True)
+        db.add(user)
+        await db.commit()
+        return user
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+
+@pytest.fixture
+async def client():
+    # ASGITransport does not run the lifespan, so no background services start
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.fixture
+async def http_server():
+    """Start a local aiohttp app: ``base_url = await http_server(web_app)``."""
+    servers = []
+
+    async def start(web_app: web.Application) -> str:
+        server = TestServer(web_app, host="127.0.0.1")
+        await server.start_server()
+        servers.append(server)
+        return str(server.make_url("/"))
+
+    yield start
+    for server in servers:
+        await server.close()
@@ -0,0 +1,178 @@
+"""AIService against a local stand-in for the OpenAI chat completions API."""
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from backend.routers import ai as ai_router
+from backend.schemas import AIContentRequest, PlatformType
+from backend.services.ai_service import AIService
+
+pytestmark = pytest.mark.anyio
+
+class FakeOpenAI:
+    """Answers ``/v1/chat/completions`` after ``delay`` seconds; the first ``failures`` calls get a 500."""
+
+    def __init__(self, delay: float = 0, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.completions)
+        return app
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        params = await request.json()
+        self.requests.append(params)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if len(self.requests) <= self.failures:
+            return web.json_response({"error": {"message": "overloaded", "type": "server_error"}}, status=500)
+
+        content = f"Reply to: {params['messages'][-1]['content'][:40]}|||First idea|||Second idea"
+        if params.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for piece in (content[:10], content[10:]):
+                chunk = {
+                    "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": params["model"],
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            return response
+        return web.json_response({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": params["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+def content_request(topic: str = "release notes") -> AIContentRequest:
+    return AIContentRequest(platform=PlatformType.TWITTER, topic=topic)
+
+@pytest.fixture
+async def openai(http_server):
+    fake = FakeOpenAI()
+    base_url = await http_server(fake.app())
+    services = []
+
+    def build(**options) -> AIService:
+        service = AIService(base_url=f"{base_url}v1", backoff_base=0.01, **options)
+        services.append(service)
+        return service
+
+    yield fake, build
+    for service in services:
+        await service.client.close()
+
+async def test_generates_content_and_suggestions(openai):
+    fake, build = openai
+    service = build()
+
+    content, suggestions = await service.generate_content(content_request())
+
+    assert content.startswith("Reply to: Create a concise and engaging tweet")
+    assert suggestions == ["First idea", "Second idea"]
+    assert fake.requests[0]["model"] == "gpt-3.5-turbo"
+
+async def test_repeated_request_is_served_from_cache(openai):
+    fake, build = openai
+    service = build()
+
+    first = await service.generate_content(content_request())
+    second = await service.generate_content(content_request())
+
+    assert first == second
+    assert len(fake.requests) == 1
+    assert service.metrics()["cache"]["hits"] == 1
+
+async def test_concurrent_identical_requests_share_one_call(openai):
+    fake, build = openai
+    fake.delay = 0.2
+    service = build()
+
+    results = await asyncio.gather(*(service.generate_content(content_request()) for _ in range(5)))
+
+    assert len(set(map(str, results))) == 1
+    assert len(fake.requests) == 1
+    assert service.coalesced == 4
+
+async def test_concurrency_is_capped(openai):
+    fake, build = openai
+    fake.delay = 0.1
+    service = build(max_concurrency=2)
+
+    await asyncio.gather(*(service.generate_content(content_request(f"topic {n}")) for n in range(6)))
+
+    assert len(fake.requests) == 6
+    assert fake.max_active == 2
+    assert service.metrics()["queue_time_p99"] > 0
+
+async def test_server_errors_are_retried(openai):
+    fake, build = openai
+    fake.failures = 2
+    service = build(max_retries=2)
+
+    content, _ = await service.generate_content(content_request())
+
+    assert content.startswith("Reply to:")
+    assert len(fake.requests) == 3
+    assert service.retries == 2
+    assert service.upstream_failures == 2
+
+async def test_gives_up_after_max_retries(openai):
+    fake, build = openai
+    fake.failures = 10
+    service = build(max_retries=1)
+
+    with pytest.raises(Exception, match="Error generating content"):
+        await service.generate_content(content_request())
+
+    assert len(fake.requests) == 2
+    # Failures are not cached, so the next call goes upstream again
+    with pytest.raises(Exception):
+        await service.generate_content(content_request())
+    assert len(fake.requests) == 4
+
+async def test_slow_upstream_times_out(openai):
+    fake, build = openai
+    fake.delay = 1
+    service = build(timeout=0.1, max_retries=0)
+
+    with pytest.raises(Exception, match="timed out"):
+        await service.generate_content(content_request())
+
+async def test_stream_fills_the_cache(openai):
+    fake, build = openai
+    service = build()
+
+    chunks = [chunk async for chunk in service.stream_content(content_request())]
+    again = [chunk async for chunk in service.stream_content(content_request())]
+
+    assert len(chunks) == 2
+    assert again == ["".join(chunks)]
+    assert len(fake.requests) == 1
+
+async def test_generate_endpoint(openai, client, auth_headers, monkeypatch):
+    fake, build = openai
+    monkeypatch.setattr(ai_router, "ai_service", build())
+
+    response = await client.post(
+        "/api/ai/generate", json={"platform": "twitter", "topic": "launch day"}, headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["suggestions"] == ["First idea", "Second idea"]
+    assert "launch day" in fake.requests[0]["messages"][-1]["content"]
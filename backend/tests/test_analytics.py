@@ -0,0 +1,45 @@
+"""MetricsIngestor flushes: stored analytics show up in cached post responses."""
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.services.analytics import MetricsIngestor
+
+pytestmark = pytest.mark.anyio
+
+def snapshot(post_id: int, likes: int) -> dict:
+    return {
+        "post_id": post_id,
+        "observed_at": datetime.now(timezone.utc),
+        "likes": likes,
+        "shares": 0,
+        "comments": 0,
+        "impressions": 100,
+    }
+
+async def create_post(client, auth_headers) -> int:
+    response = await client.post("/api/posts/", json={"content": "Measured", "platform": "twitter"}, headers=auth_headers)
+    return response.json()["id"]
+
+async def test_flush_refreshes_cached_posts(client, auth_headers):
+    post_id = await create_post(client, auth_headers)
+    assert (await client.get(f"/api/posts/{post_id}", headers=auth_headers)).json()["analytics"] is None
+    assert (await client.get("/api/posts/", headers=auth_headers)).json()[0]["analytics"] is None
+    ingestor = MetricsIngestor()
+
+    ingestor.submit([snapshot(post_id, 7)])
+    await ingestor.flush()
+
+    assert (await client.get(f"/api/posts/{post_id}", headers=auth_headers)).json()["analytics"]["likes"] == 7
+    assert (await client.get("/api/posts/", headers=auth_headers)).json()[0]["analytics"]["likes"] == 7
+
+async def test_snapshots_for_missing_posts_do_not_sink_the_batch(client, auth_headers):
+    post_id = await create_post(client, auth_headers)
+    ingestor = MetricsIngestor()
+
+    ingestor.submit([snapshot(post_id, 3), snapshot(999, 5)])
+    await ingestor.flush()
+
+    assert ingestor.flushed == 1
+    assert ingestor.flush_failures == 1
+    assert (await client.get(f"/api/posts/{post_id}", headers=auth_headers)).json()["analytics"]["likes"] == 3
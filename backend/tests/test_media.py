@@ -0,0 +1,100 @@
+"""Media uploads and storage: ranged reads from both stores."""
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from backend.database import engine
+from backend.services import media
+from backend.services.media import LocalMediaStore, MediaService, S3MediaStore, build_media_service
+
+pytestmark = pytest.mark.anyio
+
+BLOB = bytes(range(256)) * 1024
+
+class FakeS3:
+    """Answers ``get_object`` with the requested byte range of ``objects[key]``."""
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.ranges = []
+
+    def get_object(self, Bucket: str, Key: str, Range: str) -> dict:
+        self.ranges.append(Range)
+        start, end = (int(value) for value in Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(self.objects[Key][start:end + 1])}
+
+async def chunks(data: bytes):
+    yield data
+
+async def read(store, key: str, start: int, end: int) -> bytes:
+    return b"".join([chunk async for chunk in store.read_range(key, start, end)])
+
+async def test_local_store_reads_a_range(tmp_path):
+    store = LocalMediaStore(str(tmp_path))
+    (tmp_path / "blob").write_bytes(BLOB)
+
+    assert await read(store, "blob", 0, len(BLOB) - 1) == BLOB
+    assert await read(store, "blob", 100, 70000) == BLOB[100:70001]
+
+async def test_s3_store_reads_a_range_with_a_ranged_get(monkeypatch):
+    fake = FakeS3({"blob": BLOB})
+    monkeypatch.setattr(media, "boto3", SimpleNamespace(client=lambda *args, **kwargs: fake))
+    store = S3MediaStore("bucket")
+
+    assert await read(store, "blob", 100, 70000) == BLOB[100:70001]
+    assert fake.ranges == ["bytes=100-70000"]
+
+async def test_upload_holds_no_connection_while_streaming(client, auth_headers):
+    response = await client.post("/api/posts/", json={"content": "With media", "platform": "twitter"}, headers=auth_headers)
+    post_id = response.json()["id"]
+    checked_out = []
+
+    async def body():
+        for offset in range(0, len(BLOB), 64 * 1024):
+            checked_out.append(engine.sync_engine.pool.checkedout())
+            yield BLOB[offset:offset + 64 * 1024]
+
+    response = await client.post(
+        "/api/media/upload",
+        params={"post_id": post_id, "filename": "blob.bin"},
+        content=body(),
+        headers={**auth_headers, "Content-Type": "application/octet-stream"}
+    )
+
+    assert response.status_code == 201
+    assert response.json()["size"] == len(BLOB)
+    # The first chunk may be read before the handler starts
+    assert checked_out[1:] and not any(checked_out[1:])
+
+    download = await client.get(response.json()["url"], headers={**auth_headers, "Range": "bytes=10-19"})
+    assert download.status_code == 206
+    assert download.content == BLOB[10:20]
+
+async def test_upload_to_a_missing_post_is_rejected(client, auth_headers, user):
+    response = await client.post(
+        "/api/media/upload", params={"post_id": 999}, content=b"data", headers=auth_headers
+    )
+
+    assert response.status_code == 404
+
+async def test_building_the_service_has_no_side_effects(tmp_path, monkeypatch):
+    root = tmp_path / "media"
+    monkeypatch.setenv("MEDIA_ROOT", str(root))
+    service = build_media_service()
+
+    assert not root.exists()
+
+    blob = await service.save(chunks(b"first upload"))
+    assert root.exists()
+    assert await service.store.exists(MediaService.blob_key(blob.sha256))
+
+def test_s3_client_is_built_on_first_use(monkeypatch):
+    calls = []
+    monkeypatch.setattr(media, "boto3", SimpleNamespace(client=lambda *args, **kwargs: calls.append(kwargs) or FakeS3({})))
+    store = S3MediaStore("bucket", endpoint_url="http://s3.test")
+
+    assert calls == []
+    assert isinstance(store.client, FakeS3)
+    assert store.client is store.client
+    assert calls == [{"endpoint_url": "http://s3.test"}]
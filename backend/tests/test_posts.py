@@ -0,0 +1,111 @@
+"""Post listing: a fixed number of queries however many posts it returns, and update validation."""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert
+
+from backend.database import SessionLocal, engine
+from backend.models import MediaAttachment, PlatformType, Post, PostAnalytics
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+async def seed_posts(author_id: int, count: int):
+    async with SessionLocal() as db:
+        result = await db.execute(insert(Post).returning(Post.id), [
+            {
+                "content": f"Post {n}",
+                "platform": PlatformType.TWITTER,
+                "scheduled_time": START + timedelta(minutes=n),
+                "author_id": author_id,
+            }
+            for n in range(count)
+        ])
+        post_ids = result.scalars().all()
+        await db.execute(insert(MediaAttachment), [
+            {"post_id": post_id, "url": f"https://cdn.example.com/{post_id}/{i}.png", "type": "image"}
+            for post_id in post_ids
+            for i in range(2)
+        ])
+        await db.execute(insert(PostAnalytics), [
+            {"post_id": post_id, "likes": post_id, "shares": 0, "comments": 0, "impressions": 10, "updated_at": START}
+            for post_id in post_ids
+        ])
+        await db.commit()
+    return post_ids
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+async def list_query_count(client, auth_headers, limit: int) -> int:
+    with count_queries() as statements:
+        response = await client.get("/api/posts/", params={"limit": limit}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+    return len(statements)
+
+async def test_list_runs_the_same_queries_for_any_page_size(client, auth_headers, user):
+    await seed_posts(user.id, 50)
+    # Loads the user into the token cache, so the counts below are the list alone
+    await client.get("/api/posts/", params={"limit": 1}, headers=auth_headers)
+
+    small = await list_query_count(client, auth_headers, 2)
+    large = await list_query_count(client, auth_headers, 50)
+
+    # Posts, then one SELECT ... IN each for media attachments and analytics
+    assert small == large == 3
+
+async def test_list_includes_media_and_analytics(client, auth_headers, user):
+    post_ids = await seed_posts(user.id, 3)
+
+    response = await client.get("/api/posts/", headers=auth_headers)
+
+    posts = response.json()
+    assert [post["id"] for post in posts] == post_ids
+    assert all(len(post["media_attachments"]) == 2 for post in posts)
+    assert [post["analytics"]["likes"] for post in posts] == post_ids
+
+async def test_repeated_list_is_served_from_cache(client, auth_headers, user):
+    await seed_posts(user.id, 3)
+    first = await client.get("/api/posts/", headers=auth_headers)
+
+    with count_queries() as statements:
+        second = await client.get("/api/posts/", headers=auth_headers)
+        not_modified = await client.get("/api/posts/", headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+
+    assert statements == []
+    assert second.content == first.content
+    assert not_modified.status_code == 304
+
+async def test_update_rejects_explicit_nulls(client, auth_headers, user):
+    post_id, = await seed_posts(user.id, 1)
+
+    for field in ("content", "platform", "status"):
+        response = await client.put(f"/api/posts/{post_id}", json={field: None}, headers=auth_headers)
+        assert response.status_code == 422, field
+        assert response.json()["errors"][0]["loc"][-1] == field
+
+    response = await client.get(f"/api/posts/{post_id}", headers=auth_headers)
+    assert response.json()["content"] == "Post 0"
+    assert response.json()["platform"] == "twitter"
+
+async def test_update_with_omitted_fields_keeps_them(client, auth_headers, user):
+    post_id, = await seed_posts(user.id, 1)
+
+    response = await client.put(f"/api/posts/{post_id}", json={"content": "Edited"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["content"] == "Edited"
+    assert response.json()["platform"] == "twitter"
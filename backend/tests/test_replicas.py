@@ -0,0 +1,161 @@
+"""Read-replica routing, with copies of the test database standing in for replicas.
+
+A replica is copied from the migrated template before any posts exist, so
+it looks like a replica that has not caught up: a read served by it
+returns no posts, and one served by the primary returns them.
+"""
+import asyncio
+import shutil
+
+import pytest
+from sqlalchemy import insert
+
+from backend import database
+from backend.database import ReplicaRouter, SessionLocal
+from backend.models import PlatformType, Post
+from backend.routers import posts as posts_router
+from backend.services.response_cache import response_cache
+
+pytestmark = pytest.mark.anyio
+
+async def add_post(author_id: int):
+    async with SessionLocal() as db:
+        await db.execute(insert(Post), [{"content": "On the primary", "platform": PlatformType.TWITTER, "author_id": author_id}])
+        await db.commit()
+
+@pytest.fixture
+async def replicas(migrated_template, monkeypatch, tmp_path):
+    """``router = replicas(count, **options)``: a ReplicaRouter over ``count`` stale copies, used by the app."""
+    routers = []
+
+    def build(count: int = 1, **options) -> ReplicaRouter:
+        urls = []
+        for n in range(count):
+            path = tmp_path / f"replica{n}.db"
+            shutil.copy(migrated_template, path)
+            urls.append(f"sqlite:///{path}")
+        router = ReplicaRouter(urls, **options)
+        routers.append(router)
+        monkeypatch.setattr(database, "replica_router", router)
+        monkeypatch.setattr(posts_router, "replica_router", router)
+        return router
+
+    yield build
+    for router in routers:
+        await router.stop()
+
+async def list_posts(client, auth_headers, **params) -> list:
+    # Distinct query strings keep the response cache out of the way
+    response = await client.get("/api/posts/", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+async def test_reads_go_to_a_healthy_replica(client, auth_headers, user, replicas):
+    router = replicas()
+    await add_post(user.id)
+    await router.check()
+
+    assert await list_posts(client, auth_headers) == []
+    assert router.replicas[0].healthy
+    assert router.replicas[0].sessions == 1
+    assert router.primary_sessions == 0
+
+async def test_reads_fall_back_to_the_primary_before_the_first_check(client, auth_headers, user, replicas):
+    router = replicas()
+    await add_post(user.id)
+
+    assert len(await list_posts(client, auth_headers)) == 1
+    assert router.fallbacks == 1
+
+async def test_user_reads_own_writes_from_the_primary(client, auth_headers, user, replicas):
+    router = replicas(sticky_seconds=0.3)
+    await router.check()
+
+    response = await client.post("/api/posts/", json={"content": "Mine", "platform": "twitter"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    assert [post["content"] for post in await list_posts(client, auth_headers, limit=10)] == ["Mine"]
+    assert router.sticky_sessions == 1
+
+    await asyncio.sleep(0.4)
+    assert await list_posts(client, auth_headers, limit=20) == []
+    assert router.replicas[0].sessions == 1
+
+async def test_other_users_are_not_pinned_by_a_write(replicas):
+    router = replicas()
+    await router.check()
+
+    router.record_write("writer@example.com")
+
+    assert router.choose("writer@example.com") is None
+    assert router.choose("reader@example.com") is router.replicas[0]
+    assert router.choose(None) is router.replicas[0]
+
+async def test_lagging_replica_is_taken_out_of_rotation(client, auth_headers, user, replicas, monkeypatch):
+    router = replicas(max_lag=5)
+    await router.check()
+    assert router.replicas[0].healthy
+
+    monkeypatch.setitem(database.LAG_QUERIES, "sqlite", "SELECT 30")
+    await router.check()
+    await add_post(user.id)
+
+    assert not router.replicas[0].healthy
+    assert router.replicas[0].lag == 30
+    assert len(await list_posts(client, auth_headers)) == 1
+    assert router.fallbacks == 1
+
+    monkeypatch.setitem(database.LAG_QUERIES, "sqlite", "SELECT 1")
+    await router.check()
+    assert router.replicas[0].healthy
+
+async def test_unreachable_replica_is_not_used(replicas, tmp_path):
+    router = replicas()
+    router.replicas[0] = database.Replica("replica0", f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    await router.check()
+
+    assert not router.replicas[0].healthy
+    assert router.replicas[0].error
+    assert router.choose() is None
+
+async def test_round_robin_spreads_reads(replicas):
+    router = replicas(2, balancing="round_robin")
+    await router.check()
+
+    chosen = [router.choose().name for _ in range(4)]
+
+    assert chosen == ["replica0", "replica1", "replica0", "replica1"]
+
+async def test_least_connections_prefers_the_idle_replica(replicas):
+    router = replicas(2, balancing="least_connections")
+    await router.check()
+
+    async with router.session() as first:
+        async with router.session() as second:
+            assert {first.info["replica"], second.info["replica"]} == {"replica0", "replica1"}
+        async with router.session() as third:
+            assert third.info["replica"] != first.info["replica"]
+
+    assert [replica.in_use for replica in router.replicas] == [0, 0]
+
+def test_unknown_balancing_is_rejected():
+    with pytest.raises(ValueError):
+        ReplicaRouter([], balancing="random")
+
+async def test_replica_responses_are_cached_briefly(client, auth_headers, user, replicas, monkeypatch):
+    router = replicas()
+    ttls = []
+    store = response_cache.backend.set
+
+    async def record_set(key, value, ttl):
+        ttls.append(ttl)
+        await store(key, value, ttl)
+
+    monkeypatch.setattr(response_cache.backend, "set", record_set)
+
+    await list_posts(client, auth_headers, limit=10)
+    await router.check()
+    await list_posts(client, auth_headers, limit=20)
+
+    assert ttls == [response_cache.ttl, response_cache.replica_ttl]
+    assert response_cache.replica_ttl < response_cache.ttl
@@ -0,0 +1,52 @@
+"""Daily rollups stay in step with posts whose times carry a UTC offset."""
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from backend.database import SessionLocal
+from backend.models import Post, PostDailyRollup
+
+pytestmark = pytest.mark.anyio
+
+async def rollups() -> list:
+    async with SessionLocal() as db:
+        result = await db.execute(select(PostDailyRollup.day, PostDailyRollup.count).order_by(PostDailyRollup.day))
+        return [tuple(row) for row in result.all()]
+
+async def create_post(client, auth_headers, scheduled_time: str) -> dict:
+    response = await client.post(
+        "/api/posts/",
+        json={"content": "Offset", "platform": "twitter", "scheduled_time": scheduled_time},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+async def test_offset_time_is_stored_as_utc(client, auth_headers, user):
+    post = await create_post(client, auth_headers, "2030-01-02T01:00:00+02:00")
+
+    async with SessionLocal() as db:
+        stored = await db.scalar(select(Post.scheduled_time).where(Post.id == post["id"]))
+    assert stored.replace(tzinfo=timezone.utc) == datetime(2030, 1, 1, 23, 0, tzinfo=timezone.utc)
+    assert await rollups() == [(date(2030, 1, 1), 1)]
+
+async def test_create_then_delete_leaves_no_rollups(client, auth_headers, user):
+    post = await create_post(client, auth_headers, "2030-01-02T01:00:00+02:00")
+
+    response = await client.delete(f"/api/posts/{post['id']}", headers=auth_headers)
+    assert response.status_code == 200
+
+    assert all(count == 0 for _, count in await rollups())
+    report = await client.get("/api/reports/", headers=auth_headers)
+    assert report.json()["total"] == 0
+
+async def test_update_with_offset_moves_the_rollup(client, auth_headers, user):
+    post = await create_post(client, auth_headers, "2030-01-02T01:00:00+02:00")
+
+    response = await client.put(
+        f"/api/posts/{post['id']}", json={"scheduled_time": "2030-01-05T23:30:00-05:00"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    assert [(day, count) for day, count in await rollups() if count] == [(date(2030, 1, 6), 1)]
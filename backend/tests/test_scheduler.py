@@ -0,0 +1,48 @@
+"""PostScheduler publishes at the instant a post was scheduled for, whatever offset it was given in."""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.services.scheduler import PostScheduler
+
+pytestmark = pytest.mark.anyio
+
+class RecordingPublisher:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, post):
+        self.published.append(post.id)
+
+async def schedule(client, auth_headers, scheduled_time: datetime) -> int:
+    response = await client.post(
+        "/api/posts/", json={"content": "Timed", "platform": "twitter"}, headers=auth_headers
+    )
+    post_id = response.json()["id"]
+    response = await client.put(
+        f"/api/posts/{post_id}",
+        json={"status": "scheduled", "scheduled_time": scheduled_time.isoformat()},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    return post_id
+
+async def test_offset_times_are_loaded_and_published_on_time(client, auth_headers, user):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    # Due a minute ago, but written in a zone whose wall clock is five hours ahead
+    due = await schedule(client, auth_headers, (now - timedelta(minutes=1)).astimezone(timezone(timedelta(hours=5))))
+    # Due in two hours, written in a zone whose wall clock is five hours behind
+    later = await schedule(client, auth_headers, (now + timedelta(hours=2)).astimezone(timezone(timedelta(hours=-5))))
+    publisher = RecordingPublisher()
+    scheduler = PostScheduler(publisher=publisher, lookahead=900)
+
+    await scheduler.refill()
+
+    assert scheduler._due == {due: (now - timedelta(minutes=1)).timestamp()}
+    assert await scheduler.dispatch(scheduler._pop_due(time.time())) == 1
+    assert publisher.published == [due]
+    assert later not in publisher.published
+
+    response = await client.get(f"/api/posts/{due}", headers=auth_headers)
+    assert response.json()["status"] == "published"
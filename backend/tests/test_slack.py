@@ -0,0 +1,138 @@
+"""SlackService against a local stand-in for the Slack Web API."""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from backend.services.slack_service import SlackService
+
+pytestmark = pytest.mark.anyio
+
+class FakeSlack:
+    """Answers ``chat.postMessage``; the first ``rate_limit`` calls get a 429."""
+
+    def __init__(self, rate_limit: int = 0, retry_after: int = 1):
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.calls = []
+        self.messages = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/chat.postMessage", self.post_message)
+        return app
+
+    async def post_message(self, request: web.Request) -> web.Response:
+        self.calls.append(time.monotonic())
+        if len(self.calls) <= self.rate_limit:
+            return web.json_response(
+                {"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": str(self.retry_after)}
+            )
+        self.messages.append(await request.json())
+        return web.json_response({"ok": True, "channel": "C-TEST", "ts": "1.0"})
+
+def post_event(post_id: int) -> dict:
+    return {
+        "id": post_id,
+        "action": "created",
+        "platform": "twitter",
+        "status": "draft",
+        "scheduled_time": "Not scheduled",
+        "content": f"Post {post_id}",
+    }
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+@pytest.fixture
+async def slack(http_server):
+    fake = FakeSlack()
+    base_url = await http_server(fake.app())
+    services = []
+
+    def build(**options) -> SlackService:
+        service = SlackService(token="xoxb-test", channel="C-TEST", base_url=f"{base_url}api/", **options)
+        services.append(service)
+        return service
+
+    yield fake, build
+    for service in services:
+        await service.stop()
+
+async def test_burst_of_post_events_becomes_one_digest(slack):
+    fake, build = slack
+    service = build(coalesce_window=0.2)
+
+    for post_id in range(5):
+        assert await service.send_post_event(post_event(post_id))
+    await wait_for(lambda: service.sent == 1)
+    await asyncio.sleep(0.3)
+
+    assert len(fake.messages) == 1
+    message = fake.messages[0]
+    assert message["channel"] == "C-TEST"
+    assert message["blocks"][0]["text"]["text"] == "5 Posts Changed"
+    assert all(f"Post {post_id}" in message["blocks"][1]["text"]["text"] for post_id in range(5))
+
+async def test_single_post_event_is_sent_on_its_own(slack):
+    fake, build = slack
+    service = build(coalesce_window=0.05)
+
+    await service.send_post_event(post_event(1))
+    await wait_for(lambda: service.sent == 1)
+
+    assert fake.messages[0]["blocks"][0]["text"]["text"] == "Post Created"
+
+async def test_rate_limited_send_waits_for_retry_after(slack):
+    fake, build = slack
+    fake.rate_limit = 1
+    service = build(coalesce_window=0)
+
+    await service.send_bulk_notification("deleted", 3)
+    await wait_for(lambda: service.sent == 1)
+
+    assert service.rate_limited == 1
+    assert service.failed == 0
+    assert len(fake.calls) == 2
+    assert fake.calls[1] - fake.calls[0] >= fake.retry_after * 0.9
+    assert fake.messages[0]["text"] == "3 posts deleted"
+
+async def test_gives_up_after_max_retries(slack):
+    fake, build = slack
+    fake.rate_limit, fake.retry_after = 10, 0
+    service = build(coalesce_window=0, max_retries=2)
+
+    await service.send_bulk_notification("deleted", 3)
+    await wait_for(lambda: service.failed == 1)
+
+    assert len(fake.calls) == 3
+    assert service.rate_limited == 2
+    assert service.sent == 0
+
+async def test_full_queue_drops_instead_of_blocking(slack):
+    fake, build = slack
+    service = build(max_queue_size=2, coalesce_window=0.05)
+
+    # Nothing is awaited in between, so the collector cannot drain the queue
+    accepted = [await service.send_post_event(post_event(post_id)) for post_id in range(10)]
+
+    assert accepted == [True, True] + [False] * 8
+    assert service.metrics()["dropped"] == 8
+    await wait_for(lambda: service.sent == 1)
+    assert fake.messages[0]["blocks"][0]["text"]["text"] == "2 Posts Changed"
+
+async def test_stop_flushes_buffered_events(slack):
+    fake, build = slack
+    service = build(coalesce_window=60)
+
+    await service.send_post_event(post_event(1))
+    await service.send_post_event(post_event(2))
+    await asyncio.sleep(0.05)
+    await service.stop()
+
+    assert service.sent == 1
+    assert fake.messages[0]["blocks"][0]["text"]["text"] == "2 Posts Changed"
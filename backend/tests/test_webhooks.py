@@ -0,0 +1,242 @@
+"""WebhookService against a local HTTP receiver."""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+from aiohttp import web
+from sqlalchemy import select
+
+from backend.database import SessionLocal
+from backend.models import WebhookDeadLetter, WebhookSubscription
+from backend.services.outbox import POST_CREATED, POST_PUBLISHED, Event
+from backend.services.webhooks import SIGNATURE_HEADER, WebhookService, generate_secret, sign
+
+pytestmark = pytest.mark.anyio
+
+class Receiver:
+    """Answers each delivery with the next of ``statuses`` (the last one repeats), after ``delay`` seconds."""
+
+    def __init__(self):
+        self.statuses = [200]
+        self.delay = 0.0
+        self.deliveries = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/hook", self.hook)
+        return app
+
+    async def hook(self, request: web.Request) -> web.Response:
+        self.deliveries.append((dict(request.headers), await request.read()))
+        await asyncio.sleep(self.delay)
+        status = self.statuses[min(len(self.deliveries), len(self.statuses)) - 1]
+        return web.Response(status=status)
+
+def event(author_id: int, event_type: str = POST_CREATED) -> Event:
+    return Event(
+        key=uuid.uuid4().hex,
+        type=event_type,
+        author_id=author_id,
+        post_id=1,
+        payload={"post_id": 1},
+        created_at=datetime.now(timezone.utc),
+    )
+
+async def subscribe(user_id: int, url: str, event_types: Optional[List[str]] = None) -> WebhookSubscription:
+    async with SessionLocal() as db:
+        subscription = WebhookSubscription(
+            user_id=user_id, url=url, secret=generate_secret(), event_types=event_types, is_active=True
+        )
+        db.add(subscription)
+        await db.commit()
+        return subscription
+
+async def dead_letters() -> List[WebhookDeadLetter]:
+    async with SessionLocal() as db:
+        return (await db.execute(select(WebhookDeadLetter))).scalars().all()
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+@pytest.fixture
+async def receiver(http_server):
+    receiver = Receiver()
+    receiver.url = f"{await http_server(receiver.app())}hook"
+    return receiver
+
+@pytest.fixture
+async def webhooks():
+    services = []
+
+    def build(**options) -> WebhookService:
+        options = {"allow_private_targets": True, "retry_base": 0.01, **options}
+        service = WebhookService(**options)
+        services.append(service)
+        return service
+
+    yield build
+    for service in services:
+        await service.stop(timeout=0)
+
+async def test_delivers_signed_event(receiver, webhooks, user):
+    subscription = await subscribe(user.id, receiver.url)
+    service = webhooks()
+    sent = event(user.id)
+
+    await service.handle([sent])
+    await wait_for(lambda: service.pending == 0)
+
+    assert service.delivered == 1
+    headers, body = receiver.deliveries[0]
+    assert headers["X-Webhook-Id"] == sent.key
+    assert headers["X-Webhook-Event"] == POST_CREATED
+    assert headers[SIGNATURE_HEADER] == sign(subscription.secret, int(headers["X-Webhook-Timestamp"]), body)
+    assert json.loads(body) == {
+        "id": sent.key, "type": POST_CREATED, "created_at": sent.created_at.isoformat(), "data": {"post_id": 1}
+    }
+
+async def test_only_subscribed_event_types_are_sent(receiver, webhooks, user):
+    await subscribe(user.id, receiver.url, event_types=[POST_PUBLISHED])
+    service = webhooks()
+
+    await service.handle([event(user.id, POST_CREATED), event(user.id, POST_PUBLISHED)])
+    await wait_for(lambda: service.pending == 0)
+
+    assert [headers["X-Webhook-Event"] for headers, _ in receiver.deliveries] == [POST_PUBLISHED]
+
+async def test_redelivered_batch_is_not_sent_twice(receiver, webhooks, user):
+    await subscribe(user.id, receiver.url)
+    service = webhooks()
+    sent = event(user.id)
+
+    await service.handle([sent])
+    await service.handle([sent])
+    await wait_for(lambda: service.pending == 0)
+
+    assert len(receiver.deliveries) == 1
+
+async def test_server_error_is_retried(receiver, webhooks, user):
+    await subscribe(user.id, receiver.url)
+    receiver.statuses = [503, 503, 200]
+    service = webhooks()
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: service.pending == 0)
+
+    assert service.delivered == 1
+    assert service.retried == 2
+    assert len({headers["X-Webhook-Id"] for headers, _ in receiver.deliveries}) == 1
+    assert await dead_letters() == []
+
+async def test_client_error_is_dead_lettered_without_retry(receiver, webhooks, user, client, auth_headers):
+    subscription = await subscribe(user.id, receiver.url)
+    receiver.statuses = [410]
+    service = webhooks()
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: service.pending == 0)
+
+    assert len(receiver.deliveries) == 1
+    assert service.dead_lettered == 1
+    response = await client.get("/api/webhooks/dead-letters", headers=auth_headers)
+    letter, = response.json()
+    assert letter["subscription_id"] == subscription.id
+    assert letter["attempts"] == 1
+    assert letter["last_status"] == 410
+
+async def test_out_of_attempts_is_dead_lettered(receiver, webhooks, user):
+    await subscribe(user.id, receiver.url)
+    receiver.statuses = [500]
+    service = webhooks(max_attempts=3, failure_threshold=10)
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: service.pending == 0)
+
+    letter, = await dead_letters()
+    assert letter.attempts == 3
+    assert letter.last_status == 500
+    assert len(receiver.deliveries) == 3
+
+async def test_circuit_opens_after_consecutive_failures(receiver, webhooks, user):
+    await subscribe(user.id, receiver.url)
+    receiver.statuses = [500]
+    service = webhooks(failure_threshold=2, reset_timeout=60, endpoint_concurrency=1)
+
+    await service.handle([event(user.id) for _ in range(5)])
+    await wait_for(lambda: service.metrics()["open_circuits"] == 1)
+    await asyncio.sleep(0.2)
+
+    # Nothing more goes out until the reset timeout lets a probe through
+    assert len(receiver.deliveries) == 2
+    assert service.pending == 5
+
+async def test_deleting_a_subscription_drops_its_deliveries(receiver, webhooks, user):
+    subscription = await subscribe(user.id, receiver.url)
+    receiver.statuses = [503]
+    service = webhooks(retry_base=60)
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: service.metrics()["waiting_for_retry"] == 1)
+    service.cancel_subscription(subscription.id)
+
+    assert service.pending == 0
+    assert service.metrics()["waiting_for_retry"] == 0
+
+async def test_in_flight_delivery_of_deleted_subscription_is_dropped(receiver, webhooks, user):
+    subscription = await subscribe(user.id, receiver.url)
+    receiver.statuses, receiver.delay = [503], 0.2
+    service = webhooks()
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: receiver.deliveries)
+    service.cancel_subscription(subscription.id)
+    await wait_for(lambda: service.pending == 0)
+    await asyncio.sleep(0.1)
+
+    assert len(receiver.deliveries) == 1
+    assert service.retried == 0
+    assert await dead_letters() == []
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "localhost"])
+async def test_private_targets_are_not_connected_to(receiver, webhooks, user, host):
+    url = receiver.url.replace("127.0.0.1", host)
+    await subscribe(user.id, url)
+    service = webhooks(allow_private_targets=False, max_attempts=1)
+
+    await service.handle([event(user.id)])
+    await wait_for(lambda: service.pending == 0)
+
+    assert receiver.deliveries == []
+    letter, = await dead_letters()
+    # Blocked before any HTTP exchange: no status, only a connection error
+    assert letter.last_status is None
+    assert letter.last_error
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8080/hook",
+    "http://localhost/hook",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+])
+async def test_api_rejects_private_urls(client, auth_headers, url):
+    response = await client.post("/api/webhooks/", json={"url": url}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Webhook URL not allowed")
+
+async def test_api_rejects_unknown_event_types(client, auth_headers):
+    response = await client.post(
+        "/api/webhooks/", json={"url": "https://93.184.216.34/hook", "event_types": ["post.exploded"]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 400
+    assert "post.exploded" in response.json()["detail"]